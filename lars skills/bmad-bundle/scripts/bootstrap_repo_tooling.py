@@ -13,7 +13,13 @@ SKILL_DIR = Path(__file__).resolve().parents[1]
 TEMPLATE_ROOT = SKILL_DIR / 'templates' / 'repo-tooling'
 TEMPLATE_FILES = [
     'README.md',
+    'scripts/bmad_backlog.py',
     'scripts/bmad_bundle.py',
+    'scripts/bmad_deps.py',
+    'scripts/bmad_parallel.py',
+    'scripts/bmad_story.py',
+    'scripts/bmad_supervisor.py',
+    'scripts/bmad_worktrees.py',
     'scripts/check_file_limits.py',
     'scripts/quality_gates.py',
     'tools/bmad/verify_story.py',
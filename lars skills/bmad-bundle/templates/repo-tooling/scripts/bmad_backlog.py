@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""BACKLOG.md parsing plus a structured, locked store of its rows.
+
+BACKLOG.md stays the source of truth (it is committed and edited by hand and
+by merges). `BacklogStore` keeps its rows as JSON in the worktree's git dir
+(`<git-dir>/bmad/<process>/backlog.json`) together with a stamp of the
+markdown (mtime, size, sha256): while the stamp matches, rows come from the
+store instead of re-parsing the table; a changed BACKLOG.md is re-imported.
+Rows are kept by story id (O(1) lookup) with indexes by status and attempts.
+
+Writers hold an exclusive lock (`backlog.lock`, flock / msvcrt) for the whole
+read-modify-write; the JSON and the markdown are written via temp file +
+`os.replace`, so readers never see a partial file. The markdown is only
+regenerated by `render`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import subprocess
+import threading
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+STORE_FORMAT = 1
+
+
+@dataclass
+class Row:
+    story_id: str
+    status: str
+    attempts: int
+    notes: str
+
+
+def parse_backlog(text: str) -> tuple[list[str], list[Row], list[str]]:
+    prefix, rows, suffix = [], [], []
+    in_table = False
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped.startswith("|"):
+            if in_table and rows:
+                suffix.append(line)
+            else:
+                prefix.append(line)
+            continue
+        in_table = True
+        parts = [p.strip() for p in stripped.strip("|").split("|")]
+        if len(parts) < 4 or parts[0].lower() == "story" or parts[0].startswith("---"):
+            if rows:
+                suffix.append(line)
+            else:
+                prefix.append(line)
+            continue
+        rows.append(Row(parts[0], parts[1], int(parts[2] or 0), parts[3]))
+    return prefix, rows, suffix
+
+
+def render_backlog(prefix: list[str], rows: list[Row], suffix: list[str]) -> str:
+    lines = list(prefix)
+    if not any(line.strip().startswith("| Story |") for line in prefix):
+        lines.extend(
+            ["| Story | Status | Attempts | Notes |", "|-------|--------|----------|-------|"]
+        )
+    lines.extend(f"| {r.story_id} | {r.status} | {r.attempts} | {r.notes} |" for r in rows)
+    lines.extend(suffix)
+    return "\n".join(lines).rstrip() + "\n"
+
+
+def _atomic_write(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def default_store_path(backlog: Path) -> Path:
+    """Per worktree: every worktree has its own BACKLOG.md."""
+    cp = subprocess.run(
+        ["git", "-C", str(backlog.parent), "rev-parse", "--absolute-git-dir"],
+        text=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    if cp.returncode != 0:
+        raise SystemExit(f"ERROR: no git dir for {backlog}: {cp.stderr.strip()}")
+    return Path(cp.stdout.strip()) / "bmad" / backlog.parent.name / "backlog.json"
+
+
+class BacklogStore:
+    def __init__(self, backlog: Path, path: Path | None = None) -> None:
+        self.backlog = backlog
+        self.path = path or default_store_path(backlog)
+        self.prefix: list[str] = []
+        self.suffix: list[str] = []
+        self.rows: dict[str, Row] = {}
+        self.by_status: dict[str, list[str]] = {}
+        self.by_attempts: dict[int, list[str]] = {}
+        self._stamp: dict = {}
+
+    def _read_stamp(self, data: bytes | None = None) -> dict:
+        stat = self.backlog.stat()
+        stamp = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+        if data is not None:
+            stamp["sha256"] = hashlib.sha256(data).hexdigest()
+        return stamp
+
+    def _index(self) -> None:
+        self.by_status, self.by_attempts = {}, {}
+        for row in self.rows.values():
+            self.by_status.setdefault(row.status, []).append(row.story_id)
+            self.by_attempts.setdefault(row.attempts, []).append(row.story_id)
+
+    def load(self) -> BacklogStore:
+        """Rows from the store, re-imported from BACKLOG.md when it changed."""
+        try:
+            cached = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            cached = {}
+        stamp = self._read_stamp()
+        saved = cached.get("stamp", {}) if cached.get("format") == STORE_FORMAT else {}
+        saved_stat = (saved.get("mtime_ns"), saved.get("size"))
+        if not saved or saved_stat != (stamp["mtime_ns"], stamp["size"]):
+            data = self.backlog.read_bytes()
+            stamp = self._read_stamp(data)
+            if saved.get("sha256") != stamp["sha256"]:
+                prefix, rows, suffix = parse_backlog(data.decode("utf-8"))
+                cached = {"prefix": prefix, "suffix": suffix, "rows": [asdict(row) for row in rows]}
+            self._stamp = stamp
+            self._apply(cached)
+            self._save()
+            return self
+        self._stamp = saved
+        self._apply(cached)
+        return self
+
+    def _apply(self, cached: dict) -> None:
+        self.prefix, self.suffix = list(cached["prefix"]), list(cached["suffix"])
+        self.rows = {raw["story_id"]: Row(**raw) for raw in cached["rows"]}
+        self._index()
+
+    def _save(self) -> None:
+        payload = {
+            "format": STORE_FORMAT,
+            "stamp": self._stamp,
+            "prefix": self.prefix,
+            "suffix": self.suffix,
+            "rows": [asdict(row) for row in self.rows.values()],
+        }
+        _atomic_write(self.path, json.dumps(payload, indent=1) + "\n")
+
+    @contextmanager
+    def locked(self) -> Iterator[BacklogStore]:
+        """Exclusive read-modify-write: yields the loaded store."""
+        lock_path = self.path.with_name("backlog.lock")
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with lock_path.open("a+b") as handle:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield self.load()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+                else:
+                    handle.seek(0)
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def ordered(self) -> list[Row]:
+        return list(self.rows.values())
+
+    def get(self, story_id: str) -> Row | None:
+        return self.rows.get(story_id)
+
+    def with_status(self, *tags: str) -> list[str]:
+        """Story ids whose status contains any of `tags`, in backlog order."""
+        hits = {
+            sid
+            for status, ids in self.by_status.items()
+            if any(tag in status for tag in tags)
+            for sid in ids
+        }
+        return [sid for sid in self.rows if sid in hits]
+
+    def with_attempts(self, minimum: int) -> list[str]:
+        hits = {
+            sid for attempts, ids in self.by_attempts.items() if attempts >= minimum for sid in ids
+        }
+        return [sid for sid in self.rows if sid in hits]
+
+    def update(self, row: Row) -> None:
+        if row.story_id not in self.rows:
+            raise KeyError(f"story not in backlog: {row.story_id}")
+        self.rows[row.story_id] = row
+        self._index()
+
+    def render(self) -> None:
+        """Regenerate BACKLOG.md from the rows and record its new stamp."""
+        text = render_backlog(self.prefix, self.ordered(), self.suffix)
+        _atomic_write(self.backlog, text)
+        self._stamp = self._read_stamp(text.encode("utf-8"))
+        self._save()
@@ -7,20 +7,26 @@ import argparse
 import json
 import os
 import re
-import shutil
 import subprocess
 import sys
-from dataclasses import dataclass
 from datetime import datetime, timezone
+from functools import partial
 from pathlib import Path
 
-
-@dataclass
-class Row:
-    story_id: str
-    status: str
-    attempts: int
-    notes: str
+from bmad_backlog import BacklogStore, Row
+from bmad_deps import describe_unmet, is_open, schedule, story_dependencies
+from bmad_parallel import run_parallel
+from bmad_story import (
+    assert_clean,
+    backlog_path,
+    git,
+    land_story,
+    update_backlog,
+    verify_story,
+    work_story,
+)
+from bmad_supervisor import Limits
+from bmad_worktrees import DEFAULT_SHARED_DIRS, WorktreePool
 
 
 def _repo_root(raw: str | None = None) -> Path:
@@ -49,7 +55,11 @@ def _slug(name: str) -> str:
 def _process_from_input(repo: Path, input_path: Path) -> str:
     try:
         rel = input_path.resolve().relative_to(repo.resolve())
-        if len(rel.parts) >= 4 and rel.parts[:2] == ("openspec", "changes") and rel.name == "proposal.md":
+        if (
+            len(rel.parts) >= 4
+            and rel.parts[:2] == ("openspec", "changes")
+            and rel.name == "proposal.md"
+        ):
             return _slug(rel.parts[2])
     except Exception:
         pass
@@ -60,182 +70,21 @@ def _run_id() -> str:
     return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
 
 
-def _backlog(repo: Path, process: str) -> Path:
-    return repo / "stories_claude" / process / "BACKLOG.md"
-
-
-def _parse_backlog(text: str) -> tuple[list[str], list[Row], list[str]]:
-    prefix, rows, suffix = [], [], []
-    in_table = False
-    for line in text.splitlines():
-        stripped = line.strip()
-        if not stripped.startswith("|"):
-            if in_table and rows:
-                suffix.append(line)
-            else:
-                prefix.append(line)
-            continue
-        in_table = True
-        parts = [p.strip() for p in stripped.strip("|").split("|")]
-        if len(parts) < 4 or parts[0].lower() == "story" or parts[0].startswith("---"):
-            if rows:
-                suffix.append(line)
-            else:
-                prefix.append(line)
-            continue
-        rows.append(Row(parts[0], parts[1], int(parts[2] or 0), parts[3]))
-    return prefix, rows, suffix
-
-
-def _render_backlog(prefix: list[str], rows: list[Row], suffix: list[str]) -> str:
-    lines = list(prefix)
-    if not any(line.strip().startswith("| Story |") for line in prefix):
-        lines.extend(["| Story | Status | Attempts | Notes |", "|-------|--------|----------|-------|"])
-    lines.extend(f"| {r.story_id} | {r.status} | {r.attempts} | {r.notes} |" for r in rows)
-    lines.extend(suffix)
-    return "\n".join(lines).rstrip() + "\n"
-
-
-def _next_story(rows: list[Row]) -> str | None:
-    for row in rows:
-        if "[IN_PROGRESS]" in row.status:
-            return row.story_id
-    for row in rows:
-        if any(token in row.status for token in ("[TODO]", "[READY]", "READY")):
-            return row.story_id
-    return None
-
-
-def _git(repo: Path, *args: str) -> str:
-    cp = subprocess.run(["git", "-C", str(repo), *args], text=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    if cp.returncode != 0:
-        raise SystemExit(f"git {' '.join(args)} failed: {cp.stderr.strip()}")
-    return (cp.stdout or "").strip()
-
-
-def _dirty_paths(repo: Path) -> list[str]:
-    return [line[3:].strip().split(" -> ")[-1] for line in _git(repo, "status", "--porcelain").splitlines() if line.strip()]
-
-
-def _assert_clean(repo: Path, allowed_prefixes: tuple[str, ...] = ()) -> None:
-    bad = []
-    for path in _dirty_paths(repo):
-        norm = path.replace("\\", "/")
-        if any(norm.startswith(prefix) for prefix in allowed_prefixes):
-            continue
-        bad.append(norm)
-    if bad:
-        raise SystemExit("ERROR: dirty worktree not allowed:\n- " + "\n- ".join(bad))
-
-
-def _integration_wt(primary: Path, process: str) -> Path:
-    return primary / "worktrees_claude" / "merge" / process / "main-merge"
-
-
-def _story_wt(primary: Path, process: str, story_id: str) -> Path:
-    return primary / "worktrees_claude" / "merge" / process / story_id
-
-
-def _ensure_worktree(primary: Path, worktree: Path, branch: str, start: str) -> None:
-    worktree.parent.mkdir(parents=True, exist_ok=True)
-    listing = _git(primary, "worktree", "list", "--porcelain")
-    if f"worktree {worktree}" in listing:
-        return
-    has_branch = subprocess.run(["git", "-C", str(primary), "show-ref", "--verify", "--quiet", f"refs/heads/{branch}"]).returncode == 0
-    cmd = ["git", "-C", str(primary), "worktree", "add"]
-    cmd += [str(worktree), branch] if has_branch else ["-b", branch, str(worktree), start]
-    if subprocess.run(cmd, cwd=str(primary)).returncode != 0:
-        raise SystemExit(f"ERROR: failed to provision worktree {worktree}")
+def _next_story(rows: list[Row], deps: dict[str, set[str]]) -> str | None:
+    ready = schedule(rows, deps)
+    return ready[0] if ready else None
 
 
-def _commit_if_dirty(repo: Path, message: str, pathspec: str | None = None) -> None:
-    if not _dirty_paths(repo):
-        return
-    add_cmd = ["git", "-C", str(repo), "add", pathspec] if pathspec else ["git", "-C", str(repo), "add", "-A"]
-    if subprocess.run(add_cmd, cwd=str(repo)).returncode != 0:
-        raise SystemExit(f"ERROR: git add failed in {repo}")
-    has_staged = subprocess.run(["git", "-C", str(repo), "diff", "--cached", "--quiet"], cwd=str(repo)).returncode != 0
-    if not has_staged:
-        return
-    if subprocess.run(["git", "-C", str(repo), "commit", "-m", message], cwd=str(repo)).returncode != 0:
-        raise SystemExit(f"ERROR: git commit failed in {repo}")
-
-
-def _proof_done(output_root: Path, process: str, run_id: str, story_id: str) -> bool:
-    proof = output_root / "bmad" / process / run_id / story_id / "final.json"
-    if not proof.is_file():
-        return False
+def _load_deps(repo: Path, process: str, rows: list[Row]) -> dict[str, set[str]] | None:
     try:
-        return json.loads(proof.read_text(encoding="utf-8")).get("done") is True
-    except Exception:
-        return False
+        return story_dependencies(repo, process, rows)
+    except ValueError as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        return None
 
 
-def _verify_story(repo_for_story: Path, output_root: Path, process: str, run_id: str, story_id: str, timeout: int) -> bool:
-    env = dict(os.environ)
-    env["BMAD_REPO_ROOT"] = str(repo_for_story)
-    env["BMAD_OUTPUT_ROOT"] = str(output_root)
-    cmd = [sys.executable, str((repo_for_story / "tools" / "bmad" / "verify_story.py").resolve()), "--process", process, "--story-id", story_id, "--run-id", run_id, "--timeout", str(timeout)]
-    code = subprocess.run(cmd, cwd=str(repo_for_story), env=env).returncode
-    return code == 0 and _proof_done(output_root, process, run_id, story_id)
-
-
-def _update_backlog(repo: Path, process: str, story_id: str, done: bool) -> None:
-    backlog = _backlog(repo, process)
-    prefix, rows, suffix = _parse_backlog(backlog.read_text(encoding="utf-8"))
-    updated = []
-    for row in rows:
-        if row.story_id != story_id:
-            updated.append(row)
-            continue
-        attempts = row.attempts if done else row.attempts + 1
-        status = "[DONE]" if done else ("[BLOCKED]" if attempts >= 3 else "[IN_PROGRESS]")
-        notes = row.notes if done else ((row.notes + "; " if row.notes else "") + "proof_failed")
-        updated.append(Row(row.story_id, status, attempts, notes))
-    backlog.write_text(_render_backlog(prefix, updated, suffix), encoding="utf-8")
-
-
-def _story_prompt(story_path: Path, process: str, story_id: str) -> str:
-    return (
-        f"Implement BMAD story {story_id} for process {process}.\n"
-        f"Work only inside this git worktree: {story_path.parent.parent.parent}\n\n"
-        "Hard rules:\n"
-        "- Read and obey AGENTS.md and the story file below.\n"
-        "- Respect the story's touched-paths allowlist.\n"
-        "- No broad refactors. No destructive git commands. No merges.\n"
-        "- Finish only when the story Verification commands pass.\n\n"
-        f"--- BEGIN STORY ({story_path.name}) ---\n{story_path.read_text(encoding='utf-8')}\n--- END STORY ---\n"
-    )
-
-
-def _resolve_codex_binary() -> str:
-    codex = shutil.which("codex")
-    if codex is None:
-        raise SystemExit("ERROR: codex command not found on PATH")
-    primary = Path(codex).resolve()
-    for raw_dir in os.environ.get("PATH", "").split(os.pathsep):
-        if not raw_dir:
-            continue
-        candidate = Path(raw_dir) / "codex"
-        if not candidate.is_file() or not os.access(candidate, os.X_OK):
-            continue
-        if candidate.resolve() != primary:
-            return str(candidate)
-    return str(primary)
-
-
-def _run_codex(story_wt: Path, process: str, story_id: str, log_dir: Path) -> int:
-    codex_bin = _resolve_codex_binary()
-    log_dir.mkdir(parents=True, exist_ok=True)
-    out_path, err_path, msg_path = log_dir / "codex.stdout.log", log_dir / "codex.stderr.log", log_dir / "last_message.txt"
-    story_path = story_wt / "stories_claude" / process / f"{story_id}.md"
-    cmd = [codex_bin, "exec", "--dangerously-bypass-approvals-and-sandbox", "-C", str(story_wt), "-o", str(msg_path), "-"]
-    with out_path.open("w", encoding="utf-8") as out, err_path.open("w", encoding="utf-8") as err:
-        proc = subprocess.Popen(cmd, cwd=str(story_wt), stdin=subprocess.PIPE, stdout=out, stderr=err, text=True)
-        assert proc.stdin is not None
-        proc.stdin.write(_story_prompt(story_path, process, story_id))
-        proc.stdin.close()
-        return int(proc.wait())
+def _integration_wt(primary: Path, process: str) -> Path:
+    return primary / "worktrees_claude" / "merge" / process / "main-merge"
 
 
 def cmd_init(args: argparse.Namespace) -> int:
@@ -243,7 +92,7 @@ def cmd_init(args: argparse.Namespace) -> int:
         print("ERROR: --auto is forbidden for Codex BMAD bundle", file=sys.stderr)
         return 2
     repo = _repo_root(args.repo_root)
-    input_path = (repo / args.input).resolve() if not Path(args.input).is_absolute() else Path(args.input).resolve()
+    input_path = (repo / args.input).resolve()  # an absolute --input replaces repo
     if not input_path.is_file():
         print(f"ERROR: input not found: {input_path}", file=sys.stderr)
         return 2
@@ -254,73 +103,117 @@ def cmd_init(args: argparse.Namespace) -> int:
 
 
 def cmd_next(args: argparse.Namespace) -> int:
-    repo, backlog = _repo_root(args.repo_root), _backlog(_repo_root(args.repo_root), args.process)
+    repo = _repo_root(args.repo_root)
+    backlog = backlog_path(repo, args.process)
     if not backlog.is_file():
         print(f"ERROR: BACKLOG.md not found: {backlog}", file=sys.stderr)
         return 2
-    _, rows, _ = _parse_backlog(backlog.read_text(encoding="utf-8"))
-    story_id = _next_story(rows)
+    rows = BacklogStore(backlog).load().ordered()
+    deps = _load_deps(repo, args.process, rows)
+    if deps is None:
+        return 2
+    story_id = _next_story(rows, deps)
     print(story_id or "")
     return 0 if story_id else 1
 
 
 def cmd_verify(args: argparse.Namespace) -> int:
     repo = _repo_root(args.repo_root)
-    done = _verify_story(repo, repo / "output", args.process, args.run_id, args.story_id, args.timeout)
+    process, story_id, run_id = args.process, args.story_id, args.run_id
+    done = verify_story(repo, repo / "output", process, run_id, story_id, args.timeout)
     if not args.dry_run:
-        _update_backlog(repo, args.process, args.story_id, done)
-    print(json.dumps({"process": args.process, "story_id": args.story_id, "run_id": args.run_id, "done": done}, indent=2))
+        update_backlog(repo, process, story_id, done)
+    result = {"process": process, "story_id": story_id, "run_id": run_id, "done": done}
+    print(json.dumps(result, indent=2))
     return 0 if done else 1
 
 
 def cmd_check(args: argparse.Namespace) -> int:
-    repo, backlog = _repo_root(args.repo_root), _backlog(_repo_root(args.repo_root), args.process)
+    repo = _repo_root(args.repo_root)
+    backlog = backlog_path(repo, args.process)
     if not backlog.is_file():
         print(f"ERROR: BACKLOG.md not found: {backlog}", file=sys.stderr)
         return 2
-    _, rows, _ = _parse_backlog(backlog.read_text(encoding="utf-8"))
     open_tags = ("[TODO]", "[READY]", "READY", "[IN_PROGRESS]", "[BLOCKED]")
-    if any(any(tag in row.status for tag in open_tags) for row in rows):
+    if BacklogStore(backlog).load().with_status(*open_tags):
         print("NOT_COMPLETE")
         return 1
     env = dict(os.environ)
     env["BMAD_REPO_ROOT"] = str(repo)
-    cmd = [sys.executable, str((repo / "tools" / "bmad" / "ralph_verify_backlog.py").resolve()), "--process", args.process, "--run-id", args.run_id]
+    cmd = [
+        sys.executable,
+        str((repo / "tools" / "bmad" / "ralph_verify_backlog.py").resolve()),
+        "--process",
+        args.process,
+        "--run-id",
+        args.run_id,
+    ]
     code = subprocess.run(cmd, cwd=str(repo), env=env).returncode
     if code == 0:
         print("RALPH_COMPLETE")
     return code
 
 
+def _run2_parallel(repo: Path, pool: WorktreePool, args: argparse.Namespace) -> int:
+    process, run_id = args.process, args.run_id
+    rows = BacklogStore(backlog_path(repo, process)).load().ordered()
+    deps = _load_deps(repo, process, rows)
+    if deps is None:
+        return 2
+
+    work = partial(work_story, repo, pool, process, run_id, args)
+    land = partial(land_story, repo, pool, process)
+    code = run_parallel(rows, deps, args.parallel, work, land)
+    if code:
+        return code
+    return cmd_check(argparse.Namespace(process=process, run_id=run_id, repo_root=str(repo)))
+
+
 def cmd_run2(args: argparse.Namespace) -> int:
     repo, primary = _repo_root(args.repo_root), _primary_root(_repo_root(args.repo_root))
     process, run_id = args.process, args.run_id
     integration = _integration_wt(primary, process)
-    if repo.resolve() != integration.resolve() or _git(repo, "branch", "--show-current") != process:
-        print(f"ERROR: RUN2 must be executed from {integration} on branch {process}", file=sys.stderr)
+    if repo.resolve() != integration.resolve() or git(repo, "branch", "--show-current") != process:
+        print(
+            f"ERROR: RUN2 must be executed from {integration} on branch {process}", file=sys.stderr
+        )
+        return 2
+    if args.parallel < 1:
+        print("ERROR: --parallel must be >= 1", file=sys.stderr)
         return 2
-    _assert_clean(repo, allowed_prefixes=("output/", "logs/"))
+    assert_clean(repo, allowed_prefixes=("output/", "logs/"))
+    shared = tuple(name.strip() for name in args.share_deps.split(",") if name.strip())
+    budget = int(args.disk_budget_mb * 1024 * 1024) if args.disk_budget_mb is not None else None
+    pool = WorktreePool(primary, process, args.parallel if args.pool else 0, shared, budget)
+    pool.provision()
+    if args.parallel > 1:
+        if not backlog_path(repo, process).is_file():
+            print(f"ERROR: BACKLOG.md not found: {backlog_path(repo, process)}", file=sys.stderr)
+            return 2
+        return _run2_parallel(repo, pool, args)
     while True:
-        backlog = _backlog(repo, process)
+        backlog = backlog_path(repo, process)
         if not backlog.is_file():
             print(f"ERROR: BACKLOG.md not found: {backlog}", file=sys.stderr)
             return 2
-        _, rows, _ = _parse_backlog(backlog.read_text(encoding="utf-8"))
-        story_id = _next_story(rows)
+        rows = BacklogStore(backlog).load().ordered()
+        deps = _load_deps(repo, process, rows)
+        if deps is None:
+            return 2
+        story_id = _next_story(rows, deps)
+        waiting = [row.story_id for row in rows if is_open(row.status)]
+        if story_id is None and waiting:
+            unmet = describe_unmet(waiting, deps)
+            print(f"ERROR: no runnable story left; unmet dependencies: {unmet}", file=sys.stderr)
+            return 1
         if story_id is None:
-            return cmd_check(argparse.Namespace(process=process, run_id=run_id, repo_root=str(repo)))
-        branch, story_wt = f"{process}-{story_id}", _story_wt(primary, process, story_id)
-        _ensure_worktree(primary, story_wt, branch, process)
-        _assert_clean(story_wt)
-        _run_codex(story_wt, process, story_id, repo / "logs" / "bmad" / process / run_id / story_id)
-        done = _verify_story(story_wt, repo / "output", process, run_id, story_id, args.timeout)
-        if done:
-            _commit_if_dirty(story_wt, f"bmad({process}): {story_id}")
-            if subprocess.run(["git", "-C", str(repo), "merge", "--no-ff", "--no-edit", branch], cwd=str(repo)).returncode != 0:
-                print(f"ERROR: merge failed for {branch}", file=sys.stderr)
-                return 2
-        _update_backlog(repo, process, story_id, done)
-        _commit_if_dirty(repo, f"bmad({process}): backlog {story_id}", f"stories_claude/{process}/BACKLOG.md")
+            return cmd_check(
+                argparse.Namespace(process=process, run_id=run_id, repo_root=str(repo))
+            )
+        done = work_story(repo, pool, process, run_id, args, story_id)
+        code = land_story(repo, pool, process, story_id, done)
+        if code is not None:
+            return code
         if not done:
             return 1
 
@@ -330,11 +223,60 @@ def main(argv: list[str] | None = None) -> int:
     sub = parser.add_subparsers(dest="cmd", required=True)
     common = argparse.ArgumentParser(add_help=False)
     common.add_argument("--repo-root", default=None)
-    p_init = sub.add_parser("init", parents=[common]); p_init.add_argument("--input", required=True); p_init.add_argument("--run-id", default=None); p_init.add_argument("--auto", action="store_true"); p_init.set_defaults(func=cmd_init)
-    p_next = sub.add_parser("next", parents=[common]); p_next.add_argument("--process", required=True); p_next.set_defaults(func=cmd_next)
-    p_verify = sub.add_parser("verify", parents=[common]); p_verify.add_argument("--process", required=True); p_verify.add_argument("--story-id", required=True); p_verify.add_argument("--run-id", required=True); p_verify.add_argument("--timeout", type=int, default=2400); p_verify.add_argument("--dry-run", action="store_true"); p_verify.set_defaults(func=cmd_verify)
-    p_check = sub.add_parser("check", parents=[common]); p_check.add_argument("--process", required=True); p_check.add_argument("--run-id", required=True); p_check.set_defaults(func=cmd_check)
-    p_run2 = sub.add_parser("run2", parents=[common]); p_run2.add_argument("--process", required=True); p_run2.add_argument("--run-id", required=True); p_run2.add_argument("--timeout", type=int, default=2400); p_run2.set_defaults(func=cmd_run2)
+    p_init = sub.add_parser("init", parents=[common])
+    p_init.add_argument("--input", required=True)
+    p_init.add_argument("--run-id", default=None)
+    p_init.add_argument("--auto", action="store_true")
+    p_init.set_defaults(func=cmd_init)
+    p_next = sub.add_parser("next", parents=[common])
+    p_next.add_argument("--process", required=True)
+    p_next.set_defaults(func=cmd_next)
+    p_verify = sub.add_parser("verify", parents=[common])
+    p_verify.add_argument("--process", required=True)
+    p_verify.add_argument("--story-id", required=True)
+    p_verify.add_argument("--run-id", required=True)
+    p_verify.add_argument("--timeout", type=int, default=2400)
+    p_verify.add_argument("--dry-run", action="store_true")
+    p_verify.set_defaults(func=cmd_verify)
+    p_check = sub.add_parser("check", parents=[common])
+    p_check.add_argument("--process", required=True)
+    p_check.add_argument("--run-id", required=True)
+    p_check.set_defaults(func=cmd_check)
+    p_run2 = sub.add_parser("run2", parents=[common])
+    p_run2.add_argument("--process", required=True)
+    p_run2.add_argument("--run-id", required=True)
+    p_run2.add_argument("--timeout", type=int, default=2400)
+    p_run2.add_argument(
+        "--parallel", type=int, default=1, help="Run up to N independent stories at once"
+    )
+    p_run2.add_argument(
+        "--pool", action="store_true", help="Reuse --parallel pre-provisioned worktrees (pool-1..N)"
+    )
+    p_run2.add_argument(
+        "--share-deps",
+        default=",".join(DEFAULT_SHARED_DIRS),
+        help="Comma-separated dependency dirs hardlinked into new worktrees "
+        "('' = none); virtualenvs are never shared",
+    )
+    p_run2.add_argument(
+        "--disk-budget-mb",
+        type=float,
+        default=None,
+        help="Prune merged story worktrees above this size",
+    )
+    p_run2.add_argument(
+        "--codex-timeout",
+        type=float,
+        default=Limits.wall_s,
+        help="Stop codex after N seconds per story (0 = no limit)",
+    )
+    p_run2.add_argument(
+        "--codex-idle-timeout",
+        type=float,
+        default=Limits.idle_s,
+        help="Stop codex after N seconds without output (0 = no limit)",
+    )
+    p_run2.set_defaults(func=cmd_run2)
     args = parser.parse_args(argv)
     return int(args.func(args))
 
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Story dependency graph and scheduler for BMAD RUN2.
+
+Sources (merged per story):
+- BACKLOG Notes column: `depends on OPS-003` or `depends on: OPS-003, OPS-004`
+- story file `stories_claude/<process>/<story_id>.md`: a dedicated `Depends on:`
+  field (`depends_on: [OPS-003, OPS-004]`, `- **Depends on:** OPS-003`); the
+  colon is required, so prose such as "Depends on HTTP-2 support" is not read
+
+Only backlog story ids count as dependencies; an id-shaped token (`ABC-12`) in
+one of those fields that is not in the backlog is an error (fail-closed), and
+so is a cycle.
+
+`schedule` orders the ready stories (all dependencies [DONE]): [IN_PROGRESS]
+first (finish the current story), then the longest chain of open stories that
+still waits on it (critical path), then backlog order. Both the sequential and
+the parallel runner take their next story from it.
+"""
+
+from __future__ import annotations
+
+import re
+from pathlib import Path
+
+NOTES_RE = re.compile(r"depends[ _]on:?\s*([^;|]*)", re.IGNORECASE)
+STORY_RE = re.compile(r"^\s*(?:[-*]\s*)?\**depends[ _]on\**:\**\s*(.*)$", re.IGNORECASE)
+ID_SHAPE = re.compile(r"^[A-Za-z][\w.]*-\d+$")
+TOKEN_SPLIT = re.compile(r"[\s,\[\]\"'`]+")
+OPEN_TAGS = ("[TODO]", "[READY]", "READY", "[IN_PROGRESS]")
+
+
+def is_open(status: str) -> bool:
+    return any(tag in status for tag in OPEN_TAGS)
+
+
+def _tokens(raw: str) -> list[str]:
+    return [token.strip(".") for token in TOKEN_SPLIT.split(raw) if token.strip(".")]
+
+
+def _story_refs(repo: Path, process: str, story_id: str) -> list[str]:
+    story = repo / "stories_claude" / process / f"{story_id}.md"
+    if not story.is_file():
+        return []
+    refs: list[str] = []
+    for line in story.read_text(encoding="utf-8").splitlines():
+        match = STORY_RE.match(line)
+        if match:
+            refs.extend(_tokens(match.group(1)))
+    return refs
+
+
+def story_dependencies(repo: Path, process: str, rows: list) -> dict[str, set[str]]:
+    """Map each backlog story id to the backlog ids it depends on.
+
+    Raises ValueError on unknown ids or cycles.
+    """
+    known = {row.story_id for row in rows}
+    deps: dict[str, set[str]] = {}
+    for row in rows:
+        refs = [
+            token for match in NOTES_RE.finditer(row.notes) for token in _tokens(match.group(1))
+        ]
+        refs += _story_refs(repo, process, row.story_id)
+        unknown = sorted({ref for ref in refs if ref not in known and ID_SHAPE.match(ref)})
+        if unknown:
+            raise ValueError(f"{row.story_id} depends on unknown stories: {', '.join(unknown)}")
+        deps[row.story_id] = {ref for ref in refs if ref in known and ref != row.story_id}
+    cycle = find_cycle(deps)
+    if cycle:
+        raise ValueError("dependency cycle: " + " -> ".join(cycle))
+    return deps
+
+
+def find_cycle(deps: dict[str, set[str]]) -> list[str] | None:
+    """A dependency cycle as a closed path (`A -> B -> A`), or None."""
+    state: dict[str, int] = {}  # 1 = on the current path, 2 = finished
+    for start in deps:
+        if start in state:
+            continue
+        path, stack = [start], [iter(sorted(deps[start]))]
+        state[start] = 1
+        while stack:
+            nxt = next(stack[-1], None)
+            if nxt is None:
+                state[path.pop()] = 2
+                stack.pop()
+            elif state.get(nxt) == 1:
+                return path[path.index(nxt) :] + [nxt]
+            elif nxt not in state:
+                state[nxt] = 1
+                path.append(nxt)
+                stack.append(iter(sorted(deps.get(nxt, ()))))
+    return None
+
+
+def chain_lengths(deps: dict[str, set[str]], open_ids: list[str]) -> dict[str, int]:
+    """Per open story: the longest chain of open stories waiting on it (itself included)."""
+    dependents: dict[str, list[str]] = {sid: [] for sid in open_ids}
+    for sid in open_ids:
+        for dep in deps.get(sid, ()):
+            if dep in dependents:
+                dependents[dep].append(sid)
+    lengths: dict[str, int] = {}
+    for sid in reversed(_topological(open_ids, deps)):
+        lengths[sid] = 1 + max((lengths[child] for child in dependents[sid]), default=0)
+    return lengths
+
+
+def _topological(open_ids: list[str], deps: dict[str, set[str]]) -> list[str]:
+    open_set = set(open_ids)
+    remaining = {sid: deps.get(sid, set()) & open_set for sid in open_ids}
+    ordered: list[str] = []
+    while remaining:
+        ready = [sid for sid, pending in remaining.items() if not pending]
+        if not ready:
+            raise ValueError("dependency cycle between: " + ", ".join(remaining))
+        for sid in ready:
+            del remaining[sid]
+            ordered.append(sid)
+        for pending in remaining.values():
+            pending.difference_update(ready)
+    return ordered
+
+
+def schedule(
+    rows: list, deps: dict[str, set[str]], status: dict[str, str] | None = None
+) -> list[str]:
+    """Ready open stories, best first (`status` overrides the row statuses)."""
+    status = status if status is not None else {row.story_id: row.status for row in rows}
+    order = {row.story_id: idx for idx, row in enumerate(rows)}
+    open_ids = [row.story_id for row in rows if is_open(status[row.story_id])]
+    lengths = chain_lengths(deps, open_ids)
+    ready = [
+        sid for sid in open_ids if all("[DONE]" in status.get(dep, "") for dep in deps.get(sid, ()))
+    ]
+    return sorted(
+        ready, key=lambda sid: ("[IN_PROGRESS]" not in status[sid], -lengths[sid], order[sid])
+    )
+
+
+def describe_unmet(story_ids: list[str], deps: dict[str, set[str]]) -> str:
+    return ", ".join(f"{sid} (needs {', '.join(sorted(deps.get(sid, ())))})" for sid in story_ids)
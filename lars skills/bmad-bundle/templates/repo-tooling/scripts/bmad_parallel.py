@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Parallel RUN2: independent stories at once, each in its own story worktree.
+
+A story starts once all of its dependencies are [DONE], so its branch is cut
+from a `<process>` branch that already contains them; free workers take the
+next story from `bmad_deps.schedule` (critical path first). Work
+(codex + proof in the story worktree) runs on a worker thread per story;
+landing (merge + BACKLOG update in main-merge) only happens on the calling
+thread, one story at a time in a fixed landing order: backlog order, except that
+a story never lands before its own dependencies (see `landing_order`). A
+finished story waits for every story before it in that order, whether it is
+still running or not started yet. After a failed story nothing new is started,
+so stories that have not started stop blocking; running stories are drained.
+After a failed merge nothing is landed anymore.
+"""
+
+from __future__ import annotations
+
+import heapq
+import sys
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable
+
+from bmad_deps import describe_unmet, is_open, schedule
+
+
+def landing_order(rows: list, deps: dict[str, set[str]], status: dict[str, str]) -> dict[str, int]:
+    """Position of each open story in the landing order.
+
+    Lowest backlog index first among the stories whose dependencies come earlier
+    (or are [DONE]). A story that waits on a story that is neither open nor
+    [DONE] (for example [BLOCKED]) can never start and gets no position.
+    """
+    order = {row.story_id: idx for idx, row in enumerate(rows)}
+    waiting = {
+        sid: {dep for dep in deps.get(sid, ()) if "[DONE]" not in status.get(dep, "")}
+        for sid in order
+        if is_open(status[sid])
+    }
+    heap = [order[sid] for sid, unmet in waiting.items() if not unmet]
+    heapq.heapify(heap)
+    sequence: dict[str, int] = {}
+    while heap:
+        story_id = rows[heapq.heappop(heap)].story_id
+        sequence[story_id] = len(sequence)
+        for other, unmet in waiting.items():
+            if story_id in unmet:
+                unmet.discard(story_id)
+                if not unmet:
+                    heapq.heappush(heap, order[other])
+    return sequence
+
+
+def _land_ready(
+    finished: dict[str, bool],
+    running: dict[Future, str],
+    pending: set[str],
+    sequence: dict[str, int],
+    starting: bool,
+    land: Callable[[str, bool], int | None],
+    status: dict[str, str],
+) -> tuple[int, bool]:
+    """Land finished stories in landing order; returns (exit code, merge failed).
+
+    A story lands once no story before it is running, or still pending while new
+    stories may start (`starting`).
+    """
+    code = 0
+    for story_id in sorted(finished, key=sequence.__getitem__):
+        blocking = set(running.values()) | (pending if starting and code == 0 else set())
+        if any(sequence[other] < sequence[story_id] for other in blocking if other in sequence):
+            break
+        done = finished.pop(story_id)
+        print(f"RUN2_LAND {story_id} done={str(done).lower()}", flush=True)
+        result = land(story_id, done)
+        if result is not None:
+            return result, True
+        status[story_id] = "[DONE]" if done else "[IN_PROGRESS]"
+        code = code or (0 if done else 1)
+    return code, False
+
+
+def run_parallel(
+    rows: list,
+    deps: dict[str, set[str]],
+    parallel: int,
+    work: Callable[[str], bool],
+    land: Callable[[str, bool], int | None],
+) -> int:
+    """Run open backlog stories, `parallel` at a time.
+
+    `work(story_id) -> done` runs on a worker thread; `land(story_id, done)` runs
+    on this thread and returns an exit code to abort (merge failure) or None.
+    Returns 0 when every open story landed as done.
+    """
+    order = {row.story_id: idx for idx, row in enumerate(rows)}
+    status = {row.story_id: row.status for row in rows}
+    pending = {row.story_id for row in rows if is_open(row.status)}
+    sequence = landing_order(rows, deps, status)
+    running: dict[Future, str] = {}
+    finished: dict[str, bool] = {}
+    code, halted = 0, False
+    with ThreadPoolExecutor(max_workers=parallel) as pool:
+        while True:
+            if not halted:
+                landed, halted = _land_ready(
+                    finished, running, pending, sequence, code == 0, land, status
+                )
+                code = landed if halted else (code or landed)
+            while not halted and code == 0 and len(running) < parallel:
+                ready = [sid for sid in schedule(rows, deps, status) if sid in pending]
+                if not ready:
+                    break
+                pending.discard(ready[0])
+                print(f"RUN2_START {ready[0]}", flush=True)
+                running[pool.submit(work, ready[0])] = ready[0]
+            if not running:
+                break
+            completed, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in completed:
+                story_id = running.pop(future)
+                try:
+                    finished[story_id] = bool(future.result())
+                except (Exception, SystemExit) as exc:
+                    print(f"ERROR: story {story_id} aborted: {exc}", file=sys.stderr)
+                    code, halted = 2, True
+    if code == 0 and pending:
+        blocked = describe_unmet(sorted(pending, key=order.__getitem__), deps)
+        print(f"ERROR: no runnable story left; unmet dependencies: {blocked}", file=sys.stderr)
+        return 1
+    return code
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""One RUN2 story: story worktree -> codex -> proof -> commit, then landing in main-merge.
+
+Shared by the sequential and the parallel RUN2 (`bmad_bundle.py run2`); `verify`
+uses the same proof check and BACKLOG update.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+from bmad_backlog import BacklogStore, Row
+from bmad_supervisor import Limits, supervise
+from bmad_worktrees import WorktreePool
+
+
+def backlog_path(repo: Path, process: str) -> Path:
+    return repo / "stories_claude" / process / "BACKLOG.md"
+
+
+def git(repo: Path, *args: str) -> str:
+    cp = subprocess.run(
+        ["git", "-C", str(repo), *args], text=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    if cp.returncode != 0:
+        raise SystemExit(f"git {' '.join(args)} failed: {cp.stderr.strip()}")
+    return (cp.stdout or "").strip()
+
+
+def _dirty_paths(repo: Path) -> list[str]:
+    return [
+        line[3:].strip().split(" -> ")[-1]
+        for line in git(repo, "status", "--porcelain").splitlines()
+        if line.strip()
+    ]
+
+
+def assert_clean(repo: Path, allowed_prefixes: tuple[str, ...] = ()) -> None:
+    bad = []
+    for path in _dirty_paths(repo):
+        norm = path.replace("\\", "/")
+        if any(norm.startswith(prefix) for prefix in allowed_prefixes):
+            continue
+        bad.append(norm)
+    if bad:
+        raise SystemExit("ERROR: dirty worktree not allowed:\n- " + "\n- ".join(bad))
+
+
+def _commit_if_dirty(repo: Path, message: str, pathspec: str | None = None) -> None:
+    if not _dirty_paths(repo):
+        return
+    base = ["git", "-C", str(repo)]
+    add_cmd = [*base, "add", pathspec] if pathspec else [*base, "add", "-A"]
+    if subprocess.run(add_cmd, cwd=str(repo)).returncode != 0:
+        raise SystemExit(f"ERROR: git add failed in {repo}")
+    has_staged = subprocess.run([*base, "diff", "--cached", "--quiet"], cwd=str(repo)).returncode
+    if not has_staged:
+        return
+    if subprocess.run([*base, "commit", "-m", message], cwd=str(repo)).returncode != 0:
+        raise SystemExit(f"ERROR: git commit failed in {repo}")
+
+
+def _proof_done(output_root: Path, process: str, run_id: str, story_id: str) -> bool:
+    proof = output_root / "bmad" / process / run_id / story_id / "final.json"
+    if not proof.is_file():
+        return False
+    try:
+        return json.loads(proof.read_text(encoding="utf-8")).get("done") is True
+    except Exception:
+        return False
+
+
+def verify_story(
+    repo_for_story: Path, output_root: Path, process: str, run_id: str, story_id: str, timeout: int
+) -> bool:
+    env = dict(os.environ)
+    env["BMAD_REPO_ROOT"] = str(repo_for_story)
+    env["BMAD_OUTPUT_ROOT"] = str(output_root)
+    cmd = [
+        sys.executable,
+        str((repo_for_story / "tools" / "bmad" / "verify_story.py").resolve()),
+        "--process",
+        process,
+        "--story-id",
+        story_id,
+        "--run-id",
+        run_id,
+        "--timeout",
+        str(timeout),
+    ]
+    code = subprocess.run(cmd, cwd=str(repo_for_story), env=env).returncode
+    return code == 0 and _proof_done(output_root, process, run_id, story_id)
+
+
+def update_backlog(repo: Path, process: str, story_id: str, done: bool) -> None:
+    with BacklogStore(backlog_path(repo, process)).locked() as store:
+        row = store.get(story_id)
+        if row is None:
+            return
+        attempts = row.attempts if done else row.attempts + 1
+        status = "[DONE]" if done else ("[BLOCKED]" if attempts >= 3 else "[IN_PROGRESS]")
+        notes = row.notes if done else ((row.notes + "; " if row.notes else "") + "proof_failed")
+        store.update(Row(row.story_id, status, attempts, notes))
+        store.render()
+
+
+def _story_prompt(story_path: Path, process: str, story_id: str) -> str:
+    return (
+        f"Implement BMAD story {story_id} for process {process}.\n"
+        f"Work only inside this git worktree: {story_path.parent.parent.parent}\n\n"
+        "Hard rules:\n"
+        "- Read and obey AGENTS.md and the story file below.\n"
+        "- Respect the story's touched-paths allowlist.\n"
+        "- No broad refactors. No destructive git commands. No merges.\n"
+        "- Finish only when the story Verification commands pass.\n\n"
+        f"--- BEGIN STORY ({story_path.name}) ---\n"
+        f"{story_path.read_text(encoding='utf-8')}\n--- END STORY ---\n"
+    )
+
+
+def _resolve_codex_binary() -> str:
+    codex = shutil.which("codex")
+    if codex is None:
+        raise SystemExit("ERROR: codex command not found on PATH")
+    primary = Path(codex).resolve()
+    for raw_dir in os.environ.get("PATH", "").split(os.pathsep):
+        if not raw_dir:
+            continue
+        candidate = Path(raw_dir) / "codex"
+        if not candidate.is_file() or not os.access(candidate, os.X_OK):
+            continue
+        if candidate.resolve() != primary:
+            return str(candidate)
+    return str(primary)
+
+
+def _run_codex(story_wt: Path, process: str, story_id: str, log_dir: Path, limits: Limits) -> int:
+    codex_bin = _resolve_codex_binary()
+    log_dir.mkdir(parents=True, exist_ok=True)
+    story_path = story_wt / "stories_claude" / process / f"{story_id}.md"
+    cmd = [
+        codex_bin,
+        "exec",
+        "--dangerously-bypass-approvals-and-sandbox",
+        "-C",
+        str(story_wt),
+        "-o",
+        str(log_dir / "last_message.txt"),
+        "-",
+    ]
+    return supervise(
+        cmd, story_wt, _story_prompt(story_path, process, story_id), log_dir, story_id, limits
+    ).exit_code
+
+
+def work_story(
+    repo: Path, pool: WorktreePool, process: str, run_id: str, args, story_id: str
+) -> bool:
+    """Codex + proof for one story in a pool/story worktree; commits there when done."""
+    story_wt = pool.acquire(story_id)
+    try:
+        assert_clean(story_wt)
+        limits = Limits(wall_s=args.codex_timeout, idle_s=args.codex_idle_timeout)
+        log_dir = repo / "logs" / "bmad" / process / run_id / story_id
+        _run_codex(story_wt, process, story_id, log_dir, limits)
+        done = verify_story(story_wt, repo / "output", process, run_id, story_id, args.timeout)
+        if done:
+            _commit_if_dirty(story_wt, f"bmad({process}): {story_id}")
+        return done
+    finally:
+        pool.release(story_wt)
+
+
+def land_story(
+    repo: Path, pool: WorktreePool, process: str, story_id: str, done: bool
+) -> int | None:
+    """Merge a done story into main-merge and record it in BACKLOG.md; an exit code aborts RUN2."""
+    branch = f"{process}-{story_id}"
+    merge = ["git", "-C", str(repo), "merge", "--no-ff", "--no-edit", branch]
+    if done and subprocess.run(merge, cwd=str(repo)).returncode != 0:
+        subprocess.run(["git", "-C", str(repo), "merge", "--abort"], cwd=str(repo))
+        print(
+            f"ERROR: merge conflict for story {story_id} (branch {branch}); merge aborted",
+            file=sys.stderr,
+        )
+        return 2
+    update_backlog(repo, process, story_id, done)
+    _commit_if_dirty(
+        repo, f"bmad({process}): backlog {story_id}", f"stories_claude/{process}/BACKLOG.md"
+    )
+    pool.prune()
+    return None
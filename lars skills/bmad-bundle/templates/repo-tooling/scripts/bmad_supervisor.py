@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""Streaming supervisor for one codex run (RUN2 story).
+
+Both output streams are read line by line (a line longer than `LINE_MAX` bytes
+arrives in pieces) and written to size-capped, rotating logs
+(`codex.stdout.log`, `.1`, `.2`, ...; same for stderr). Each reader thread
+owns its log and closes it at end of stream, also when the supervisor stops
+waiting for a reader that a leftover grandchild keeps alive.
+`events.jsonl` in the log dir gets one JSON object per event:
+
+- `start` / `exit`: command, pid, exit code, wall time, timeout reason
+- `heartbeat` every `heartbeat_s`: elapsed, idle time, lines and bytes so far
+  (also printed as `CODEX_HEARTBEAT <story> ...` for live progress)
+- `progress`: the latest output line, at most once per `progress_s`
+- `usage`: token counts when the agent prints them (`tokens used: 12,345`,
+  or `input_tokens`/`output_tokens`/`total_tokens` in JSON output)
+
+The run is stopped (process group: SIGTERM, then SIGKILL) after `wall_s`
+seconds in total or `idle_s` seconds without output, and reaped; 0 disables a
+limit and a stopped run exits with 124. `usage.json` records wall time, exit code,
+timeout reason and the last token counts.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import IO
+
+TIMEOUT_EXIT = 124
+LINE_MAX = 65536
+TOKENS_USED_RE = re.compile(r"tokens used:?\s*([\d][\d,.]*)?\s*$", re.IGNORECASE)
+TOKEN_FIELD_RE = re.compile(
+    r'"(input_tokens|cached_input_tokens|output_tokens|reasoning_output_tokens|total_tokens)"'
+    r"\s*:\s*(\d+)"
+)
+
+
+@dataclass
+class Limits:
+    wall_s: float = 7200.0
+    idle_s: float = 900.0
+    heartbeat_s: float = 30.0
+    progress_s: float = 5.0
+    log_max_bytes: int = 10 * 1024 * 1024
+    log_backups: int = 3
+
+
+@dataclass
+class CodexRun:
+    exit_code: int
+    wall_s: float
+    timed_out: str | None = None
+    usage: dict[str, int] = field(default_factory=dict)
+
+
+class RotatingLog:
+    """Append-only log capped at `max_bytes`; older content moves to `.1` .. `.<backups>`."""
+
+    def __init__(self, path: Path, max_bytes: int, backups: int) -> None:
+        self.path, self.max_bytes, self.backups = path, max_bytes, backups
+        self.handle = path.open("wb")
+        self.size = 0
+
+    def write(self, data: bytes) -> None:
+        if self.size and self.size + len(data) > self.max_bytes:
+            self._rotate()
+        self.handle.write(data)
+        self.handle.flush()
+        self.size += len(data)
+
+    def _rotate(self) -> None:
+        self.handle.close()
+        for idx in range(self.backups, 0, -1):
+            src = self.path.with_name(f"{self.path.name}.{idx - 1}") if idx > 1 else self.path
+            if src.exists():
+                os.replace(src, self.path.with_name(f"{self.path.name}.{idx}"))
+        self.handle = self.path.open("wb")
+        self.size = 0
+
+    def close(self) -> None:
+        self.handle.close()
+
+
+class _Monitor:
+    """Output counters, usage parsing and the event stream, shared by the reader threads."""
+
+    def __init__(self, events: Path, story_id: str, limits: Limits) -> None:
+        self.events = events.open("a", encoding="utf-8")
+        self.story_id, self.limits = story_id, limits
+        self.lock = threading.Lock()
+        self.started = self.last_output = time.monotonic()
+        self.lines = self.bytes = 0
+        self.last_line, self.last_progress = "", 0.0
+        self.usage: dict[str, int] = {}
+        self._tokens_next = False
+
+    def emit(self, event: str, **data: object) -> None:
+        ts = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+        record = {"ts": ts, "event": event, "story_id": self.story_id, **data}
+        with self.lock:
+            if self.events.closed:  # a reader outlived the run
+                return
+            self.events.write(json.dumps(record) + "\n")
+            self.events.flush()
+
+    def close(self) -> None:
+        with self.lock:
+            self.events.close()
+
+    def feed(self, stream: str, raw: bytes) -> None:
+        line = raw.decode("utf-8", errors="replace").strip()
+        now = time.monotonic()
+        with self.lock:
+            self.lines, self.bytes, self.last_output = self.lines + 1, self.bytes + len(raw), now
+            if line:
+                self.last_line = line[:200]
+            usage = self._parse_usage(line)
+            progress = bool(line) and now - self.last_progress >= self.limits.progress_s
+            if progress:
+                self.last_progress = now
+        if usage:
+            self.emit("usage", **usage)
+        if progress:
+            self.emit("progress", stream=stream, line=line[:200])
+
+    def _parse_usage(self, line: str) -> dict[str, int]:
+        found = {key: int(value) for key, value in TOKEN_FIELD_RE.findall(line)}
+        if self._tokens_next and re.fullmatch(r"[\d][\d,.]*", line):
+            found["total_tokens"] = int(re.sub(r"[,.]", "", line))
+        match = TOKENS_USED_RE.search(line)
+        self._tokens_next = bool(match) and not match.group(1)
+        if match and match.group(1):
+            found["total_tokens"] = int(re.sub(r"[,.]", "", match.group(1)))
+        if found and any(self.usage.get(key) != value for key, value in found.items()):
+            self.usage.update(found)
+            return found
+        return {}
+
+    def heartbeat(self) -> None:
+        now = time.monotonic()
+        with self.lock:
+            status = {
+                "elapsed_s": round(now - self.started, 1),
+                "idle_s": round(now - self.last_output, 1),
+                "lines": self.lines,
+                "bytes": self.bytes,
+            }
+        self.emit("heartbeat", **status)
+        fields = " ".join(f"{key}={value}" for key, value in status.items())
+        print(f"CODEX_HEARTBEAT {self.story_id} {fields}", flush=True)
+
+
+def _pump(stream: IO[bytes], log: RotatingLog, monitor: _Monitor, name: str) -> None:
+    try:
+        for raw in iter(lambda: stream.readline(LINE_MAX), b""):
+            log.write(raw)
+            monitor.feed(name, raw)
+    finally:
+        stream.close()
+        log.close()
+
+
+def _send(stdin: IO[bytes], data: bytes) -> None:
+    try:
+        stdin.write(data)
+        stdin.close()
+    except (BrokenPipeError, OSError, ValueError):
+        pass
+
+
+def _stop(proc: subprocess.Popen) -> None:
+    try:
+        if os.name == "posix":
+            os.killpg(proc.pid, signal.SIGTERM)
+        else:
+            proc.terminate()
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        if os.name == "posix":
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+        proc.wait()
+    except ProcessLookupError:
+        pass
+
+
+def _timed_out(monitor: _Monitor, limits: Limits) -> str | None:
+    now = time.monotonic()
+    if limits.wall_s and now - monitor.started > limits.wall_s:
+        return f"wall-clock timeout after {limits.wall_s:.0f}s"
+    if limits.idle_s and now - monitor.last_output > limits.idle_s:
+        return f"idle timeout: no output for {limits.idle_s:.0f}s"
+    return None
+
+
+def supervise(
+    cmd: list[str], cwd: Path, prompt: str, log_dir: Path, story_id: str, limits: Limits
+) -> CodexRun:
+    """Run `cmd` with `prompt` on stdin under `limits`; logs and events go to `log_dir`."""
+    log_dir.mkdir(parents=True, exist_ok=True)
+    monitor = _Monitor(log_dir / "events.jsonl", story_id, limits)
+    logs = {
+        name: RotatingLog(log_dir / f"codex.{name}.log", limits.log_max_bytes, limits.log_backups)
+        for name in ("stdout", "stderr")
+    }
+    proc = subprocess.Popen(
+        cmd,
+        cwd=str(cwd),
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=os.name == "posix",
+    )
+    monitor.emit("start", pid=proc.pid, command=cmd, wall_s=limits.wall_s, idle_s=limits.idle_s)
+    readers = [
+        threading.Thread(
+            target=_pump, args=(getattr(proc, name), logs[name], monitor, name), daemon=True
+        )
+        for name in logs
+    ]
+    for reader in readers:
+        reader.start()
+    # The prompt is written from a thread too, so an agent that never reads stdin still times out.
+    threading.Thread(target=_send, args=(proc.stdin, prompt.encode("utf-8")), daemon=True).start()
+    timed_out, next_beat = None, time.monotonic() + limits.heartbeat_s
+    while True:
+        try:
+            proc.wait(timeout=min(1.0, limits.heartbeat_s))
+            break
+        except subprocess.TimeoutExpired:
+            pass
+        timed_out = _timed_out(monitor, limits)
+        if timed_out:
+            print(f"ERROR: codex for {story_id} stopped: {timed_out}", file=sys.stderr, flush=True)
+            _stop(proc)
+            break
+        if time.monotonic() >= next_beat:
+            monitor.heartbeat()
+            next_beat += limits.heartbeat_s
+    for reader in readers:
+        reader.join(timeout=10)  # a reader still running closes its own log later
+    exit_code = TIMEOUT_EXIT if timed_out else int(proc.wait())
+    wall_s = round(time.monotonic() - monitor.started, 1)
+    run = CodexRun(exit_code, wall_s, timed_out, dict(monitor.usage))
+    monitor.emit(
+        "exit",
+        exit_code=run.exit_code,
+        wall_s=run.wall_s,
+        timed_out=timed_out,
+        lines=monitor.lines,
+        bytes=monitor.bytes,
+    )
+    monitor.close()
+    usage = json.dumps({"story_id": story_id, **asdict(run)}, indent=2) + "\n"
+    (log_dir / "usage.json").write_text(usage, encoding="utf-8")
+    return run
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""Story worktrees for RUN2: per story, or a reusable pool with warm dependencies.
+
+Without a pool every story gets `worktrees_claude/merge/<process>/<story>`.
+With `size` > 0, `provision` pre-creates `pool-1..pool-N` there and a story
+borrows a free slot: the slot switches to the story branch
+(`git checkout -B <process>-<story> <process>`, or the existing branch on a
+retry) and `git clean -fd` drops untracked files. Ignored files survive,
+so build caches stay warm. Only clean slots are reset; a slot left dirty by a
+failed story stays as it is for that story (a retry gets it back).
+
+New worktrees get hardlinked copies of the primary checkout's dependency dirs
+(`node_modules` by default). They are real directories, so `.gitignore`
+entries such as `node_modules/` still match. Files are shared with the primary
+checkout; package managers replace files instead of editing them in place.
+Across filesystems the files are copied instead. Only dirs that hold no
+absolute paths to their own location are safe to share: a virtualenv (any dir
+with `pyvenv.cfg`) keeps the primary tree's paths in its scripts' shebangs,
+`activate` and `.pth` files, so it is never shared; create one per worktree.
+
+`prune` keeps the story worktrees of this process within a disk budget: idle,
+clean worktrees whose HEAD is already merged into `<process>` are removed,
+oldest first. Pool slots and main-merge are never pruned. Every tree is measured
+once; a hardlinked file counts for the newest tree that has it, so removing an
+older tree frees roughly what it alone holds.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+import threading
+from pathlib import Path
+
+DEFAULT_SHARED_DIRS = ("node_modules",)
+
+
+def _git(repo: Path, *args: str) -> str:
+    cp = subprocess.run(
+        ["git", "-C", str(repo), *args], text=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    if cp.returncode != 0:
+        raise SystemExit(f"git {' '.join(args)} failed: {cp.stderr.strip()}")
+    return (cp.stdout or "").strip()
+
+
+def _has_branch(repo: Path, branch: str) -> bool:
+    cmd = ["git", "-C", str(repo), "show-ref", "--verify", "--quiet", f"refs/heads/{branch}"]
+    return subprocess.run(cmd).returncode == 0
+
+
+def ensure_worktree(primary: Path, worktree: Path, branch: str, start: str) -> None:
+    worktree.parent.mkdir(parents=True, exist_ok=True)
+    listing = _git(primary, "worktree", "list", "--porcelain")
+    if f"worktree {worktree}" in listing:
+        return
+    cmd = ["git", "-C", str(primary), "worktree", "add"]
+    if _has_branch(primary, branch):
+        cmd += [str(worktree), branch]
+    else:
+        cmd += ["-b", branch, str(worktree), start]
+    if subprocess.run(cmd, cwd=str(primary)).returncode != 0:
+        raise SystemExit(f"ERROR: failed to provision worktree {worktree}")
+
+
+def link_shared(primary: Path, worktree: Path, names: tuple[str, ...]) -> list[str]:
+    """Hardlink-copy the primary checkout's dependency dirs into a new worktree; not venvs."""
+    linked = []
+    for name in names:
+        src, dst = primary / name, worktree / name
+        if not src.is_dir() or dst.exists():
+            continue
+        if (src / "pyvenv.cfg").is_file():
+            print(f"WORKTREE_NOT_SHARED {name}: virtualenv paths point at {primary}", flush=True)
+            continue
+        try:
+            shutil.copytree(src, dst, symlinks=True, copy_function=os.link)
+        except (OSError, shutil.Error):
+            shutil.rmtree(dst, ignore_errors=True)
+            shutil.copytree(src, dst, symlinks=True)
+        linked.append(name)
+    return linked
+
+
+def tree_size(paths: list[Path], seen: set[tuple[int, int]] | None = None) -> int:
+    """Allocated bytes under `paths`; every inode counted once, also across calls sharing `seen`."""
+    seen = set() if seen is None else seen
+    total, stack = 0, [str(path) for path in paths]
+    while stack:
+        try:
+            entries = list(os.scandir(stack.pop()))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                stat = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            if (stat.st_dev, stat.st_ino) in seen:
+                continue
+            seen.add((stat.st_dev, stat.st_ino))
+            total += getattr(stat, "st_blocks", 0) * 512 or stat.st_size
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(entry.path)
+    return total
+
+
+class WorktreePool:
+    def __init__(
+        self,
+        primary: Path,
+        process: str,
+        size: int = 0,
+        shared_dirs: tuple[str, ...] = DEFAULT_SHARED_DIRS,
+        budget_bytes: int | None = None,
+    ) -> None:
+        self.primary, self.process, self.size = primary, process, size
+        self.base = primary / "worktrees_claude" / "merge" / process
+        self.shared_dirs, self.budget_bytes = shared_dirs, budget_bytes
+        self.busy: set[Path] = set()
+        self._lock = threading.Lock()
+
+    def _slots(self) -> list[Path]:
+        return [self.base / f"pool-{idx}" for idx in range(1, self.size + 1)]
+
+    def _add(self, worktree: Path, branch: str | None = None) -> None:
+        if branch is None:
+            worktree.parent.mkdir(parents=True, exist_ok=True)
+            _git(self.primary, "worktree", "add", "--detach", str(worktree), self.process)
+        else:
+            ensure_worktree(self.primary, worktree, branch, self.process)
+        linked = link_shared(self.primary, worktree, self.shared_dirs)
+        if linked:
+            print(f"WORKTREE_SHARED {worktree.name}: {', '.join(linked)}", flush=True)
+
+    def provision(self) -> None:
+        """Create missing pool slots up front."""
+        with self._lock:
+            for slot in self._slots():
+                if not slot.exists():
+                    self._add(slot)
+
+    def acquire(self, story_id: str) -> Path:
+        """Worktree on branch `<process>-<story>` for this story; marks it busy."""
+        branch = f"{self.process}-{story_id}"
+        with self._lock:
+            if not self.size:
+                worktree = self.base / story_id
+                self._add(worktree, branch)
+                self.busy.add(worktree)
+                return worktree
+            slot = self._pick_slot(branch)
+            if _git(slot, "branch", "--show-current") != branch:
+                if _has_branch(self.primary, branch):
+                    _git(slot, "checkout", "-q", branch)
+                else:
+                    _git(slot, "checkout", "-q", "-B", branch, self.process)
+                _git(slot, "clean", "-fdq")
+            self.busy.add(slot)
+            return slot
+
+    def _pick_slot(self, branch: str) -> Path:
+        free = [slot for slot in self._slots() if slot not in self.busy]
+        for slot in free:
+            if slot.exists() and _git(slot, "branch", "--show-current") == branch:
+                return slot
+        for slot in free:
+            if not slot.exists():
+                self._add(slot)
+                return slot
+            if not _git(slot, "status", "--porcelain"):
+                return slot
+        raise SystemExit(
+            f"ERROR: no clean worktree pool slot for {branch} "
+            "(dirty slots belong to failed stories)"
+        )
+
+    def release(self, worktree: Path) -> None:
+        with self._lock:
+            self.busy.discard(worktree)
+
+    def prune(self) -> list[Path]:
+        """Remove idle, clean, merged story worktrees (oldest first) until within the budget."""
+        if self.budget_bytes is None:
+            return []
+        with self._lock:
+            if not self.base.is_dir():
+                return []
+            keep = {*self._slots(), self.base / "main-merge"}
+            trees = [path for path in self.base.iterdir() if path not in keep]
+            trees = [path for path in trees if (path / ".git").is_file()]
+            trees.sort(key=lambda path: path.stat().st_mtime)
+            seen: set[tuple[int, int]] = set()
+            sizes = {path: tree_size([path], seen) for path in reversed(trees)}
+            total = sum(sizes.values())
+            removed: list[Path] = []
+            for path in trees:
+                if total <= self.budget_bytes:
+                    break
+                if path in self.busy or _git(path, "status", "--porcelain"):
+                    continue
+                merged = ["merge-base", "--is-ancestor", "HEAD", self.process]
+                if subprocess.run(["git", "-C", str(path), *merged]).returncode != 0:
+                    continue
+                _git(self.primary, "worktree", "remove", "--force", str(path))
+                removed.append(path)
+                total -= sizes[path]
+                freed_mb = sizes[path] // (1024 * 1024)
+                print(f"WORKTREE_PRUNED {path.name} ({freed_mb} MB)", flush=True)
+            return removed
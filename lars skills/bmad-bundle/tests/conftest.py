@@ -0,0 +1,7 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+TEMPLATE_SCRIPTS = Path(__file__).resolve().parents[1] / "templates" / "repo-tooling" / "scripts"
+sys.path.insert(0, str(TEMPLATE_SCRIPTS))
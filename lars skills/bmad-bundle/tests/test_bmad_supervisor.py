@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+from bmad_supervisor import LINE_MAX, TIMEOUT_EXIT, Limits, supervise
+
+LONG = LINE_MAX * 3 + 5
+
+
+def test_long_lines_are_logged_whole_and_usage_is_parsed(tmp_path: Path) -> None:
+    script = f"import sys; sys.stdout.write('x' * {LONG} + '\\ntokens used: 1,234\\n')"
+    cmd = [sys.executable, "-c", script]
+    run = supervise(cmd, tmp_path, "", tmp_path / "logs", "S-1", Limits())
+
+    assert run.exit_code == 0 and run.usage == {"total_tokens": 1234}
+    log = (tmp_path / "logs" / "codex.stdout.log").read_bytes()
+    assert log == b"x" * LONG + b"\ntokens used: 1,234\n"
+    events = (tmp_path / "logs" / "events.jsonl").read_text(encoding="utf-8").splitlines()
+    assert json.loads(events[-1])["lines"] == 5  # the long line arrives in LINE_MAX pieces
+
+
+def test_idle_run_is_stopped_and_reaped(tmp_path: Path) -> None:
+    limits = Limits(idle_s=0.5, heartbeat_s=0.2)
+    cmd = [sys.executable, "-c", "import time; time.sleep(30)"]
+    run = supervise(cmd, tmp_path, "", tmp_path / "logs", "S-2", limits)
+
+    assert run.exit_code == TIMEOUT_EXIT and run.timed_out.startswith("idle timeout")
+    assert run.wall_s < 10
+    usage = json.loads((tmp_path / "logs" / "usage.json").read_text(encoding="utf-8"))
+    assert usage["exit_code"] == TIMEOUT_EXIT
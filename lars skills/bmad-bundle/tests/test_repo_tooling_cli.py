@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from bmad_worktrees import link_shared
+
+SKILL_DIR = Path(__file__).resolve().parents[1]
+PROCESS, RUN_ID = "demo", "r1"
+STORY = """# DEMO-001
+
+- Verification (repo-root): `{command}`
+  Expected: `exit 0`
+"""
+BACKLOG = """# Backlog
+
+| Story | Status | Attempts | Notes |
+|-------|--------|----------|-------|
+| DEMO-001 | [TODO] | 0 |  |
+"""
+
+
+@pytest.fixture
+def bootstrapped(tmp_path: Path) -> Path:
+    """A git repo with the repo-tooling pack copied in by the bootstrap script."""
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    bootstrap = SKILL_DIR / "scripts" / "bootstrap_repo_tooling.py"
+    subprocess.run([sys.executable, str(bootstrap), str(tmp_path)], check=True,
+                   stdout=subprocess.DEVNULL)
+    (tmp_path / "stories_claude" / PROCESS).mkdir(parents=True)
+    (tmp_path / "stories_claude" / PROCESS / "BACKLOG.md").write_text(BACKLOG, encoding="utf-8")
+    return tmp_path
+
+
+def _verify(repo: Path, command: str) -> tuple[int, dict]:
+    story = repo / "stories_claude" / PROCESS / "DEMO-001.md"
+    story.write_text(STORY.format(command=command), encoding="utf-8")
+    cp = subprocess.run(
+        [sys.executable, str(repo / "scripts" / "bmad_bundle.py"), "verify", "--repo-root",
+         str(repo), "--process", PROCESS, "--story-id", "DEMO-001", "--run-id", RUN_ID],
+        cwd=repo, text=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    )
+    assert "Traceback" not in cp.stderr, cp.stderr
+    return cp.returncode, json.loads(cp.stdout)
+
+
+def _backlog_row(repo: Path) -> str:
+    text = (repo / "stories_claude" / PROCESS / "BACKLOG.md").read_text(encoding="utf-8")
+    return next(line for line in text.splitlines() if line.startswith("| DEMO-001 "))
+
+
+def test_verify_marks_a_proven_story_done(bootstrapped: Path) -> None:
+    code, result = _verify(bootstrapped, "true")
+    assert code == 0 and result["done"] is True
+    assert _backlog_row(bootstrapped) == "| DEMO-001 | [DONE] | 0 |  |"
+
+
+def test_verify_counts_a_failed_proof_as_an_attempt(bootstrapped: Path) -> None:
+    code, result = _verify(bootstrapped, "false")
+    assert code == 1 and result["done"] is False
+    assert _backlog_row(bootstrapped) == "| DEMO-001 | [IN_PROGRESS] | 1 | proof_failed |"
+
+
+def test_link_shared_skips_virtualenvs(tmp_path: Path) -> None:
+    primary, worktree = tmp_path / "primary", tmp_path / "worktree"
+    (primary / ".venv").mkdir(parents=True)
+    (primary / ".venv" / "pyvenv.cfg").write_text("home = /usr/bin\n", encoding="utf-8")
+    (primary / "node_modules" / "pkg").mkdir(parents=True)
+    (primary / "node_modules" / "pkg" / "index.js").write_text("", encoding="utf-8")
+    worktree.mkdir()
+
+    assert link_shared(primary, worktree, (".venv", "node_modules")) == ["node_modules"]
+    assert not (worktree / ".venv").exists()
+    assert (worktree / "node_modules" / "pkg" / "index.js").is_file()
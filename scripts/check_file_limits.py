@@ -1,15 +1,36 @@
 #!/usr/bin/env python3
-"""Validate non-test file limits using simple per-language counting rules."""
+"""Validate non-test file limits using simple per-language counting rules.
+
+Function counters live in file_limit_counters.py. Their Python count is an upper
+bound that is confirmed on the AST only when it exceeds MAX_FUNCTIONS, so
+offenders get exact counts. `--strict` counts every Python file on the AST,
+which also fails on files that do not parse. `--check-counters` fails if the
+bound is below the AST count on any tracked .py file that parses.
+
+Line and function counts are cached per blob (`git ls-files -s` SHA, or a fresh
+hash for files modified in the worktree) in the git common dir, so a warm run
+only reads files that changed. The cache is dropped whenever this script
+or its counters change. Cold runs with many files are measured on a process pool; output
+order is always `git ls-files` order.
+"""
 
 from __future__ import annotations
 
+import argparse
 import ast
-import fnmatch
+import hashlib
 import json
+import os
 import re
-import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+from file_limit_counters import count_functions
+from file_limit_exceptions import ExceptionMatcher
+from gate_cache import default_cache_path, load_json_cache, save_json_cache, tree_state
+from repo_snapshot import RepoSnapshot
+
 MAX_LINES = 300
 MAX_FUNCTIONS = 15
 EXCLUDED_DIRS = {
@@ -34,17 +55,15 @@ EXCLUDED_DIRS = {
 }
 EXCLUDED_SUFFIXES = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".zip", ".tar", ".gz", ".pdf"}
 JSON_BLOCK_RE = re.compile(r"```json\n(.*?)\n```", re.DOTALL)
+CACHE_NAME = "check_file_limits_cache.json"
+POOL_MIN_FILES = 200  # below this, worker start-up costs more than it saves
+COUNTING_SOURCES = ("check_file_limits.py", "file_limit_counters.py")
 
 
 def _repo_root() -> Path:
     return Path(__file__).resolve().parents[1]
 
 
-def _git_ls_files(root: Path) -> list[Path]:
-    output = subprocess.check_output(["git", "ls-files"], cwd=root, text=True)
-    return [root / line for line in output.splitlines() if line.strip()]
-
-
 def _is_test(path: Path) -> bool:
     rel = path.as_posix()
     return (
@@ -57,15 +76,13 @@ def _is_test(path: Path) -> bool:
     )
 
 
-def _is_excluded(path: Path, root: Path) -> bool:
-    rel_parts = path.relative_to(root).parts
-    if any(part in EXCLUDED_DIRS for part in rel_parts):
+def _is_excluded(path: Path) -> bool:
+    if any(part in EXCLUDED_DIRS for part in path.parts):
         return True
     return path.suffix.lower() in EXCLUDED_SUFFIXES
 
 
-def _load_exceptions(path: Path) -> list[dict]:
-    text = path.read_text(encoding="utf-8")
+def _load_exceptions(text: str) -> list[dict]:
     match = JSON_BLOCK_RE.search(text)
     if not match:
         raise SystemExit("ERROR: docs/FILE_LIMITS_EXCEPTIONS.md is missing a fenced JSON block")
@@ -75,83 +92,166 @@ def _load_exceptions(path: Path) -> list[dict]:
     return data
 
 
-def _is_exception(rel: str, exceptions: list[dict]) -> bool:
-    for item in exceptions:
-        pattern = item.get("path")
-        if not isinstance(pattern, str) or not pattern.strip():
-            continue
-        if fnmatch.fnmatch(rel, pattern):
-            return True
-    return False
-
-
-def _count_python_functions(text: str, rel: str) -> int:
+def _count_python_functions(snapshot: RepoSnapshot, rel: str) -> int:
     try:
-        tree = ast.parse(text)
+        tree = snapshot.ast(rel)
     except SyntaxError as exc:
         raise SystemExit(f"ERROR: cannot parse Python file for function count: {rel}: {exc}")
+    return _ast_function_count(tree)
+
+
+def _ast_function_count(tree: ast.AST) -> int:
     return sum(isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) for node in ast.walk(tree))
 
 
-def _count_shell_functions(text: str) -> int:
-    count = 0
-    for line in text.splitlines():
-        if re.match(r"^\s*function\s+[A-Za-z_][A-Za-z0-9_-]*\b", line):
-            count += 1
-        elif re.match(r"^\s*[A-Za-z_][A-Za-z0-9_-]*\s*\(\)\s*\{", line):
-            count += 1
+def _function_count(snapshot: RepoSnapshot, path: Path, text: str, rel: str, strict: bool) -> int:
+    if strict and path.suffix == ".py":
+        return _count_python_functions(snapshot, rel)
+    count = count_functions(path.suffix, text)
+    if path.suffix == ".py" and count > MAX_FUNCTIONS:
+        try:
+            return _ast_function_count(snapshot.ast(rel))
+        except SyntaxError:
+            return count
     return count
 
 
-def _count_powershell_functions(text: str) -> int:
-    return sum(
-        1
-        for line in text.splitlines()
-        if re.match(r"^\s*function\s+[A-Za-z_][A-Za-z0-9_-]*\b", line, re.IGNORECASE)
-    )
+def _measure(snapshot: RepoSnapshot, rel: str, strict: bool) -> list[int] | None:
+    """``[lines, functions]`` for one file; None when it is not UTF-8 text."""
+    try:
+        text = snapshot.text(rel)
+    except UnicodeDecodeError:
+        return None
+    return [len(text.splitlines()), _function_count(snapshot, Path(rel), text, rel, strict)]
+
+
+def _measure_chunk(root: str, rels: list[str], strict: bool) -> list[list[int] | str | None]:
+    """Pool worker: like `_measure`, with a parse failure returned as its message."""
+    snapshot = RepoSnapshot(Path(root))
+    measured: list[list[int] | str | None] = []
+    for rel in rels:
+        try:
+            measured.append(_measure(snapshot, rel, strict))
+        except SystemExit as exc:
+            measured.append(str(exc.code))
+    return measured
+
 
+def _measure_all(
+    snapshot: RepoSnapshot, rels: list[str], jobs: int, strict: bool
+) -> list[list[int] | None]:
+    if jobs <= 1 or len(rels) < POOL_MIN_FILES:
+        return [_measure(snapshot, rel, strict) for rel in rels]
+    size = -(-len(rels) // (jobs * 4))
+    chunks = [rels[i : i + size] for i in range(0, len(rels), size)]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        results = pool.map(
+            _measure_chunk, [str(snapshot.root)] * len(chunks), chunks, [strict] * len(chunks)
+        )
+        measured = [entry for chunk in results for entry in chunk]
+    for entry in measured:
+        if isinstance(entry, str):
+            raise SystemExit(entry)
+    return measured
 
-def _function_count(path: Path, text: str, rel: str) -> int:
-    if path.suffix == ".py":
-        return _count_python_functions(text, rel)
-    if path.suffix == ".sh":
-        return _count_shell_functions(text)
-    if path.suffix == ".ps1":
-        return _count_powershell_functions(text)
+
+def _check_counters(snapshot: RepoSnapshot) -> int:
+    """Check the Python count bound against the AST on all tracked Python files."""
+    checked, mismatches = 0, []
+    for rel in snapshot.tracked_files():
+        if not rel.endswith(".py") or not snapshot.is_file(rel):
+            continue
+        try:
+            tree = snapshot.ast(rel)
+        except (SyntaxError, UnicodeDecodeError, ValueError):
+            continue
+        expected = _ast_function_count(tree)
+        counted = count_functions(".py", snapshot.text(rel))
+        checked += 1
+        if counted < expected:
+            mismatches.append((rel, counted, expected))
+    if mismatches:
+        print("ERROR: Python function counter disagrees with the AST:")
+        for rel, counted, expected in mismatches:
+            print(f"- {rel}: bound={counted}, ast={expected}")
+        return 1
+    print(f"OK: Python function counter agrees with the AST ({checked} files)")
     return 0
 
 
-def main() -> int:
-    root = _repo_root()
-    exceptions = _load_exceptions(root / "docs" / "FILE_LIMITS_EXCEPTIONS.md")
+def main(argv: list[str] | None = None, snapshot: RepoSnapshot | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="check_file_limits")
+    parser.add_argument(
+        "--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes for cold scans"
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the cache")
+    parser.add_argument(
+        "--strict", action="store_true", help="Count Python functions on the full AST"
+    )
+    parser.add_argument(
+        "--check-counters",
+        action="store_true",
+        help="Only check the Python count bound against the AST count on tracked files",
+    )
+    args = parser.parse_args(argv or [])
+    snapshot = snapshot or RepoSnapshot(_repo_root())
+    if args.check_counters:
+        return _check_counters(snapshot)
+    root = snapshot.root
+    exceptions = ExceptionMatcher(_load_exceptions(snapshot.text("docs/FILE_LIMITS_EXCEPTIONS.md")))
     offenders: list[tuple[str, int, int]] = []
 
-    for path in _git_ls_files(root):
-        if not path.is_file():
+    candidates = []
+    for rel in snapshot.tracked_files():
+        if not snapshot.is_file(rel):
             continue
-        rel = path.relative_to(root).as_posix()
-        if _is_test(path.relative_to(root)) or _is_excluded(path, root) or _is_exception(rel, exceptions):
+        path = Path(rel)
+        # Match first so exceptions for excluded dirs are not reported as unused.
+        if exceptions.match(rel) or _is_test(path) or _is_excluded(path):
             continue
-        try:
-            text = path.read_text(encoding="utf-8")
-        except UnicodeDecodeError:
+        candidates.append(rel)
+
+    cache_path = None if args.no_cache else default_cache_path(root, CACHE_NAME)
+    version = hashlib.sha256(
+        b"".join(Path(__file__).with_name(name).read_bytes() for name in COUNTING_SOURCES)
+    ).hexdigest()
+    cached = load_json_cache(cache_path, version) if cache_path else {}
+    blobs = tree_state(root) if cache_path else {}
+    keys = {
+        rel: f"{blobs[rel]} {Path(rel).suffix}{' strict' if args.strict else ''}"
+        for rel in candidates
+        if rel in blobs and not (root / rel).is_symlink()
+    }
+    misses = [rel for rel in candidates if keys.get(rel) not in cached]
+    measured = dict(zip(misses, _measure_all(snapshot, misses, args.jobs, args.strict)))
+    entries = {}
+    for rel in candidates:
+        counts = measured[rel] if rel in measured else cached[keys[rel]]
+        if rel in keys:
+            entries[keys[rel]] = counts
+        if counts is None:
             continue
-        line_count = len(text.splitlines())
-        func_count = _function_count(path, text, rel)
+        line_count, func_count = counts
         if line_count > MAX_LINES or func_count > MAX_FUNCTIONS:
             offenders.append((rel, line_count, func_count))
+    if cache_path and (misses or entries.keys() != cached.keys()):
+        save_json_cache(cache_path, version, entries)
 
     if offenders:
         print("ERROR: file-limit offenders:")
         for rel, lines, funcs in offenders:
             print(f"- {rel}: lines={lines}, functions={funcs}")
-        return 1
-
-    print("OK: file limits valid")
-    print(f"max_lines={MAX_LINES}")
-    print(f"max_functions={MAX_FUNCTIONS}")
-    return 0
+    else:
+        print("OK: file limits valid")
+        print(f"max_lines={MAX_LINES}")
+        print(f"max_functions={MAX_FUNCTIONS}")
+    unused = exceptions.unused()
+    if unused:
+        print("WARN: unused file-limit exceptions (no checked file matches):")
+        for pattern in unused:
+            print(f"- {pattern}")
+    return 1 if offenders else 0
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    raise SystemExit(main(sys.argv[1:]))
@@ -5,6 +5,8 @@ from __future__ import annotations
 
 from pathlib import Path
 
+from repo_snapshot import RepoSnapshot
+
 REQUIRED_REFERENCES: dict[str, list[str]] = {
     "README.md": [
         "docs/CTO_RULES.md",
@@ -44,15 +46,14 @@ def _repo_root() -> Path:
     return Path(__file__).resolve().parents[1]
 
 
-def main() -> int:
-    root = _repo_root()
+def main(snapshot: RepoSnapshot | None = None) -> int:
+    snapshot = snapshot or RepoSnapshot(_repo_root())
     failures: list[str] = []
     for rel, refs in REQUIRED_REFERENCES.items():
-        path = root / rel
-        if not path.exists():
+        if not snapshot.exists(rel):
             failures.append(f"missing required file: {rel}")
             continue
-        text = path.read_text(encoding="utf-8")
+        text = snapshot.text(rel)
         for ref in refs:
             if ref not in text:
                 failures.append(f"missing reference in {rel}: {ref}")
@@ -6,6 +6,8 @@ from __future__ import annotations
 from pathlib import Path
 import sys
 
+from repo_snapshot import RepoSnapshot
+
 REQUIRED_FILES = [
     "README.md",
     "SECURITY.md",
@@ -31,9 +33,9 @@ def _repo_root() -> Path:
     return Path(__file__).resolve().parents[1]
 
 
-def _load_allowlist(path: Path) -> set[str]:
+def _load_allowlist(text: str) -> set[str]:
     entries: set[str] = set()
-    for raw in path.read_text(encoding="utf-8").splitlines():
+    for raw in text.splitlines():
         line = raw.strip()
         if not line or line.startswith("#"):
             continue
@@ -41,12 +43,12 @@ def _load_allowlist(path: Path) -> set[str]:
     return entries
 
 
-def main() -> int:
-    root = _repo_root()
-    missing = [rel for rel in REQUIRED_FILES if not (root / rel).exists()]
-    readme_text = (root / "README.md").read_text(encoding="utf-8") if (root / "README.md").exists() else ""
+def main(snapshot: RepoSnapshot | None = None) -> int:
+    snapshot = snapshot or RepoSnapshot(_repo_root())
+    missing = [rel for rel in REQUIRED_FILES if not snapshot.exists(rel)]
+    readme_text = snapshot.text("README.md") if snapshot.exists("README.md") else ""
     if "## Licentie" in readme_text or "## License" in readme_text:
-        if not (root / "LICENSE").exists():
+        if not snapshot.exists("LICENSE"):
             missing.append("LICENSE")
     if missing:
         print("ERROR: missing required files:")
@@ -54,12 +56,8 @@ def main() -> int:
             print(f"- {rel}")
         return 1
 
-    allowlist = _load_allowlist(root / "config" / "repo_root_allowlist.txt")
-    actual = {
-        path.name
-        for path in root.iterdir()
-        if path.name not in {".git"}
-    }
+    allowlist = _load_allowlist(snapshot.text("config/repo_root_allowlist.txt"))
+    actual = {name for name in snapshot.root_entries() if name not in {".git"}}
     unexpected = sorted(name for name in actual if name not in allowlist)
     if unexpected:
         print("ERROR: unexpected repo-root entries:")
@@ -3,9 +3,14 @@
 
 from __future__ import annotations
 
-from pathlib import Path
-import subprocess
+import argparse
+import sqlite3
 import sys
+from pathlib import Path
+
+from golden_search import top_hits
+from repo_snapshot import RepoSnapshot
+from search_index import indexed_top_hits
 
 REQUIRED_IGNORE_PATTERNS = [
     ".worktrees/",
@@ -41,45 +46,30 @@ def _repo_root() -> Path:
     return Path(__file__).resolve().parents[1]
 
 
-def _load_non_comment_lines(path: Path) -> list[str]:
+def _load_non_comment_lines(text: str) -> list[str]:
     return [
         line.strip()
-        for line in path.read_text(encoding="utf-8").splitlines()
+        for line in text.splitlines()
         if line.strip() and not line.strip().startswith("#")
     ]
 
 
-def _top_hit(root: Path, query: str) -> str | None:
-    try:
-        proc = subprocess.run(
-            ["rg", "-n", "--max-count", "1", query, "."],
-            cwd=root,
-            capture_output=True,
-            text=True,
-        )
-    except FileNotFoundError as exc:  # pragma: no cover - environment issue
-        raise RuntimeError("rg (ripgrep) is required for search hygiene checks") from exc
-    if proc.returncode not in (0, 1):
-        raise RuntimeError(proc.stderr.strip() or f"rg failed for query: {query}")
-    line = (proc.stdout or "").strip().splitlines()
-    if not line:
-        return None
-    return line[0].split(":", 1)[0].removeprefix("./")
-
-
-def main() -> int:
-    root = _repo_root()
-    ignore_path = root / ".ignore"
-    queries_path = root / "config" / "golden_queries.txt"
-
-    if not ignore_path.exists():
+def main(argv: list[str] | None = None, snapshot: RepoSnapshot | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="check_search_hygiene")
+    parser.add_argument(
+        "--no-index", action="store_true", help="Scan with rg (or Python) instead of the index"
+    )
+    args = parser.parse_args(argv or [])
+    snapshot = snapshot or RepoSnapshot(_repo_root())
+
+    if not snapshot.exists(".ignore"):
         print("ERROR: missing .ignore")
         return 1
-    if not queries_path.exists():
+    if not snapshot.exists("config/golden_queries.txt"):
         print("ERROR: missing config/golden_queries.txt")
         return 1
 
-    ignore_lines = set(_load_non_comment_lines(ignore_path))
+    ignore_lines = set(_load_non_comment_lines(snapshot.text(".ignore")))
     missing_patterns = [pattern for pattern in REQUIRED_IGNORE_PATTERNS if pattern not in ignore_lines]
     if missing_patterns:
         print("ERROR: .ignore is missing required patterns:")
@@ -87,15 +77,23 @@ def main() -> int:
             print(f"- {pattern}")
         return 1
 
-    queries = _load_non_comment_lines(queries_path)
+    queries = _load_non_comment_lines(snapshot.text("config/golden_queries.txt"))
     if not queries:
         print("ERROR: config/golden_queries.txt has no active queries")
         return 1
 
     failures: list[str] = []
     try:
+        if args.no_index:
+            hits = top_hits(snapshot, queries)
+        else:
+            try:
+                hits = indexed_top_hits(snapshot, queries)
+            except sqlite3.Error as exc:
+                print(f"WARN: search index unavailable ({exc}); scanning", file=sys.stderr)
+                hits = top_hits(snapshot, queries)
         for query in queries:
-            hit = _top_hit(root, query)
+            hit = hits[query]
             if hit is None:
                 failures.append(f"query has no hits: {query}")
                 continue
@@ -117,4 +115,4 @@ def main() -> int:
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Per-language function counters for check_file_limits.py, keyed by file suffix.
+
+Python is counted as lines that start with ``def`` or ``async def``. In valid
+code every function definition starts its own line (a compound statement cannot
+follow ``;`` or another colon), so this is an upper bound of the ``ast`` count;
+it only overcounts such lines inside multi-line strings. ``check_file_limits.py``
+confirms a bound above the limit on the AST, so files under the limit are never
+parsed. JS/TS use the line patterns of the repo-tooling template gate
+(``lars skills/bmad-bundle/templates/repo-tooling/tools/guard/file_limits_gate.py``).
+
+Add a language with ``@register(".ext")`` on a ``(text) -> int`` function.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Callable
+
+Counter = Callable[[str], int]
+COUNTERS: dict[str, Counter] = {}
+
+PY_DEF_LINE = re.compile(r"^\s*(?:async\s+)?def\s", re.MULTILINE)
+SHELL_PATTERNS = [
+    re.compile(r"^\s*function\s+[A-Za-z_][A-Za-z0-9_-]*\b"),
+    re.compile(r"^\s*[A-Za-z_][A-Za-z0-9_-]*\s*\(\)\s*\{"),
+]
+POWERSHELL_PATTERN = re.compile(r"^\s*function\s+[A-Za-z_][A-Za-z0-9_-]*\b", re.IGNORECASE)
+JS_PATTERNS = [
+    re.compile(r"^\s*(?:export\s+)?(?:default\s+)?async\s+function\s+[A-Za-z_$][\w$]*\s*\("),
+    re.compile(r"^\s*(?:export\s+)?(?:default\s+)?function\s+[A-Za-z_$][\w$]*\s*\("),
+    re.compile(
+        r"^\s*(?:export\s+)?(?:const|let|var)\s+[A-Za-z_$][\w$]*\s*=\s*"
+        r"(?:async\s*)?\([^\n]*=>"
+    ),
+    re.compile(
+        r"^\s*(?:export\s+)?(?:const|let|var)\s+[A-Za-z_$][\w$]*\s*=\s*"
+        r"(?:async\s*)?[A-Za-z_$][\w$]*\s*=>"
+    ),
+    re.compile(
+        r"^\s*(?:async\s+)?(?!if\b|for\b|while\b|switch\b|catch\b|constructor\b)"
+        r"[A-Za-z_$][\w$]*\s*\([^;=]*\)\s*\{"
+    ),
+]
+
+
+def register(*suffixes: str) -> Callable[[Counter], Counter]:
+    def decorate(counter: Counter) -> Counter:
+        for suffix in suffixes:
+            COUNTERS[suffix] = counter
+        return counter
+
+    return decorate
+
+
+def count_functions(suffix: str, text: str) -> int:
+    counter = COUNTERS.get(suffix)
+    return counter(text) if counter else 0
+
+
+@register(".py")
+def count_python(text: str) -> int:
+    return len(PY_DEF_LINE.findall(text))
+
+
+@register(".sh")
+def count_shell(text: str) -> int:
+    return sum(
+        1 for line in text.splitlines() if any(pattern.match(line) for pattern in SHELL_PATTERNS)
+    )
+
+
+@register(".ps1")
+def count_powershell(text: str) -> int:
+    return sum(1 for line in text.splitlines() if POWERSHELL_PATTERN.match(line))
+
+
+@register(".js", ".mjs", ".cjs", ".jsx", ".ts", ".tsx")
+def count_js(text: str) -> int:
+    return sum(
+        1 for line in text.splitlines() if any(pattern.search(line) for pattern in JS_PATTERNS)
+    )
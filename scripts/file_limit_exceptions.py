@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Compiled matcher for the docs/FILE_LIMITS_EXCEPTIONS.md allowlist.
+
+Patterns keep `fnmatch` semantics (``*`` also crosses ``/``) but are compiled
+once into an exact-path set, a prefix trie for ``dir/*`` and ``dir/**`` entries
+and one combined regex for every other glob. The matcher also tracks which
+entries matched a checked file, so unused ones can be reported.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import re
+
+GLOB_CHARS = frozenset("*?[")
+TERMINAL = "\0"
+
+
+class ExceptionMatcher:
+    def __init__(self, exceptions: list[dict]) -> None:
+        self.patterns: list[str] = []
+        self._exact: dict[str, list[int]] = {}
+        self._trie: dict = {}
+        regex_parts: list[str] = []
+        for item in exceptions:
+            pattern = item.get("path")
+            if not isinstance(pattern, str) or not pattern.strip():
+                continue
+            index = len(self.patterns)
+            self.patterns.append(pattern)
+            prefix, _, tail = pattern.rpartition("/")
+            if not GLOB_CHARS & set(pattern):
+                self._exact.setdefault(pattern, []).append(index)
+            elif prefix and tail in ("*", "**") and not GLOB_CHARS & set(prefix):
+                node = self._trie
+                for segment in prefix.split("/"):
+                    node = node.setdefault(segment, {})
+                node.setdefault(TERMINAL, []).append(index)
+            else:
+                regex_parts.append(f"(?P<e{index}>{fnmatch.translate(pattern)})")
+        self._regex = re.compile("|".join(regex_parts)) if regex_parts else None
+        self._used: set[int] = set()
+        self._matched: list[str] = []
+
+    def _match_ids(self, rel: str) -> list[int]:
+        if rel in self._exact:
+            return self._exact[rel]
+        node = self._trie
+        for segment in rel.split("/")[:-1]:
+            node = node.get(segment)
+            if node is None:
+                break
+            if TERMINAL in node:
+                return node[TERMINAL]
+        match = self._regex.match(rel) if self._regex else None
+        return [int(match.lastgroup[1:])] if match else []
+
+    def match(self, rel: str) -> bool:
+        ids = self._match_ids(rel)
+        if ids:
+            self._used.update(ids)
+            self._matched.append(rel)
+        return bool(ids)
+
+    def unused(self) -> list[str]:
+        """Patterns that matched none of the paths passed to `match` so far."""
+        unused = []
+        for index, pattern in enumerate(self.patterns):
+            if index in self._used:
+                continue
+            # Only the first hit per path is recorded; recheck against matched paths.
+            compiled = re.compile(fnmatch.translate(pattern))
+            if any(compiled.match(rel) for rel in self._matched):
+                self._used.add(index)
+            else:
+                unused.append(pattern)
+        return unused
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""Result cache for the primary quality gate checks.
+
+A check that declares ``inputs`` (fnmatch globs over repo-relative paths, where
+``*`` also crosses ``/``; ``:root`` stands for the repo-root listing) gets a
+key made of the content of every tracked or untracked, non-ignored file its
+globs match, plus the check script, the shared gate modules, the Python
+minor version and the installed PyYAML version (gates parse YAML). Tracked files
+use their index blob SHA unless they are modified in the worktree, so an
+unchanged tree costs a few `git ls-files` calls. Only passing results are
+stored; failing checks always run again. Checks without inputs are never
+cached.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import hashlib
+import importlib.metadata
+import json
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from typing import Callable
+
+from gate_runner import Check, CheckResult
+
+CACHE_FORMAT = 1
+ROOT_LISTING = ":root"
+GATE_MODULES = (
+    "scripts/gate_cache.py",
+    "scripts/gate_runner.py",
+    "scripts/quality_gates.py",
+    "scripts/repo_snapshot.py",
+)
+
+
+def _git(root: Path, args: list[str], stdin: str | None = None) -> str:
+    proc = subprocess.run(["git", *args], cwd=root, input=stdin, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"git {args[0]} failed: {proc.stderr.strip()}")
+    return proc.stdout
+
+
+def _dependency_versions() -> str:
+    try:
+        return f"pyyaml={importlib.metadata.version('PyYAML')}"
+    except importlib.metadata.PackageNotFoundError:
+        return "pyyaml=none"
+
+
+def default_cache_path(root: Path, name: str = "quality_gates_cache.json") -> Path:
+    """Shared by all worktrees of the repo; keys are content-based."""
+    common = Path(_git(root, ["rev-parse", "--git-common-dir"]).strip())
+    return (common if common.is_absolute() else root / common) / name
+
+
+def load_json_cache(path: Path, version: object) -> dict:
+    """Entries of a cache file written by `save_json_cache`; empty on any mismatch."""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != version:
+        return {}
+    entries = data.get("entries")
+    return entries if isinstance(entries, dict) else {}
+
+
+def save_json_cache(path: Path, version: object, entries: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps({"version": version, "entries": entries}), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def tree_state(root: Path) -> dict[str, str]:
+    """Content id per tracked/untracked non-ignored file in the working tree."""
+    state: dict[str, str] = {}
+    for entry in _git(root, ["ls-files", "-s", "-z"]).split("\0"):
+        if entry:
+            meta, path = entry.split("\t", 1)
+            state[path] = meta.split()[1]
+    dirty = _git(root, ["ls-files", "-z", "--modified", "--others", "--exclude-standard"])
+    paths = sorted({p for p in dirty.split("\0") if p})
+    existing = [p for p in paths if (root / p).is_file()]
+    for path in paths:
+        state.pop(path, None)
+    if existing:
+        shas = _git(root, ["hash-object", "--stdin-paths"], "\n".join(existing) + "\n").split()
+        state.update(zip(existing, shas))
+    return state
+
+
+class GateCache:
+    def __init__(self, path: Path, root: Path, force: bool = False) -> None:
+        self.path = path
+        self.root = root
+        self.force = force
+        self.stats = {"hits": 0, "stored": 0}
+        self._entries = load_json_cache(path, CACHE_FORMAT)
+        self._state: dict[str, str] | None = None
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._versions = _dependency_versions()
+
+    def key(self, check: Check) -> str | None:
+        if not check.inputs:
+            return None
+        with self._lock:
+            if self._state is None:
+                self._state = tree_state(self.root)
+        digest = hashlib.sha256()
+        digest.update(
+            f"{CACHE_FORMAT}\0{sys.version_info[:2]}\0{self._versions}\0{check.command}\n".encode()
+        )
+        scripts = [*GATE_MODULES, *(arg for arg in check.command if arg.endswith(".py"))]
+        for rel in sorted(set(scripts)):
+            path = self.root / rel
+            content = path.read_bytes() if path.is_file() else b""
+            digest.update(f"script\0{rel}\0{hashlib.sha256(content).hexdigest()}\n".encode())
+        for spec in check.inputs:
+            digest.update(f"spec\0{spec}\n".encode())
+            if spec == ROOT_LISTING:
+                names = sorted(p.name for p in self.root.iterdir())
+                digest.update(("root\0" + "\0".join(names) + "\n").encode())
+        matched = sorted(
+            path
+            for path in self._state
+            if any(fnmatch.fnmatch(path, spec) for spec in check.inputs if spec != ROOT_LISTING)
+        )
+        for path in matched:
+            digest.update(f"{path}\0{self._state[path]}\n".encode())
+        return digest.hexdigest()
+
+    def get(self, check: Check, key: str) -> CheckResult | None:
+        with self._lock:
+            entry = self._entries.get(check.name)
+        if not entry or entry.get("key") != key:
+            return None
+        self.stats["hits"] += 1
+        return CheckResult(
+            check, "passed", 0, stdout=entry.get("stdout", ""), stderr=entry.get("stderr", ""),
+            cached=True,
+        )
+
+    def put(self, result: CheckResult, key: str) -> None:
+        if not result.ok:
+            return
+        with self._lock:
+            self._entries[result.check.name] = {
+                "key": key, "stdout": result.stdout, "stderr": result.stderr
+            }
+            self.stats["stored"] += 1
+            self._dirty = True
+
+    def save(self) -> None:
+        """Atomically rewrite the cache file when anything was stored."""
+        if self._dirty:
+            save_json_cache(self.path, CACHE_FORMAT, self._entries)
+
+
+def cached_runner(
+    run_one: Callable[[Check, Path], CheckResult], cache: GateCache
+) -> Callable[[Check, Path], CheckResult]:
+    """Wrap a ``run_checks`` runner so passing results are reused and recorded."""
+
+    def run(check: Check, root: Path) -> CheckResult:
+        key = cache.key(check)
+        if key is None:
+            return run_one(check, root)
+        hit = None if cache.force else cache.get(check, key)
+        if hit is not None:
+            return hit
+        result = run_one(check, root)
+        cache.put(result, key)
+        return result
+
+    return run
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""Timing report, duration budget and run history for the primary quality gate.
+
+Budget file (JSON)::
+
+    {
+      "on_exceed": "fail",
+      "checks": {
+        "file_limits": 2.0,
+        "search_hygiene": {"max_s": 5.0, "on_exceed": "warn"}
+      }
+    }
+
+``on_exceed`` is ``fail`` (the gate fails) or ``warn`` (reported only); the
+top-level value is the default. Cached and skipped checks are not measured
+against the budget. The history file gets one JSON line per gate run; the
+timing block compares each check with the median of its last runs there in the
+same mode (subprocess durations include interpreter startup).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import statistics
+import subprocess
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from gate_runner import CheckResult
+
+BUDGET_MODES = ("fail", "warn")
+HISTORY_WINDOW = 10
+
+
+@dataclass(frozen=True)
+class BudgetViolation:
+    name: str
+    duration_s: float
+    max_s: float
+    on_exceed: str
+
+    @property
+    def message(self) -> str:
+        return f"{self.duration_s:.3f}s > {self.max_s:.3f}s"
+
+
+def load_budget(path: Path, check_names: list[str]) -> dict[str, tuple[float, str]]:
+    """Return ``{check name: (max seconds, on_exceed)}``; ValueError on bad input."""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        raise ValueError(f"cannot read budget file {path}: {exc}") from exc
+    if not isinstance(data, dict) or not isinstance(data.get("checks"), dict):
+        raise ValueError(f"budget file {path} must be an object with a 'checks' mapping")
+    default_mode = data.get("on_exceed", "fail")
+    budget: dict[str, tuple[float, str]] = {}
+    for name, raw in data["checks"].items():
+        if name not in check_names:
+            raise ValueError(f"budget file {path}: unknown check {name!r}")
+        spec = raw if isinstance(raw, dict) else {"max_s": raw}
+        max_s, mode = spec.get("max_s"), spec.get("on_exceed", default_mode)
+        if isinstance(max_s, bool) or not isinstance(max_s, (int, float)) or max_s <= 0:
+            raise ValueError(f"budget file {path}: {name}.max_s must be a positive number")
+        if mode not in BUDGET_MODES:
+            raise ValueError(f"budget file {path}: {name}.on_exceed must be one of {BUDGET_MODES}")
+        budget[name] = (float(max_s), mode)
+    return budget
+
+
+def check_budget(
+    results: list[CheckResult], budget: dict[str, tuple[float, str]]
+) -> list[BudgetViolation]:
+    violations = []
+    for result in results:
+        limit = budget.get(result.check.name)
+        if limit is None or result.cached or result.status == "skipped":
+            continue
+        if result.duration_s > limit[0]:
+            violations.append(BudgetViolation(result.check.name, result.duration_s, *limit))
+    return violations
+
+
+def _commit(root: Path) -> str | None:
+    proc = subprocess.run(
+        ["git", "rev-parse", "--verify", "HEAD"], cwd=root, capture_output=True, text=True
+    )
+    return proc.stdout.strip() if proc.returncode == 0 else None
+
+
+def run_record(
+    results: list[CheckResult],
+    violations: list[BudgetViolation],
+    *,
+    root: Path,
+    mode: str,
+    jobs: int,
+    total_s: float,
+) -> dict:
+    over = {violation.name: violation for violation in violations}
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": _commit(root),
+        "mode": mode,
+        "jobs": jobs,
+        "total_s": round(total_s, 3),
+        "ok": all(result.ok for result in results)
+        and not any(v.on_exceed == "fail" for v in violations),
+        "checks": [
+            {
+                "name": result.check.name,
+                "command": list(result.check.command),
+                "status": result.status,
+                "exit_code": result.exit_code,
+                "cached": result.cached,
+                "duration_s": round(result.duration_s, 4),
+                "max_rss_kb": result.max_rss_kb,
+                "rss_scope": result.rss_scope or None,
+                "over_budget": (
+                    over[result.check.name].on_exceed if result.check.name in over else None
+                ),
+            }
+            for result in results
+        ],
+    }
+
+
+def write_json(path: Path, record: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(record, indent=2) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def history_medians(
+    path: Path, mode: str, window: int = HISTORY_WINDOW
+) -> dict[str, tuple[float, int]]:
+    """Median duration of each check's last ``window`` measured runs in ``mode``."""
+    durations: dict[str, list[float]] = {}
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()
+    except FileNotFoundError:
+        return {}
+    for line in lines:
+        try:
+            run = json.loads(line)
+            checks = run["checks"]
+        except (ValueError, KeyError, TypeError):
+            continue
+        if run.get("mode") != mode:
+            continue
+        for entry in checks:
+            if not isinstance(entry, dict) or entry.get("cached"):
+                continue
+            if entry.get("status") != "skipped":
+                durations.setdefault(entry.get("name"), []).append(entry.get("duration_s", 0.0))
+    return {
+        name: (statistics.median(values[-window:]), len(values[-window:]))
+        for name, values in durations.items()
+    }
+
+
+def append_history(path: Path, record: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as fh:
+        fh.write(json.dumps(record) + "\n")
+
+
+def print_timing(
+    results: list[CheckResult],
+    violations: list[BudgetViolation],
+    medians: dict[str, tuple[float, int]],
+) -> None:
+    over = {violation.name: violation for violation in violations}
+    print("== timing ==")
+    for result in results:
+        name = result.check.name
+        if result.status == "skipped":
+            print(f"TIMING {name}: skipped")
+            continue
+        rss = f"{result.max_rss_kb / 1024:.1f}MB" if result.max_rss_kb is not None else "n/a"
+        line = f"TIMING {name}: {result.duration_s:.3f}s rss={rss}"
+        if result.cached:
+            line += " cached"
+        if name in medians:
+            median, runs = medians[name]
+            line += f" median={median:.3f}s/{runs} runs"
+        print(line)
+        if name in over:
+            violation = over[name]
+            print(f"BUDGET {violation.on_exceed.upper()} {name}: {violation.message}")
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""Dependency-aware parallel runner for the primary quality gate checks.
+
+A check starts once every check in its ``depends_on`` has passed; when one of
+those fails, the check is skipped and counts as failed. Each check's output is
+captured and printed as one labeled block as soon as it finishes, so parallel
+checks never interleave. Results are always returned in declaration order.
+
+In-process mode imports a check's module and calls its ``main()`` instead of
+starting a new interpreter; stdout/stderr are captured per thread, so it also
+works with ``--jobs``. Arguments after the script are passed as ``argv``. A
+check whose module cannot be imported (or whose ``main`` takes no ``argv``
+while it has arguments) falls back to the subprocess path. When given a
+``RepoSnapshot``, it is passed to every ``main(snapshot=...)`` that accepts
+one, so the checks share their repo reads.
+
+Every result carries its wall-clock duration. Peak RSS is only measured for
+subprocess checks (their own peak, ``rss_scope="child"``). In-process checks
+share one interpreter, whose high-water mark says nothing about a single check,
+so they report ``max_rss_kb=None``; use ``--subprocess`` to measure memory.
+"""
+
+from __future__ import annotations
+
+import importlib
+import inspect
+import io
+import os
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Callable
+
+from repo_snapshot import RepoSnapshot
+
+
+@dataclass(frozen=True)
+class Check:
+    name: str
+    command: tuple[str, ...]
+    depends_on: tuple[str, ...] = ()
+    inputs: tuple[str, ...] = ()  # globs the check reads; see gate_cache.py
+    cold_args: tuple[str, ...] = ()  # extra args that bypass the check's own caches
+
+    def cold(self) -> Check:
+        """This check with ``cold_args`` appended (``quality_gates.py --no-cache``)."""
+        return replace(self, command=self.command + self.cold_args)
+
+    @property
+    def label(self) -> str:
+        return " ".join(self.command)
+
+    @property
+    def module(self) -> str | None:
+        """Importable module name for `python3 scripts/<name>.py [args]` checks."""
+        if len(self.command) >= 2 and self.command[0] == "python3":
+            script = Path(self.command[1])
+            if script.suffix == ".py" and script.parent.name == "scripts":
+                return script.stem
+        return None
+
+
+@dataclass
+class CheckResult:
+    check: Check
+    status: str  # passed | failed | skipped
+    exit_code: int | None
+    stdout: str = ""
+    stderr: str = ""
+    detail: str = ""
+    cached: bool = False
+    duration_s: float = 0.0
+    max_rss_kb: int | None = None
+    rss_scope: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "passed"
+
+
+def validate_dependencies(checks: list[Check]) -> None:
+    """Reject unknown dependency names and dependency cycles."""
+    by_name = {check.name: check for check in checks}
+    for check in checks:
+        unknown = [dep for dep in check.depends_on if dep not in by_name]
+        if unknown:
+            raise ValueError(f"check {check.name} depends on unknown check(s): {unknown}")
+    state: dict[str, str] = {}
+
+    def visit(name: str, trail: list[str]) -> None:
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "active":
+            raise ValueError(f"dependency cycle: {' -> '.join(trail + [name])}")
+        state[name] = "active"
+        for dep in by_name[name].depends_on:
+            visit(dep, trail + [name])
+        state[name] = "done"
+
+    for check in checks:
+        visit(check.name, [])
+
+
+def _rss_kb(ru_maxrss: int) -> int:
+    # ru_maxrss is kilobytes on Linux but bytes on macOS.
+    return ru_maxrss // 1024 if sys.platform == "darwin" else ru_maxrss
+
+
+def run_subprocess(check: Check, root: Path) -> CheckResult:
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        list(check.command), cwd=root, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+    )
+    with ThreadPoolExecutor(max_workers=1) as reader:
+        stderr = reader.submit(proc.stderr.read)
+        stdout = proc.stdout.read()
+        stderr_text = stderr.result()
+    proc.stdout.close()
+    proc.stderr.close()
+    rss_kb = None
+    if hasattr(os, "wait4"):
+        # Reap the child ourselves so its own rusage (peak RSS) is available.
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        rss_kb = _rss_kb(usage.ru_maxrss)
+    else:
+        proc.wait()
+    return CheckResult(
+        check=check,
+        status="passed" if proc.returncode == 0 else "failed",
+        exit_code=proc.returncode,
+        stdout=stdout,
+        stderr=stderr_text,
+        duration_s=time.perf_counter() - started,
+        max_rss_kb=rss_kb,
+        rss_scope="child" if rss_kb is not None else "",
+    )
+
+
+class _ThreadStream(io.TextIOBase):
+    """sys.stdout/sys.stderr stand-in that writes to a per-thread buffer when set."""
+
+    def __init__(self, fallback: io.TextIOBase) -> None:
+        self.fallback = fallback
+        self.local = threading.local()
+
+    def write(self, text: str) -> int:
+        return (getattr(self.local, "buffer", None) or self.fallback).write(text)
+
+    def flush(self) -> None:
+        (getattr(self.local, "buffer", None) or self.fallback).flush()
+
+
+_STREAMS_LOCK = threading.Lock()
+
+
+def _thread_streams() -> tuple[_ThreadStream, _ThreadStream]:
+    with _STREAMS_LOCK:
+        if not isinstance(sys.stdout, _ThreadStream):
+            sys.stdout = _ThreadStream(sys.stdout)
+        if not isinstance(sys.stderr, _ThreadStream):
+            sys.stderr = _ThreadStream(sys.stderr)
+        return sys.stdout, sys.stderr
+
+
+def run_in_process(
+    check: Check, root: Path, snapshot: RepoSnapshot | None = None
+) -> CheckResult:
+    """Call the check module's main() with captured output; subprocess fallback."""
+    if check.module is None:
+        return run_subprocess(check, root)
+    try:
+        module = importlib.import_module(check.module)
+    except ImportError:
+        return run_subprocess(check, root)
+    params = inspect.signature(module.main).parameters
+    kwargs: dict = {}
+    if len(check.command) > 2:
+        if "argv" not in params:
+            return run_subprocess(check, root)
+        kwargs["argv"] = list(check.command[2:])
+    if snapshot is not None and "snapshot" in params:
+        kwargs["snapshot"] = snapshot
+    out, err = _thread_streams()
+    out.local.buffer, err.local.buffer = io.StringIO(), io.StringIO()
+    started = time.perf_counter()
+    try:
+        try:
+            code = module.main(**kwargs)
+        except SystemExit as exc:
+            # Same mapping as the interpreter: None -> 0, int -> itself, message -> 1.
+            if exc.code is None or isinstance(exc.code, int):
+                code = exc.code or 0
+            else:
+                print(exc.code, file=sys.stderr)
+                code = 1
+        except Exception:  # noqa: BLE001 - reported like an uncaught error in a subprocess
+            traceback.print_exc()
+            code = 1
+        stdout, stderr = out.local.buffer.getvalue(), err.local.buffer.getvalue()
+    finally:
+        out.local.buffer = err.local.buffer = None
+    return CheckResult(
+        check=check,
+        status="passed" if code == 0 else "failed",
+        exit_code=int(code),
+        stdout=stdout,
+        stderr=stderr,
+        duration_s=time.perf_counter() - started,
+    )
+
+
+def print_block(result: CheckResult) -> None:
+    label = result.check.label
+    if result.status == "skipped":
+        print(f"SKIP {label} ({result.detail})", file=sys.stderr)
+        return
+    print(f"RUN {label}")
+    if result.stdout.strip():
+        print(result.stdout.strip())
+    if result.ok:
+        print(f"OK  {label}" + (" (cached)" if result.cached else ""))
+        return
+    if result.stderr.strip():
+        print(result.stderr.strip(), file=sys.stderr)
+    print(f"FAIL {label}", file=sys.stderr)
+
+
+def run_checks(
+    checks: list[Check],
+    root: Path,
+    jobs: int = 1,
+    run_one: Callable[[Check, Path], CheckResult] = run_subprocess,
+    on_result: Callable[[CheckResult], None] = print_block,
+) -> list[CheckResult]:
+    """Run ``checks`` on up to ``jobs`` workers, honouring ``depends_on``."""
+    validate_dependencies(checks)
+    results: dict[str, CheckResult] = {}
+    pending = list(checks)
+    running: dict[Future, Check] = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        while pending or running:
+            for check in list(pending):
+                if len(running) >= jobs:
+                    break
+                deps = [results.get(dep) for dep in check.depends_on]
+                if any(dep is None for dep in deps):
+                    continue
+                pending.remove(check)
+                failed = [dep.check.name for dep in deps if dep is not None and not dep.ok]
+                if failed:
+                    results[check.name] = CheckResult(
+                        check, "skipped", None, detail=f"dependency failed: {', '.join(failed)}"
+                    )
+                    on_result(results[check.name])
+                    continue
+                running[pool.submit(run_one, check, root)] = check
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in sorted(done, key=lambda f: checks.index(running[f])):
+                check = running.pop(fut)
+                results[check.name] = fut.result()
+                on_result(results[check.name])
+
+    return [results[check.name] for check in checks]
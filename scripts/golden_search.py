@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Top hit per golden query, for all queries in one pass over the repo.
+
+With ripgrep, a single ``rg --json --sort path -e q1 -e q2 ...`` run is
+streamed and every matching line is attributed to the queries that match it
+(Python ``re``); the run stops once every query has a hit. A query that Python
+cannot compile falls back to its own ``rg`` run. Without ripgrep, the same
+files rg would search are scanned in Python: tracked and untracked files
+minus `.gitignore`/root `.ignore` matches, hidden paths and binary files.
+Hits are always in path order (directory walk order), so results are stable.
+Every backend matches line by line (`line_match`, also used by
+`search_index`), so a pattern can never match across a newline in one backend
+and not in the others.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import shutil
+import subprocess
+from pathlib import Path
+
+from repo_snapshot import RepoSnapshot
+
+
+def _git(root: Path, args: list[str], stdin: str | None = None) -> subprocess.CompletedProcess:
+    return subprocess.run(["git", *args], cwd=root, input=stdin, capture_output=True, text=True)
+
+
+def _compile(queries: list[str]) -> dict[str, re.Pattern | None]:
+    compiled: dict[str, re.Pattern | None] = {}
+    for query in queries:
+        try:
+            compiled[query] = re.compile(query)
+        except re.error:
+            compiled[query] = None
+    return compiled
+
+
+def line_match(pattern: re.Pattern, lines: list[str]) -> bool:
+    """True when ``pattern`` matches within one of ``lines`` (rg never matches across lines)."""
+    return any(pattern.search(line) for line in lines)
+
+
+def _rg_single(root: Path, query: str) -> str | None:
+    proc = subprocess.run(
+        ["rg", "-n", "--sort", "path", "--max-count", "1", query, "."],
+        cwd=root,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode not in (0, 1):
+        raise RuntimeError(proc.stderr.strip() or f"rg failed for query: {query}")
+    lines = proc.stdout.strip().splitlines()
+    return lines[0].split(":", 1)[0].removeprefix("./") if lines else None
+
+
+def _rg_batch(root: Path, patterns: dict[str, re.Pattern]) -> dict[str, str | None]:
+    hits: dict[str, str | None] = dict.fromkeys(patterns)
+    args = ["rg", "--json", "--sort", "path"]
+    for query in patterns:
+        args += ["-e", query]
+    proc = subprocess.Popen(
+        [*args, "."], cwd=root, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+    )
+    assert proc.stdout is not None and proc.stderr is not None
+    try:
+        for raw in proc.stdout:
+            event = json.loads(raw)
+            if event.get("type") != "match":
+                continue
+            path = event["data"]["path"].get("text")
+            line = event["data"]["lines"].get("text")
+            if path is None or line is None:
+                continue
+            for query, pattern in patterns.items():
+                if hits[query] is None and line_match(pattern, line.splitlines()):
+                    hits[query] = path.removeprefix("./")
+            if all(hit is not None for hit in hits.values()):
+                proc.kill()
+                break
+    finally:
+        proc.stdout.close()
+        stderr = proc.stderr.read()
+        proc.stderr.close()
+        code = proc.wait()
+    if code not in (0, 1) and not all(hit is not None for hit in hits.values()):
+        raise RuntimeError(stderr.strip() or "rg failed for golden queries")
+    return hits
+
+
+def search_files(root: Path) -> list[str]:
+    """Files rg would search from the repo root, in its walk order."""
+    listed = _git(root, ["ls-files", "-z", "--cached", "--others", "--exclude-standard"])
+    if listed.returncode != 0:
+        raise RuntimeError(f"git ls-files failed: {listed.stderr.strip()}")
+    paths = {
+        path
+        for path in listed.stdout.split("\0")
+        if path and not any(part.startswith(".") for part in path.split("/"))
+    }
+    ignore = ["-c", f"core.excludesFile={root / '.ignore'}"] if (root / ".ignore").is_file() else []
+    checked = _git(
+        root, [*ignore, "check-ignore", "--no-index", "--stdin", "-z"], "\0".join(sorted(paths))
+    )
+    if checked.returncode not in (0, 1):
+        raise RuntimeError(f"git check-ignore failed: {checked.stderr.strip()}")
+    paths -= set(checked.stdout.split("\0"))
+    return sorted((p for p in paths if (root / p).is_file()), key=lambda p: p.split("/"))
+
+
+def _python_scan(
+    snapshot: RepoSnapshot, patterns: dict[str, re.Pattern]
+) -> dict[str, str | None]:
+    hits: dict[str, str | None] = dict.fromkeys(patterns)
+    for rel in search_files(snapshot.root):
+        try:
+            text = snapshot.text(rel)
+        except (UnicodeDecodeError, OSError):
+            continue
+        if "\0" in text:
+            continue
+        lines = text.splitlines()
+        for query, pattern in patterns.items():
+            if hits[query] is None and line_match(pattern, lines):
+                hits[query] = rel
+        if all(hit is not None for hit in hits.values()):
+            break
+    return hits
+
+
+def top_hits(snapshot: RepoSnapshot, queries: list[str]) -> dict[str, str | None]:
+    """First matching path per query (None when a query has no hit)."""
+    compiled = _compile(queries)
+    patterns = {query: pattern for query, pattern in compiled.items() if pattern is not None}
+    if shutil.which("rg") is None:
+        invalid = [query for query, pattern in compiled.items() if pattern is None]
+        if invalid:
+            raise RuntimeError(f"rg (ripgrep) is required for query: {invalid[0]}")
+        return _python_scan(snapshot, patterns)
+    hits = _rg_batch(snapshot.root, patterns) if patterns else {}
+    for query, pattern in compiled.items():
+        if pattern is None:
+            hits[query] = _rg_single(snapshot.root, query)
+    return {query: hits[query] for query in queries}
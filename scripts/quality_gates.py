@@ -3,16 +3,67 @@
 
 from __future__ import annotations
 
+import argparse
+import functools
 from pathlib import Path
-import subprocess
 import sys
+import time
 
+from gate_cache import ROOT_LISTING, GateCache, cached_runner, default_cache_path
+from gate_report import (
+    append_history,
+    check_budget,
+    history_medians,
+    load_budget,
+    print_timing,
+    run_record,
+    write_json,
+)
+from gate_runner import Check, run_checks, run_in_process, run_subprocess
+from repo_snapshot import RepoSnapshot
+
+# Checks are independent read-only validators; use depends_on=("<name>",) to make
+# a check wait for (and be skipped on failure of) another one. `inputs` lists
+# every path a check reads (see gate_cache.py); an unlisted read makes the cached
+# verdict stale, so when in doubt use "*". `cold_args` switch off a check's own
+# caches (blob counts, search index) for `--no-cache`.
 CHECKS = [
-    ["python3", "scripts/validate_cto_rules_registry.py"],
-    ["python3", "scripts/check_repo_contract.py"],
-    ["python3", "scripts/check_repo_10x_contract.py"],
-    ["python3", "scripts/check_search_hygiene.py"],
-    ["python3", "scripts/check_file_limits.py"],
+    Check(
+        "cto_rules_registry",
+        ("python3", "scripts/validate_cto_rules_registry.py"),
+        inputs=("docs/CTO_RULES.md",),
+    ),
+    Check(
+        "repo_contract",
+        ("python3", "scripts/check_repo_contract.py"),
+        inputs=(
+            ROOT_LISTING,
+            "README.md",
+            "SECURITY.md",
+            "LICENSE",
+            ".ignore",
+            "docs/*",
+            "config/*",
+            "scripts/*",
+        ),
+    ),
+    Check(
+        "repo_10x_contract",
+        ("python3", "scripts/check_repo_10x_contract.py"),
+        inputs=("README.md", "INSTALL.ps1", "docs/*"),
+    ),
+    Check(
+        "search_hygiene",
+        ("python3", "scripts/check_search_hygiene.py"),
+        inputs=("*",),
+        cold_args=("--no-index",),
+    ),
+    Check(
+        "file_limits",
+        ("python3", "scripts/check_file_limits.py"),
+        inputs=("*",),
+        cold_args=("--no-cache",),
+    ),
 ]
 
 
@@ -20,28 +71,100 @@ def _repo_root() -> Path:
     return Path(__file__).resolve().parents[1]
 
 
-def main() -> int:
+def _positive_int(raw: str) -> int:
+    value = int(raw)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be >= 1 (got {raw})")
+    return value
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="quality_gates")
+    parser.add_argument(
+        "--jobs",
+        type=_positive_int,
+        default=1,
+        help="Run up to N independent checks concurrently (default 1)",
+    )
+    parser.add_argument(
+        "--subprocess",
+        action="store_true",
+        help="Run every check in its own python3 process instead of in-process",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Ignore cached results and run every check (the cache is still refreshed)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Cold run: no result cache, and checks skip their own caches (cold_args)",
+    )
+    parser.add_argument(
+        "--json-output",
+        type=Path,
+        help="Write per-check status, duration and peak RSS (--subprocess only) as JSON",
+    )
+    parser.add_argument(
+        "--budget", type=Path, help="JSON file with a max duration per check (see gate_report.py)"
+    )
+    parser.add_argument(
+        "--history", type=Path, help="Append this run to a JSON-lines history file"
+    )
+    args = parser.parse_args(argv)
+
     root = _repo_root()
-    failures: list[str] = []
+    budget = {}
+    if args.budget is not None:
+        try:
+            budget = load_budget(args.budget, [check.name for check in CHECKS])
+        except ValueError as exc:
+            print(f"ERROR: {exc}", file=sys.stderr)
+            return 2
     print("== Demo AI Stack primary quality gate ==")
-    for command in CHECKS:
-        label = " ".join(command)
-        print(f"RUN {label}")
-        proc = subprocess.run(command, cwd=root, capture_output=True, text=True)
-        if proc.stdout.strip():
-            print(proc.stdout.strip())
-        if proc.returncode != 0:
-            failures.append(label)
-            if proc.stderr.strip():
-                print(proc.stderr.strip(), file=sys.stderr)
-            print(f"FAIL {label}", file=sys.stderr)
-        else:
-            print(f"OK  {label}")
+    if args.subprocess:
+        run_one = run_subprocess
+    else:
+        # One snapshot for all checks: ls-files and each file read happen once.
+        run_one = functools.partial(run_in_process, snapshot=RepoSnapshot(root))
+    cache = None if args.no_cache else GateCache(default_cache_path(root), root, force=args.force)
+    started = time.perf_counter()
+    try:
+        runner = run_one if cache is None else cached_runner(run_one, cache)
+        checks = [check.cold() for check in CHECKS] if args.no_cache else CHECKS
+        results = run_checks(checks, root, jobs=args.jobs, run_one=runner)
+    finally:
+        if cache is not None:
+            cache.save()
+    total_s = time.perf_counter() - started
+    violations = check_budget(results, budget)
+    over_budget = {v.name: v for v in violations if v.on_exceed == "fail"}
+    failures = [result for result in results if not result.ok or result.check.name in over_budget]
+
+    mode = "subprocess" if args.subprocess else "in-process"
+    if args.json_output or args.budget or args.history:
+        medians = history_medians(args.history, mode) if args.history else {}
+        print_timing(results, violations, medians)
+    if args.json_output or args.history:
+        record = run_record(
+            results, violations, root=root, mode=mode, jobs=args.jobs, total_s=total_s
+        )
+        if args.json_output:
+            write_json(args.json_output, record)
+        if args.history:
+            append_history(args.history, record)
 
     if failures:
         print("FAILED checks:", file=sys.stderr)
-        for label in failures:
-            print(f"- {label}", file=sys.stderr)
+        for result in failures:
+            if result.status == "skipped":
+                suffix = f" (skipped: {result.detail})"
+            elif result.ok:
+                suffix = f" (over budget: {over_budget[result.check.name].message})"
+            else:
+                suffix = ""
+            print(f"- {result.check.label}{suffix}", file=sys.stderr)
         return 1
 
     print("OK: all quality gates passed")
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Shared read-only view of the repo for the governance gates.
+
+`git ls-files` and the repo-root listing run at most once, and every file is
+read at most once; text, AST and YAML views are memoized (failures too, so a
+file that does not decode or parse fails the same way for every gate). When
+`quality_gates.py` runs the checks in-process they all share one snapshot, so
+the full gate suite does a single pass of I/O over the repo. Standalone, each
+check builds its own.
+"""
+
+from __future__ import annotations
+
+import ast
+import subprocess
+import threading
+from pathlib import Path
+from typing import Any, Callable
+
+
+class RepoSnapshot:
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.stats = {"reads": 0, "hits": 0}
+        self._memo: dict[tuple, tuple[bool, Any]] = {}
+        self._key_locks: dict[tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key: tuple, build: Callable[[], Any]) -> Any:
+        # The shared lock only guards the dicts; builds hold a per-key lock, so
+        # different files are read and parsed concurrently, each exactly once.
+        with self._lock:
+            entry = self._memo.get(key)
+            if entry is None:
+                key_lock = self._key_locks.setdefault(key, threading.Lock())
+            else:
+                self.stats["hits"] += 1
+        if entry is None:
+            with key_lock:
+                with self._lock:
+                    entry = self._memo.get(key)
+                if entry is None:
+                    try:
+                        entry = (True, build())
+                    except Exception as exc:  # noqa: BLE001 - memoized and re-raised per caller
+                        entry = (False, exc)
+                    with self._lock:
+                        self._memo[key] = entry
+                        self._key_locks.pop(key, None)
+                else:
+                    with self._lock:
+                        self.stats["hits"] += 1
+        ok, value = entry
+        if not ok:
+            raise value
+        return value
+
+    def tracked_files(self) -> tuple[str, ...]:
+        """Repo-relative posix paths from `git ls-files` (index order)."""
+
+        def build() -> tuple[str, ...]:
+            output = subprocess.check_output(["git", "ls-files"], cwd=self.root, text=True)
+            return tuple(line for line in output.splitlines() if line.strip())
+
+        return self._get(("ls-files",), build)
+
+    def root_entries(self) -> tuple[str, ...]:
+        return self._get(("root",), lambda: tuple(sorted(p.name for p in self.root.iterdir())))
+
+    def exists(self, rel: str) -> bool:
+        return self._get(("exists", rel), lambda: (self.root / rel).exists())
+
+    def is_file(self, rel: str) -> bool:
+        return self._get(("is_file", rel), lambda: (self.root / rel).is_file())
+
+    def text(self, rel: str) -> str:
+        def build() -> str:
+            with self._lock:
+                self.stats["reads"] += 1
+            return (self.root / rel).read_text(encoding="utf-8")
+
+        return self._get(("text", rel), build)
+
+    def ast(self, rel: str) -> ast.Module:
+        return self._get(("ast", rel), lambda: ast.parse(self.text(rel)))
+
+    def yaml(self, rel: str, extract: Callable[[str], str] | None = None) -> Any:
+        """``yaml.safe_load`` of the file, or of ``extract(text)`` for YAML embedded in markdown."""
+
+        def build() -> Any:
+            import yaml  # PyYAML is only needed by the checks that read YAML
+
+            text = self.text(rel)
+            return yaml.safe_load(extract(text) if extract is not None else text)
+
+        return self._get(("yaml", rel, extract), build)
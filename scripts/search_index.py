@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""Persistent trigram index for repo searches (golden queries, tool lookups).
+
+Covers the files rg would search (see `golden_search.search_files`, so
+`.gitignore`, root `.ignore` and hidden paths are respected). Stored as
+SQLite in the worktree's git dir and updated incrementally: a file is
+re-indexed only when its content id (`git ls-files -s` blob SHA, or a fresh
+hash for modified and untracked files) changed. Trigrams are case-folded, so
+one index serves case-sensitive and case-insensitive queries.
+
+A query is narrowed to the files containing every trigram of the literal runs
+it requires; those candidates are then verified line by line with Python
+``re`` in rg walk order (`golden_search.line_match`), so anchors and ``.``
+behave as in rg. Patterns with alternation or groups have no required literals
+and verify every file.
+
+CLI (like ``rg -l``)::
+
+    python3 scripts/search_index.py [-i] [-F] PATTERN [PATH_PREFIX ...]
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+from gate_cache import tree_state
+from golden_search import line_match, search_files, top_hits
+from repo_snapshot import RepoSnapshot
+
+INDEX_FORMAT = "1"
+INDEX_NAME = "search_index.sqlite3"
+MAX_QUERY_GRAMS = 256  # stays under SQLite's variable limit; fewer grams only widen
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY, path TEXT UNIQUE, blob TEXT, searchable INTEGER
+);
+CREATE TABLE IF NOT EXISTS grams (
+    gram TEXT, file_id INTEGER, PRIMARY KEY (gram, file_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS grams_file ON grams (file_id);
+"""
+# The part after a backslash: escapes with an argument (\x41, \u0041, \N{...}, octal,
+# \p{...}) are consumed whole so their digits are never taken for literal text.
+ESCAPE = re.compile(
+    r"x\{[^}]*\}|x[0-9a-fA-F]{0,2}|u[0-9a-fA-F]{0,4}|U[0-9a-fA-F]{0,8}"
+    r"|[NpP]\{[^}]*\}|[pP].|0[0-7]{0,2}|[0-7]{3}|\d+|.",
+    re.DOTALL,
+)
+
+
+def default_index_path(root: Path) -> Path:
+    """Per worktree: worktrees index different trees."""
+    git_dir = subprocess.check_output(
+        ["git", "rev-parse", "--absolute-git-dir"], cwd=root, text=True
+    ).strip()
+    return Path(git_dir) / INDEX_NAME
+
+
+def required_literals(pattern: str, fixed: bool = False) -> list[str]:
+    """Literal runs every match must contain (case-folded, 3+ chars)."""
+    if fixed:
+        return [pattern.casefold()] if len(pattern) >= 3 else []
+    runs, run, i = [], "", 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch in "(|)":
+            return []  # groups and alternation: no cheap guarantee
+        if ch == "\\":
+            escaped = ESCAPE.match(pattern, i + 1)
+            literal = escaped.group() if escaped else ""
+            if len(literal) == 1 and not literal.isalnum():
+                run += literal
+            else:
+                runs.append(run)
+                run = ""
+            i = escaped.end() if escaped else i + 1
+            continue
+        if ch == "[":
+            i += 2 if pattern[i + 1 : i + 2] == "^" else 1
+            i += 1 if pattern[i : i + 1] == "]" else 0
+            while i < len(pattern) and pattern[i] != "]":
+                i += 2 if pattern[i] == "\\" else 1
+        elif ch in "*?{":
+            run = run[:-1]  # the quantified character is optional
+            if ch == "{":
+                i = pattern.find("}", i) if "}" in pattern[i:] else len(pattern)
+        elif ch not in ".^$+":
+            run += ch
+            i += 1
+            continue
+        runs.append(run)
+        run = ""
+        i += 1
+    runs.append(run)
+    return [r.casefold() for r in runs if len(r) >= 3]
+
+
+class SearchIndex:
+    def __init__(self, path: Path, snapshot: RepoSnapshot) -> None:
+        self.snapshot = snapshot
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.executescript(SCHEMA)
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'format'").fetchone()
+        if row is None or row[0] != INDEX_FORMAT:
+            with self.db:
+                self.db.execute("DELETE FROM grams")
+                self.db.execute("DELETE FROM files")
+                self.db.execute("INSERT OR REPLACE INTO meta VALUES ('format', ?)", (INDEX_FORMAT,))
+        self.order: list[str] = []
+        self.stats = {"files": 0, "indexed": 0, "removed": 0}
+
+    def update(self) -> dict:
+        """Sync the index with the working tree; returns counts."""
+        root = self.snapshot.root
+        self.order = search_files(root)
+        blobs = tree_state(root)
+        known = {
+            path: (file_id, blob)
+            for file_id, path, blob in self.db.execute("SELECT id, path, blob FROM files")
+        }
+        with self.db:
+            for path in set(known) - set(self.order):
+                self._remove(known[path][0])
+                self.stats["removed"] += 1
+            for path in self.order:
+                blob = blobs.get(path)
+                if path in known and blob is not None and known[path][1] == blob:
+                    continue
+                if path in known:
+                    self._remove(known[path][0])
+                self._add(path, blob)
+                self.stats["indexed"] += 1
+        self.stats["files"] = len(self.order)
+        return self.stats
+
+    def _remove(self, file_id: int) -> None:
+        self.db.execute("DELETE FROM grams WHERE file_id = ?", (file_id,))
+        self.db.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def _add(self, path: str, blob: str | None) -> None:
+        try:
+            text = self.snapshot.text(path)
+        except (UnicodeDecodeError, OSError):
+            text = None
+        searchable = text is not None and "\0" not in text
+        cursor = self.db.execute(
+            "INSERT INTO files (path, blob, searchable) VALUES (?, ?, ?)",
+            (path, blob, int(searchable)),
+        )
+        if searchable:
+            folded = text.casefold()
+            grams = {folded[i : i + 3] for i in range(len(folded) - 2)}
+            self.db.executemany(
+                "INSERT INTO grams VALUES (?, ?)", ((gram, cursor.lastrowid) for gram in grams)
+            )
+
+    def candidates(self, literals: list[str]) -> list[str]:
+        """Searchable files, in rg walk order, that contain every literal's trigrams."""
+        grams = sorted({lit[i : i + 3] for lit in literals for i in range(len(lit) - 2)})
+        grams = grams[:MAX_QUERY_GRAMS]
+        query = "SELECT path FROM files WHERE searchable = 1"
+        if grams:
+            marks = ", ".join("?" * len(grams))
+            query += (
+                f" AND id IN (SELECT file_id FROM grams WHERE gram IN ({marks})"
+                f" GROUP BY file_id HAVING COUNT(*) = {len(grams)})"
+            )
+        found = {path for (path,) in self.db.execute(query, grams)}
+        return [path for path in self.order if path in found]
+
+    def search(self, pattern: re.Pattern, literals: list[str], first: bool = False) -> list[str]:
+        """Files in walk order whose text matches ``pattern`` (stop at one if ``first``)."""
+        matches = []
+        for path in self.candidates(literals):
+            if line_match(pattern, self.snapshot.text(path).splitlines()):
+                matches.append(path)
+                if first:
+                    break
+        return matches
+
+    def close(self) -> None:
+        self.db.close()
+
+
+def indexed_top_hits(snapshot: RepoSnapshot, queries: list[str]) -> dict[str, str | None]:
+    """`golden_search.top_hits` answered from the index (same walk order)."""
+    hits: dict[str, str | None] = {}
+    unsupported = []
+    index = SearchIndex(default_index_path(snapshot.root), snapshot)
+    try:
+        index.update()
+        for query in queries:
+            try:
+                pattern = re.compile(query)
+            except re.error:
+                unsupported.append(query)
+                continue
+            found = index.search(pattern, required_literals(query), first=True)
+            hits[query] = found[0] if found else None
+    finally:
+        index.close()
+    if unsupported:
+        hits.update(top_hits(snapshot, unsupported))
+    return {query: hits[query] for query in queries}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="search_index", description="Indexed `rg -l`.")
+    parser.add_argument("-i", "--ignore-case", action="store_true")
+    parser.add_argument("-F", "--fixed-strings", action="store_true")
+    parser.add_argument("pattern")
+    parser.add_argument("prefixes", nargs="*", help="Only report paths under these prefixes")
+    args = parser.parse_args(argv)
+
+    snapshot = RepoSnapshot(Path(__file__).resolve().parents[1])
+    flags = re.IGNORECASE if args.ignore_case else 0
+    source = re.escape(args.pattern) if args.fixed_strings else args.pattern
+    try:
+        pattern = re.compile(source, flags)
+    except re.error as exc:
+        print(f"ERROR: invalid pattern: {exc}", file=sys.stderr)
+        return 2
+    index = SearchIndex(default_index_path(snapshot.root), snapshot)
+    try:
+        index.update()
+        matches = index.search(pattern, required_literals(args.pattern, args.fixed_strings))
+    finally:
+        index.close()
+    prefixes = [prefix.rstrip("/") for prefix in args.prefixes]
+    if prefixes:
+        matches = [m for m in matches if any(m == p or m.startswith(p + "/") for p in prefixes)]
+    for path in matches:
+        print(path)
+    return 0 if matches else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
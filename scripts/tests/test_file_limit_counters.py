@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import ast
+import sys
+from pathlib import Path
+
+import pytest
+
+import check_file_limits
+from file_limit_counters import count_functions, count_python
+from repo_snapshot import RepoSnapshot
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+CORPUS = {
+    "plain": "def a():\n    pass\n",
+    "async_and_nested": "async def a():\n    def b():\n        pass\n    return b\n",
+    "decorated_method": (
+        "class C:\n    @property\n    @staticmethod\n    def x(self):\n        return 1\n"
+    ),
+    "keyword_in_strings": 's = "def x(): pass"\nt = """\ndef y():\n"""\nu = f"{s!r} def"\n',
+    "keyword_in_comment": "# def nope():\nx = 1  # def also_nope()\n",
+    "one_liner": "def a(): return 1\nclass B: x = lambda: 1\n",
+    "continued_lines": "def a(\n    x,\n    y,\n):\n    return (x\n        + y)\n",
+    "no_functions": "X = 1\n",
+}
+if sys.version_info >= (3, 12):
+    CORPUS["pep701_nested_fstring"] = 'x = f"{f"{f"{1}"}"} def"\ndef a():\n    pass\n'
+# Lines inside a multi-line string that look like a def are the only overcount.
+OVERCOUNT = {"keyword_in_strings": 1}
+
+
+def _ast_count(text: str) -> int:
+    return sum(
+        isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+        for node in ast.walk(ast.parse(text))
+    )
+
+
+@pytest.mark.parametrize("name", sorted(CORPUS))
+def test_def_lines_bound_ast_on_corpus(name: str) -> None:
+    assert count_python(CORPUS[name]) == _ast_count(CORPUS[name]) + OVERCOUNT.get(name, 0)
+
+
+def test_def_lines_bound_ast_on_repo_sources() -> None:
+    for path in sorted((REPO_ROOT / "scripts").glob("*.py")):
+        text = path.read_text(encoding="utf-8")
+        assert count_python(text) >= _ast_count(text), path.name
+
+
+def test_gate_confirms_a_bound_over_the_limit_on_the_ast(git_repo: Path) -> None:
+    limit = check_file_limits.MAX_FUNCTIONS
+    doc = '"""Usage:\n\ndef example():\n"""\n'
+    texts = {
+        "over.py": doc + "def f():\n    pass\n" * (limit + 1),
+        "at_limit.py": doc + "def f():\n    pass\n" * limit,
+    }
+    for rel, text in texts.items():
+        (git_repo / rel).write_text(text, encoding="utf-8")
+    snapshot = RepoSnapshot(git_repo)
+
+    def gate_count(rel: str) -> int:
+        return check_file_limits._function_count(snapshot, Path(rel), texts[rel], rel, False)
+
+    # Both bounds exceed the limit by the docstring's def line; the AST drops it.
+    assert gate_count("over.py") == limit + 1
+    assert gate_count("at_limit.py") == limit
+
+
+def test_registry_dispatches_on_suffix() -> None:
+    assert count_functions(".ts", "export async function a() {}\nconst b = (x) => x\n") == 2
+    assert count_functions(".sh", "build() {\n  :\n}\nfunction test {\n}\n") == 2
+    assert count_functions(".md", "def a():\n") == 0
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+from gate_runner import Check, run_in_process, run_subprocess
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+CHECK = Check("repo_10x_contract", ("python3", "scripts/check_repo_10x_contract.py"))
+
+
+def test_in_process_check_reports_no_rss() -> None:
+    result = run_in_process(CHECK, REPO_ROOT)
+    assert result.ok
+    assert (result.max_rss_kb, result.rss_scope) == (None, "")
+    assert result.duration_s > 0
+
+
+@pytest.mark.skipif(not hasattr(os, "wait4"), reason="needs os.wait4")
+def test_subprocess_check_reports_its_own_rss() -> None:
+    result = run_subprocess(CHECK, REPO_ROOT)
+    assert result.ok
+    assert result.rss_scope == "child" and result.max_rss_kb > 0
+
+
+def test_cold_check_passes_its_args_in_process() -> None:
+    check = Check(
+        "file_limits", ("python3", "scripts/check_file_limits.py"), cold_args=("--bogus",)
+    )
+    cold = check.cold()
+    assert cold.command[-1] == "--bogus" and cold.module == "check_file_limits"
+
+    result = run_in_process(cold, REPO_ROOT)
+    assert result.exit_code == 2
+    assert "unrecognized arguments: --bogus" in result.stderr
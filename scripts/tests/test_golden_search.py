@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import re
+import shutil
+from pathlib import Path
+
+import pytest
+
+import golden_search
+from golden_search import top_hits
+from repo_snapshot import RepoSnapshot
+from search_index import indexed_top_hits
+
+FILES = {
+    "a_split.txt": "alpha\nbeta\n",
+    "b_joined.txt": "alpha beta\n",
+    "c_anchor.txt": "  x\nstart here\n",
+    "d_escaped.txt": "CTO Rule Registry\n",
+}
+QUERIES = [
+    r"alpha\sbeta",  # \s must not match the newline in a_split.txt
+    r"alpha[^x]beta",
+    r"^start here$",
+    r"beta",
+    r"missing_everywhere",
+]
+EXPECTED = {
+    r"alpha\sbeta": "b_joined.txt",
+    r"alpha[^x]beta": "b_joined.txt",
+    r"^start here$": "c_anchor.txt",
+    r"beta": "a_split.txt",
+    r"missing_everywhere": None,
+}
+
+
+# Escapes whose argument must not be read as literal text by the index.
+ESCAPED = [
+    r"\x43TO Rule Registry",
+    r"\u0043TO Rule",
+    r"\N{LATIN CAPITAL LETTER C}TO Rule",
+    r"\103TO Rule",
+    r"\x44TO Rule",
+]
+
+
+@pytest.fixture
+def repo(git_repo: Path) -> Path:
+    for name, text in FILES.items():
+        (git_repo / name).write_text(text, encoding="utf-8")
+    return git_repo
+
+
+def test_python_scan_matches_line_by_line(repo: Path, monkeypatch) -> None:
+    monkeypatch.setattr(golden_search.shutil, "which", lambda _: None)
+    assert top_hits(RepoSnapshot(repo), QUERIES) == EXPECTED
+
+
+def test_index_agrees_with_python_scan(repo: Path, monkeypatch) -> None:
+    monkeypatch.setattr(golden_search.shutil, "which", lambda _: None)
+    assert indexed_top_hits(RepoSnapshot(repo), QUERIES) == EXPECTED
+
+    (repo / "b_joined.txt").write_text("nothing\n", encoding="utf-8")
+    changed = {**EXPECTED, r"alpha\sbeta": None, r"alpha[^x]beta": None}
+    assert indexed_top_hits(RepoSnapshot(repo), QUERIES) == changed
+    assert top_hits(RepoSnapshot(repo), QUERIES) == changed
+
+
+def test_index_agrees_with_python_scan_on_escapes(repo: Path, monkeypatch) -> None:
+    monkeypatch.setattr(golden_search.shutil, "which", lambda _: None)
+    expected = {query: "d_escaped.txt" for query in ESCAPED} | {r"\x44TO Rule": None}
+    assert top_hits(RepoSnapshot(repo), ESCAPED) == expected
+    assert indexed_top_hits(RepoSnapshot(repo), ESCAPED) == expected
+
+
+@pytest.mark.skipif(shutil.which("rg") is None, reason="ripgrep not installed")
+def test_rg_agrees_with_python_scan(repo: Path) -> None:
+    assert top_hits(RepoSnapshot(repo), QUERIES) == EXPECTED
+
+
+def test_line_match_never_spans_lines() -> None:
+    assert not golden_search.line_match(re.compile(r"a\sb"), "a\nb".splitlines())
+    assert golden_search.line_match(re.compile(r"^b$"), "a\nb".splitlines())
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+import yaml
+
+import validate_cto_rules_registry
+from repo_snapshot import RepoSnapshot
+
+
+def test_yaml_view_is_parsed_once(tmp_path: Path) -> None:
+    (tmp_path / "a.yaml").write_text("rules: [1, 2]\n", encoding="utf-8")
+    snapshot = RepoSnapshot(tmp_path)
+
+    first = snapshot.yaml("a.yaml")
+    assert first == {"rules": [1, 2]}
+    assert snapshot.yaml("a.yaml") is first
+    assert snapshot.stats["reads"] == 1
+
+
+def test_yaml_view_extracts_embedded_block(tmp_path: Path) -> None:
+    (tmp_path / "doc.md").write_text("# t\n```yaml\nx: 1\n```\n", encoding="utf-8")
+    snapshot = RepoSnapshot(tmp_path)
+
+    def block(text: str) -> str:
+        return text.split("```yaml\n", 1)[1].split("```", 1)[0]
+
+    assert snapshot.yaml("doc.md", block) == {"x": 1}
+    assert snapshot.text("doc.md").startswith("# t")
+    assert snapshot.stats["reads"] == 1
+
+
+def test_yaml_parse_errors_are_memoized(tmp_path: Path) -> None:
+    (tmp_path / "bad.yaml").write_text("a: [1\n", encoding="utf-8")
+    snapshot = RepoSnapshot(tmp_path)
+
+    for _ in range(2):
+        with pytest.raises(yaml.YAMLError):
+            snapshot.yaml("bad.yaml")
+    assert snapshot.stats["reads"] == 1
+
+
+def test_registry_validator_reads_through_snapshot(tmp_path: Path, capsys) -> None:
+    (tmp_path / "docs").mkdir()
+    rules = tmp_path / "docs" / "CTO_RULES.md"
+    rules.write_text("# CTO rules\n", encoding="utf-8")
+
+    assert validate_cto_rules_registry.main(snapshot=RepoSnapshot(tmp_path)) == 2
+    assert "Missing required heading" in capsys.readouterr().out
+
+    rules.write_text("## Registry (SSOT)\n```yaml\nrules: [\n```\n", encoding="utf-8")
+    assert validate_cto_rules_registry.main(snapshot=RepoSnapshot(tmp_path)) == 3
@@ -19,11 +19,11 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
-import yaml
+from repo_snapshot import RepoSnapshot
 
 
-@dataclass(frozen=True)
-class Failure:
+@dataclass(eq=False)
+class Failure(Exception):
     code: int
     msg: str
 
@@ -130,24 +130,19 @@ def validate_registry(doc: dict[str, Any]) -> None:
                 _require(has_cmd and has_exp, f"{rid}.verification[{j}] requires 'command' + 'expected' (or set manual:true + check)")
 
 
-def main() -> int:
-    repo_root = Path(__file__).resolve().parents[1]
-    rules_path = repo_root / "docs" / "CTO_RULES.md"
+def main(snapshot: RepoSnapshot | None = None) -> int:
+    snapshot = snapshot or RepoSnapshot(Path(__file__).resolve().parents[1])
+    rules_rel = "docs/CTO_RULES.md"
 
-    if not rules_path.exists():
-        print(f"ERROR: missing {rules_path}")
+    if not snapshot.exists(rules_rel):
+        print(f"ERROR: missing {snapshot.root / rules_rel}")
         return 2
 
-    md = rules_path.read_text(encoding="utf-8")
-
     try:
-        y = _extract_registry_yaml(md)
+        doc = snapshot.yaml(rules_rel, _extract_registry_yaml)
     except Failure as e:
         print(f"ERROR: {e.msg}")
         return e.code
-
-    try:
-        doc = yaml.safe_load(y)
     except Exception as e:  # noqa: BLE001
         print(f"ERROR: YAML parse error: {e}")
         return 3
@@ -0,0 +1,88 @@
+"""`verify --since <ref>`: select only the stories a change can affect.
+
+A story is selected when one of its `Touched paths allowlist` entries matches a
+path changed since the ref (committed, staged, unstaged or untracked), when
+the story file itself changed, or when it is marked `always-run`. Stories
+without an allowlist have an unknown footprint and are always selected.
+
+Allowlist entries are exact paths, directories (trailing `/`, or any entry
+that is a prefix up to a `/`) or globs (`*`, `?`, `[...]`; `**` crosses
+directories). A glob that matches a directory covers everything below it.
+"""
+
+from __future__ import annotations
+
+import re
+import subprocess
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from story_parser import StoryDocument
+
+GLOB_CHARS = set("*?[")
+GLOB_TOKEN_RE = re.compile(r"(\*\*/?|\*|\?|\[[^\]]*\])")
+GLOB_TOKENS = {"**/": "(?:.*/)?", "**": ".*", "*": "[^/]*", "?": "[^/]"}
+
+
+@dataclass(frozen=True)
+class StorySelection:
+    story_id: str
+    selected: bool
+    reason: str
+
+
+def changed_paths(repo_root: Path, since: str) -> tuple[str, ...]:
+    """Repo-relative paths that differ between ``since`` and the working tree."""
+    listings = []
+    for args in (
+        ["diff", "--name-only", "--no-renames", "-z", since, "--"],
+        ["ls-files", "-z", "--others", "--exclude-standard"],
+    ):
+        proc = subprocess.run(["git", *args], cwd=repo_root, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"git {args[0]} failed for --since {since}: {proc.stderr.strip()}")
+        listings.append(proc.stdout)
+    return tuple(sorted({p for listing in listings for p in listing.split("\0") if p}))
+
+
+def _matcher(entry: str) -> Callable[[str], bool]:
+    entry = entry.strip().removeprefix("./")
+    if GLOB_CHARS & set(entry):
+        pattern = "".join(
+            GLOB_TOKENS.get(part, part if part.startswith("[") else re.escape(part))
+            for part in GLOB_TOKEN_RE.split(entry)
+        )
+        compiled = re.compile(pattern + r"(?:/.*)?\Z")
+        return lambda path: compiled.match(path) is not None
+    prefix = entry.rstrip("/")
+    return lambda path: path == prefix or path.startswith(prefix + "/")
+
+
+def select_stories(
+    documents: list[StoryDocument], changed: tuple[str, ...], repo_root: Path
+) -> list[StorySelection]:
+    """Decide per story (in process order) whether it runs, with a short reason."""
+    changed_set = set(changed)
+    selections: list[StorySelection] = []
+    for doc in documents:
+        try:
+            story_file = doc.path.resolve().relative_to(repo_root.resolve()).as_posix()
+        except ValueError:
+            story_file = str(doc.path)
+        if doc.options.always_run:
+            reason = "always-run"
+        elif story_file in changed_set:
+            reason = "story file changed"
+        elif not doc.touched_paths:
+            reason = "no touched paths allowlist"
+        else:
+            matchers = [_matcher(entry) for entry in doc.touched_paths]
+            hits = [path for path in changed if any(match(path) for match in matchers)]
+            if not hits:
+                selections.append(StorySelection(doc.story_id, False, "no touched path changed"))
+                continue
+            more = f" (+{len(hits) - 1} more)" if len(hits) > 1 else ""
+            reason = f"changed: {hits[0]}{more}"
+        selections.append(StorySelection(doc.story_id, True, reason))
+    return selections
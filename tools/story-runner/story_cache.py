@@ -0,0 +1,149 @@
+"""Content-addressed cache for passing story runner verifications.
+
+A cache key covers the command, the cwd (repo-relative, so worktrees share
+entries), the Expected value, the content of every declared input path and the
+values of an explicit environment allowlist. The key does not name the story or
+AC, so two ACs with the same command share an entry: only the verdict fields
+are stored and the caller rebuilds the record from its own AC. Only passing
+results are stored; ACs without declared inputs are never cached. Entries are single JSON files;
+eviction is LRU by mtime, bounded by total size and age.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import subprocess
+import time
+from pathlib import Path
+
+CACHE_FORMAT = 2
+VERDICT_FIELDS = ("exit_code", "output_snippet", "output_chars", "exec_mode")
+GLOB_CHARS = set("*?[")
+
+
+def default_cache_dir() -> Path:
+    raw = os.environ.get("STORY_RUNNER_CACHE_DIR", "").strip()
+    if raw:
+        return Path(raw)
+    base = os.environ.get("XDG_CACHE_HOME", "").strip()
+    return (Path(base) if base else Path.home() / ".cache") / "story-runner"
+
+
+def _pathspec(raw: str) -> str:
+    return f":(glob){raw}" if GLOB_CHARS & set(raw) else raw
+
+
+def _git(repo_root: Path, args: list[str], stdin: str | None = None) -> str:
+    proc = subprocess.run(
+        ["git", *args], cwd=repo_root, input=stdin, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"git {args[0]} failed: {proc.stderr.strip()}")
+    return proc.stdout
+
+
+class VerificationCache:
+    def __init__(
+        self,
+        cache_dir: Path,
+        repo_root: Path,
+        env_allowlist: tuple[str, ...] = (),
+        max_bytes: int = 64 * 1024 * 1024,
+        max_age_seconds: float | None = None,
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.repo_root = repo_root
+        self.env_allowlist = tuple(sorted(set(env_allowlist)))
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.stats = {"hits": 0, "misses": 0, "stored": 0, "evicted": 0}
+        self._input_digests: dict[tuple[str, ...], str] = {}
+
+    def _inputs_digest(self, inputs: tuple[str, ...]) -> str:
+        """Hash the working-tree content of all tracked/untracked files under inputs."""
+        cached = self._input_digests.get(inputs)
+        if cached is not None:
+            return cached
+        listing = _git(
+            self.repo_root,
+            ["ls-files", "-z", "--cached", "--others", "--exclude-standard", "--",
+             *(_pathspec(p) for p in inputs)],
+        )
+        paths = sorted({p for p in listing.split("\0") if p and (self.repo_root / p).is_file()})
+        shas = (
+            _git(self.repo_root, ["hash-object", "--stdin-paths"], "\n".join(paths) + "\n").split()
+            if paths
+            else []
+        )
+        digest = hashlib.sha256()
+        for spec in inputs:
+            digest.update(f"spec\0{spec}\n".encode())
+        for path, sha in zip(paths, shas):
+            digest.update(f"{path}\0{sha}\n".encode())
+        self._input_digests[inputs] = digest.hexdigest()
+        return self._input_digests[inputs]
+
+    def key(self, command: str, cwd: Path, expected: str, inputs: tuple[str, ...]) -> str:
+        try:
+            cwd_key = cwd.resolve().relative_to(self.repo_root.resolve()).as_posix()
+        except ValueError:
+            cwd_key = str(cwd.resolve())
+        payload = {
+            "format": CACHE_FORMAT,
+            "command": command,
+            "cwd": cwd_key,
+            "expected": expected,
+            "inputs": self._inputs_digest(inputs),
+            "env": {name: os.environ.get(name) for name in self.env_allowlist},
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> dict | None:
+        entry = self._entry(key)
+        try:
+            data = json.loads(entry.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.stats["misses"] += 1
+            return None
+        os.utime(entry)
+        self.stats["hits"] += 1
+        return data
+
+    def put(self, key: str, record: dict) -> None:
+        entry = self._entry(key)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        tmp = entry.with_suffix(f".{os.getpid()}.tmp")
+        verdict = {name: record.get(name) for name in VERDICT_FIELDS}
+        tmp.write_text(json.dumps(verdict), encoding="utf-8")
+        os.replace(tmp, entry)
+        self.stats["stored"] += 1
+
+    def evict(self) -> None:
+        """Drop expired entries, then least-recently-used ones above max_bytes."""
+        if not self.cache_dir.is_dir():
+            return
+        entries = []
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        entries.sort(reverse=True)
+        now = time.time()
+        total = 0
+        for mtime, size, path in entries:
+            expired = self.max_age_seconds is not None and now - mtime > self.max_age_seconds
+            if expired or total + size > self.max_bytes:
+                path.unlink(missing_ok=True)
+                self.stats["evicted"] += 1
+            else:
+                total += size
+
+    def summary(self) -> dict:
+        return {"dir": str(self.cache_dir), **self.stats}
@@ -0,0 +1,184 @@
+"""Command line of the story runner: subcommands, shared run options and their setup.
+
+`build_parser` defines `show`, `verify` and `verify-all`; `open_cache` and
+`open_journal` turn the parsed options into the cache and checkpoint journal
+that `story_runner.main` passes to the run.
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+from story_cache import VerificationCache, default_cache_dir
+from story_journal import CheckpointJournal, current_commit, journal_path_for
+from story_profile import DEFAULT_PROFILE_TOP
+
+
+def positive_int(raw: str) -> int:
+    value = int(raw)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be >= 1 (got {raw})")
+    return value
+
+
+def positive_float(raw: str) -> float:
+    value = float(raw)
+    if value <= 0:
+        raise argparse.ArgumentTypeError(f"must be > 0 (got {raw})")
+    return value
+
+
+def add_run_options(p_run: argparse.ArgumentParser) -> None:
+    """Options shared by `verify` and `verify-all`."""
+    p_run.add_argument("--no-fail-fast", action="store_true")
+    p_run.add_argument("--json-output", type=Path, default=None)
+    p_run.add_argument(
+        "--allow-shell",
+        action="store_true",
+        help="Explicit opt-in: execute commands parsed from story files",
+    )
+    p_run.add_argument(
+        "--jobs",
+        type=positive_int,
+        default=1,
+        help="Run up to N ACs concurrently (honours serial/lock options; default 1)",
+    )
+    p_run.add_argument(
+        "--cache",
+        action="store_true",
+        help="Serve passing ACs with explicit inputs= from the verification cache (opt-in)",
+    )
+    p_run.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the verification cache (overrides --cache)",
+    )
+    p_run.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=None,
+        help="Cache location (default: $STORY_RUNNER_CACHE_DIR or ~/.cache/story-runner)",
+    )
+    p_run.add_argument(
+        "--cache-max-mb",
+        type=positive_int,
+        default=64,
+        help="Evict least-recently-used cache entries above this size (default 64)",
+    )
+    p_run.add_argument(
+        "--cache-max-age-days",
+        type=positive_int,
+        default=30,
+        help="Evict cache entries not used for this many days (default 30)",
+    )
+    p_run.add_argument(
+        "--cache-env",
+        action="append",
+        default=[],
+        metavar="NAME",
+        help="Environment variable whose value is part of the cache key (repeatable)",
+    )
+    p_run.add_argument(
+        "--log-dir",
+        type=Path,
+        default=None,
+        help="Tee the full output of every executed AC to <dir>/<story>_<ac>.log",
+    )
+    p_run.add_argument(
+        "--timeout",
+        type=positive_float,
+        default=None,
+        metavar="SECONDS",
+        help="Default per-AC timeout; timeout=<s> on a Verification line overrides it",
+    )
+    p_run.add_argument(
+        "--profile",
+        type=positive_int,
+        nargs="?",
+        const=DEFAULT_PROFILE_TOP,
+        default=None,
+        metavar="N",
+        help=f"Print the N slowest ACs and stories (default N={DEFAULT_PROFILE_TOP})",
+    )
+
+    p_run.add_argument(
+        "--since",
+        default=None,
+        metavar="GIT_REF",
+        help="Only run stories whose Touched paths allowlist changed since GIT_REF "
+        "(plus always-run stories)",
+    )
+    p_run.add_argument(
+        "--journal",
+        type=Path,
+        default=None,
+        help="Write a checkpoint journal (JSONL) of finished ACs, one fsynced line per AC "
+        "(off unless --journal or --resume is given)",
+    )
+    p_run.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip ACs that already passed on the same commit according to the journal "
+        "(default journal: <json-output stem>.journal.jsonl next to --json-output)",
+    )
+    p_run.add_argument(
+        "--no-exec",
+        action="store_true",
+        help="Always run commands through the shell (disable exec mode)",
+    )
+    p_run.add_argument(
+        "--shell-pool",
+        action="store_true",
+        help="Run commands that need a shell in reused warm shell/PowerShell sessions",
+    )
+
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="story_runner")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_show = sub.add_parser("show", help="Show canonical story order and paths")
+    p_show.add_argument("--process", required=True, type=Path)
+
+    p_verify = sub.add_parser("verify", help="Run all AC verification commands")
+    p_verify.add_argument("--process", required=True, type=Path)
+    add_run_options(p_verify)
+
+    p_all = sub.add_parser(
+        "verify-all", help="Run the ACs of every process on one shared worker pool"
+    )
+    p_all.add_argument(
+        "--processes-dir",
+        type=Path,
+        default=None,
+        help="Directory with <process>/PROCESS.md files (default: docs/processes)",
+    )
+    add_run_options(p_all)
+    return parser
+
+
+def open_cache(args: argparse.Namespace, repo: Path) -> VerificationCache | None:
+    if not args.cache or args.no_cache:
+        return None
+    return VerificationCache(
+        cache_dir=args.cache_dir or default_cache_dir(),
+        repo_root=repo,
+        env_allowlist=tuple(args.cache_env),
+        max_bytes=args.cache_max_mb * 1024 * 1024,
+        max_age_seconds=args.cache_max_age_days * 86400,
+    )
+
+
+def open_journal(
+    args: argparse.Namespace, parser: argparse.ArgumentParser, repo: Path
+) -> CheckpointJournal | None:
+    journal_path = args.journal
+    if journal_path is None and args.resume and args.json_output:
+        journal_path = journal_path_for(args.json_output)
+    if args.resume and journal_path is None:
+        parser.error("--resume needs --journal or --json-output")
+    if journal_path is None:
+        return None
+    return CheckpointJournal(journal_path, current_commit(repo), resume=args.resume)
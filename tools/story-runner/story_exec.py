@@ -0,0 +1,299 @@
+"""Command execution for story runner verifications.
+
+Output is streamed instead of buffered: only a bounded head/tail window is kept
+for the report snippet, and the Expected substring is matched incrementally, so
+memory stays constant no matter how much a verification prints. The full
+output can optionally be teed to a log file.
+
+Every command runs in its own process group (session on POSIX), so a timeout
+kills the whole tree, including servers or watchers the command spawned.
+
+On POSIX the child is reaped with ``os.wait4`` so CPU time and peak RSS are
+attributed per command, which stays correct when ACs run concurrently (the
+process-wide ``RUSAGE_CHILDREN`` counters would mix them).
+
+Commands without shell metacharacters whose program is on PATH (or, for a
+path like ``./run.sh``, exists relative to the AC's cwd) run in exec mode,
+split with ``shlex`` and started directly without the shell/PowerShell startup.
+If the OS refuses to exec the program (e.g. ``ENOEXEC`` for a script without a
+shebang) the command falls back to the shell.
+"""
+
+from __future__ import annotations
+
+import codecs
+import os
+import shlex
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import BinaryIO
+
+OUTPUT_SNIPPET_LIMIT = 2000
+READ_CHUNK_BYTES = 64 * 1024
+KILL_GRACE_SECONDS = 2.0
+SHELL_METACHARS = frozenset("|&;<>()$`\\*?[]{}~!#\n\r")
+SHELL_BUILTINS = frozenset(
+    {".", ":", "alias", "cd", "eval", "exec", "exit", "export", "read", "return",
+     "set", "shift", "source", "trap", "ulimit", "umask", "unset", "wait"}
+)
+WINDOWS_EXEC_SUFFIXES = (".exe", ".com")
+SHELL_STARTUP_SAMPLES = 3
+
+
+@dataclass(frozen=True)
+class CommandResult:
+    exit_code: int
+    output_snippet: str
+    matched: bool
+    output_chars: int
+    timed_out: bool = False
+    elapsed_s: float = 0.0
+    cpu_user_s: float | None = None
+    cpu_system_s: float | None = None
+    max_rss_kb: int | None = None
+    mode: str = "shell"
+
+
+class OutputCapture:
+    """Constant-memory sink: head/tail window plus incremental substring match."""
+
+    def __init__(self, needle: str | None, limit: int = OUTPUT_SNIPPET_LIMIT) -> None:
+        self.needle = needle or ""
+        self.matched = not self.needle
+        self.limit = limit
+        self.total = 0
+        self._head: list[str] = []
+        self._head_len = 0
+        self._tail: deque[str] = deque()
+        self._tail_len = 0
+        self._carry = ""
+
+    def feed(self, text: str) -> None:
+        if not text:
+            return
+        self.total += len(text)
+        if not self.matched:
+            window = self._carry + text
+            self.matched = self.needle in window
+            self._carry = window[-(len(self.needle) - 1):] if len(self.needle) > 1 else ""
+        if self._head_len < self.limit:
+            take = text[: self.limit - self._head_len]
+            self._head.append(take)
+            self._head_len += len(take)
+            text = text[len(take):]
+        if text:
+            self._tail.append(text)
+            self._tail_len += len(text)
+            while self._tail and self._tail_len - len(self._tail[0]) >= self.limit:
+                self._tail_len -= len(self._tail.popleft())
+
+    def snippet(self) -> str:
+        head = "".join(self._head)
+        if self.total <= self.limit:
+            return head.strip()
+        tail = "".join(self._tail)[-self.limit:]
+        skipped = self.total - len(head) - len(tail)
+        if skipped <= 0:
+            return (head + tail).strip()
+        return f"{head.rstrip()}\n...<truncated {skipped} chars>...\n{tail.lstrip()}"
+
+
+def _rss_kb(ru_maxrss: int) -> int:
+    # ru_maxrss is kilobytes on Linux but bytes on macOS.
+    return ru_maxrss // 1024 if sys.platform == "darwin" else ru_maxrss
+
+
+def _powershell_command(cmd: str) -> list[str]:
+    return ["powershell", "-NoProfile", "-NonInteractive", "-Command", cmd]
+
+
+def process_group_kwargs() -> dict:
+    if os.name == "nt":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def _resolve_program(name: str, cwd: Path) -> str | None:
+    """PATH lookup for bare names; names with a path part resolve against ``cwd``."""
+    if os.sep in name or (os.altsep and os.altsep in name):
+        return shutil.which(str(cwd / name))
+    return shutil.which(name)
+
+
+@lru_cache(maxsize=None)
+def exec_argv(command: str, cwd: Path) -> tuple[str, ...] | None:
+    """argv to run ``command`` in ``cwd`` without a shell, or None when it needs one.
+
+    Conservative: any metacharacter, an env assignment, a builtin or a program
+    that cannot be resolved (on Windows: not an .exe/.com) keeps the shell.
+    """
+    if SHELL_METACHARS & set(command):
+        return None
+    try:
+        argv = shlex.split(command)
+    except ValueError:
+        return None
+    if not argv or "=" in argv[0] or argv[0] in SHELL_BUILTINS:
+        return None
+    program = _resolve_program(argv[0], cwd)
+    if program is None or (os.name == "nt" and not program.lower().endswith(WINDOWS_EXEC_SUFFIXES)):
+        return None
+    return (program, *argv[1:])
+
+
+@lru_cache(maxsize=None)
+def shell_startup_seconds() -> float:
+    """Best-of-N wall time of an empty shell (PowerShell on Windows) invocation."""
+    argv = _powershell_command("exit 0") if os.name == "nt" else ["/bin/sh", "-c", ":"]
+    samples = []
+    for _ in range(SHELL_STARTUP_SAMPLES):
+        started = time.perf_counter()
+        subprocess.run(argv, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append(time.perf_counter() - started)
+    return min(samples)
+
+
+def stream_output(
+    stream: BinaryIO, capture: OutputCapture, log: BinaryIO | None, stop: bytes | None = None
+) -> bytes:
+    """Pump ``stream`` into ``capture`` (and ``log``) until EOF or a ``stop`` line.
+
+    Returns the ``stop`` line (without newline) when it was seen, else ``b""``.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = b""
+    while chunk := stream.read1(READ_CHUNK_BYTES):
+        if stop is not None:
+            pending += chunk
+            at = pending.find(stop)
+            if at >= 0 and b"\n" in pending[at:]:
+                body = pending[:at].removesuffix(b"\n")
+                if log is not None:
+                    log.write(body)
+                capture.feed(decoder.decode(body, final=True))
+                return pending[at:].split(b"\n", 1)[0]
+            cut = at if at >= 0 else max(0, len(pending) - len(stop) - 1)
+            chunk, pending = pending[:cut], pending[cut:]
+        if log is not None:
+            log.write(chunk)
+        capture.feed(decoder.decode(chunk))
+    if pending:
+        if log is not None:
+            log.write(pending)
+        capture.feed(decoder.decode(pending))
+    capture.feed(decoder.decode(b"", final=True))
+    return b""
+
+
+def kill_process_tree(
+    proc: subprocess.Popen, timed_out: threading.Event, finished: threading.Event
+) -> None:
+    """Terminate the command's process group; escalate to SIGKILL after a grace period."""
+    timed_out.set()
+    if os.name == "nt":
+        subprocess.run(
+            ["taskkill", "/F", "/T", "/PID", str(proc.pid)],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        return
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        try:
+            os.killpg(proc.pid, sig)
+        except ProcessLookupError:
+            return
+        if sig == signal.SIGTERM:
+            finished.wait(KILL_GRACE_SECONDS)
+
+
+def _wait_with_usage(proc: subprocess.Popen) -> tuple[int, object | None]:
+    """Reap the child, returning its exit code and its own rusage when available."""
+    if not hasattr(os, "wait4"):
+        return proc.wait(), None
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return proc.returncode, usage
+
+
+def _spawn(argv: list[str] | str, cwd: Path) -> subprocess.Popen:
+    """Start an argv directly, or a command string through the shell (PowerShell on Windows)."""
+    shell = isinstance(argv, str) and os.name != "nt"
+    if isinstance(argv, str) and os.name == "nt":
+        argv = _powershell_command(argv)
+    return subprocess.Popen(
+        argv,
+        cwd=cwd,
+        shell=shell,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        **process_group_kwargs(),
+    )
+
+
+def run_command(
+    command: str,
+    cwd: Path,
+    expected_text: str | None = None,
+    log_path: Path | None = None,
+    timeout: float | None = None,
+    allow_exec: bool = True,
+) -> CommandResult:
+    """Run a verification, streaming stdout+stderr through an OutputCapture.
+
+    With ``timeout`` (seconds) the whole process group is killed on expiry and
+    the result is flagged ``timed_out``. ``allow_exec=False`` always uses the
+    shell; exec mode also falls back to it when the program cannot be exec'd.
+    """
+    direct = exec_argv(command, cwd) if allow_exec else None
+    mode = "exec" if direct else "shell"
+    capture = OutputCapture(expected_text)
+    timed_out = threading.Event()
+    finished = threading.Event()
+    usage = None
+    timer: threading.Timer | None = None
+    log = None
+    if log_path is not None:
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        log = log_path.open("wb")
+    started = time.monotonic()
+    try:
+        try:
+            proc = _spawn(list(direct) if direct else command, cwd)
+        except OSError:  # not exec-able (e.g. ENOEXEC, no shebang): let the shell run it
+            if not direct:
+                raise
+            mode, proc = "shell", _spawn(command, cwd)
+        if timeout is not None:
+            timer = threading.Timer(timeout, kill_process_tree, args=(proc, timed_out, finished))
+            timer.daemon = True
+            timer.start()
+        assert proc.stdout is not None
+        with proc.stdout:
+            stream_output(proc.stdout, capture, log)
+        code, usage = _wait_with_usage(proc)
+    finally:
+        finished.set()
+        if timer is not None:
+            timer.cancel()
+        if log is not None:
+            log.close()
+    return CommandResult(
+        exit_code=int(code),
+        output_snippet=capture.snippet(),
+        matched=capture.matched,
+        output_chars=capture.total,
+        timed_out=timed_out.is_set(),
+        elapsed_s=round(time.monotonic() - started, 3),
+        cpu_user_s=round(usage.ru_utime, 3) if usage is not None else None,
+        cpu_system_s=round(usage.ru_stime, 3) if usage is not None else None,
+        max_rss_kb=_rss_kb(usage.ru_maxrss) if usage is not None else None,
+        mode=mode,
+    )
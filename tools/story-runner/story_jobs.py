@@ -0,0 +1,179 @@
+"""Collect a process's ACs and run them as jobs on the shared worker pool.
+
+`run_jobs` takes resumed ACs from the checkpoint journal and passing ACs from
+the verification cache before anything runs; the rest run on the lock-aware
+pool (`story_scheduler.run_ordered`), through exec mode, the shell pool or a
+plain shell. Outcomes come back in job order.
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from dataclasses import dataclass, replace
+from pathlib import Path
+
+from story_affected import select_stories
+from story_cache import VerificationCache
+from story_exec import exec_argv, run_command
+from story_journal import CheckpointJournal
+from story_parser import AcceptanceCriterion, StoryDocument, load_process, load_story
+from story_report import SKIPPED_USAGE, cached_record, evaluate, parse_expected
+from story_scheduler import run_ordered
+from story_shellpool import ShellPool
+
+
+@dataclass(frozen=True)
+class Job:
+    """One AC on the shared worker pool; `process` is empty for single-process runs."""
+
+    process: str
+    ac: AcceptanceCriterion
+
+    @property
+    def serial(self) -> bool:
+        return self.ac.serial
+
+    @property
+    def locks(self) -> tuple[str, ...]:
+        return self.ac.locks
+
+    @property
+    def label(self) -> str:
+        prefix = f"{self.process}:" if self.process else ""
+        return f"{prefix}{self.ac.story_id} {self.ac.ac_id}"
+
+
+def load_acs(
+    repo: Path, process_path: Path, timeout: float | None
+) -> tuple[list[StoryDocument], list[AcceptanceCriterion]]:
+    documents = [
+        load_story(repo / "stories" / process_path.parent.name / f"{story_id}.md", story_id, repo)
+        for story_id in load_process(process_path)
+    ]
+    acs = [ac for doc in documents for ac in doc.acs]
+    if timeout is not None:
+        acs = [ac if ac.timeout else replace(ac, timeout=timeout) for ac in acs]
+    return documents, acs
+
+
+def select_since(
+    repo: Path,
+    documents: list[StoryDocument],
+    acs: list[AcceptanceCriterion],
+    since: str,
+    changed: tuple[str, ...],
+    process: str = "",
+) -> tuple[list[AcceptanceCriterion], dict]:
+    selections = select_stories(documents, changed, repo)
+    selected = {sel.story_id for sel in selections if sel.selected}
+    prefix = f"{process}:" if process else ""
+    print(
+        f"SINCE {since}{f' [{process}]' if process else ''}: "
+        f"{len(selected)}/{len(selections)} stories affected ({len(changed)} changed paths)"
+    )
+    for sel in selections:
+        print(f"{'AFFECTED' if sel.selected else 'SKIP'} {prefix}{sel.story_id}: {sel.reason}")
+    summary = {
+        "ref": since,
+        "changed_paths": len(changed),
+        "stories": [
+            {"story_id": sel.story_id, "selected": sel.selected, "reason": sel.reason}
+            for sel in selections
+        ],
+    }
+    return [ac for ac in acs if ac.story_id in selected or ac.always_run], summary
+
+
+def run_jobs(
+    items: list[Job],
+    *,
+    jobs: int,
+    fail_fast: bool,
+    cache: VerificationCache | None,
+    log_dir: Path | None,
+    journal: CheckpointJournal | None = None,
+    allow_exec: bool = True,
+    shell_pool: ShellPool | None = None,
+) -> tuple[list[tuple[Job, dict, str | None]], float, dict | None]:
+    """Run all jobs on one pool (cache- and journal-aware); outcomes come back in job order."""
+    resumed: dict[Job, dict] = {}
+    if journal is not None and journal.resume:
+        for job in items:
+            record = journal.resumable(job.process, job.ac)
+            if record is not None:
+                resumed[job] = {**record, "resumed": True, **SKIPPED_USAGE}
+
+    cache_keys: dict[AcceptanceCriterion, str] = {}
+    cache_hits: dict[AcceptanceCriterion, dict] = {}
+    if cache is not None:
+        for ac in dict.fromkeys(job.ac for job in items if job not in resumed):
+            if not (ac.cache and ac.inputs):
+                continue
+            cache_keys[ac] = cache.key(ac.command, ac.cwd, ac.expected, ac.inputs)
+            hit = cache.get(cache_keys[ac])
+            if hit is not None:
+                cache_hits[ac] = cached_record(ac, hit)
+
+    def run_one(job: Job) -> tuple[Job, dict, str | None]:
+        ac = job.ac
+        if job in resumed:
+            return job, dict(resumed[job]), None
+        if ac in cache_hits:
+            record, failure = dict(cache_hits[ac]), None
+        else:
+            expected_type, _, expected_text = parse_expected(ac.expected)
+            needle = expected_text if expected_type == "output" else None
+            log_path = log_dir / job.process / f"{ac.story_id}_{ac.ac_id}.log" if log_dir else None
+            direct = allow_exec and not ac.shell
+            if shell_pool is not None and not (direct and exec_argv(ac.command, ac.cwd)):
+                result = shell_pool.run_command(ac.command, ac.cwd, needle, log_path, ac.timeout)
+            else:
+                result = run_command(
+                    ac.command,
+                    cwd=ac.cwd,
+                    expected_text=needle,
+                    log_path=log_path,
+                    timeout=ac.timeout,
+                    allow_exec=direct,
+                )
+            record, failure = evaluate(ac, result)
+        if journal is not None:
+            journal.append(job.process, record)
+        return job, record, failure
+
+    def start(job: Job) -> None:
+        if job not in resumed and job.ac not in cache_hits:
+            print(f"RUN {job.label}: {job.ac.command}")
+
+    def report(outcome: tuple[Job, dict, str | None]) -> None:
+        job, record, failure = outcome
+        if failure is None:
+            note = " (resumed)" if record["resumed"] else " (cached)" if record["cached"] else ""
+            print(f"OK  {job.label}{note}")
+            return
+        print(f"FAIL {job.label}: {record['error']}", file=sys.stderr)
+        print(f"OUTPUT:\n{record['output_snippet']}", file=sys.stderr)
+
+    run_started = time.perf_counter()
+    outcomes = run_ordered(
+        items,
+        run_one,
+        jobs=jobs,
+        fail_fast=fail_fast,
+        failed=lambda outcome: outcome[2] is not None,
+        on_start=start,
+        on_result=report,
+    )
+    run_s = time.perf_counter() - run_started
+
+    cache_summary = None
+    if cache is not None:
+        for job, record, failure in outcomes:
+            if failure is None and job.ac in cache_keys and not (
+                record["cached"] or record["resumed"]
+            ):
+                cache.put(cache_keys[job.ac], record)
+        cache.evict()
+        cache_summary = cache.summary()
+    return outcomes, run_s, cache_summary
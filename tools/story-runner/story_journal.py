@@ -0,0 +1,113 @@
+"""Append-only checkpoint journal for resumable story runner runs.
+
+Every finished AC is appended as one JSON line (flushed and fsynced) the moment
+it completes, tagged with the commit it ran against. With `--resume` the
+journal is read back and ACs that passed on the same commit, with the same
+command, cwd and Expected, are skipped; everything else runs again. A torn
+last line from an interrupted run is ignored and cut off before the resumed
+run appends. Uncommitted changes are not part of the check.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import threading
+from pathlib import Path
+from typing import TextIO
+
+from story_parser import AcceptanceCriterion
+
+JOURNAL_FORMAT = 1
+
+
+def journal_path_for(json_output: Path) -> Path:
+    return json_output.with_name(f"{json_output.stem}.journal.jsonl")
+
+
+def _drop_torn_tail(path: Path) -> None:
+    """Cut a partial last line so the next record starts on a line of its own."""
+    try:
+        with path.open("rb+") as fh:
+            data = fh.read()
+            if data and not data.endswith(b"\n"):
+                fh.truncate(data.rfind(b"\n") + 1)
+    except FileNotFoundError:
+        pass
+
+
+def current_commit(repo_root: Path) -> str | None:
+    proc = subprocess.run(
+        ["git", "rev-parse", "--verify", "HEAD"], cwd=repo_root, capture_output=True, text=True
+    )
+    return proc.stdout.strip() if proc.returncode == 0 else None
+
+
+class CheckpointJournal:
+    def __init__(self, path: Path, commit: str | None, resume: bool = False) -> None:
+        self.path = path
+        self.commit = commit
+        self.resume = resume
+        self.resumed = 0
+        self._passed = self._load() if resume and commit else {}
+        self._fh: TextIO | None = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict[tuple[str, str, str], dict]:
+        """Latest outcome per (process, story, AC) on this commit; only passes are kept."""
+        try:
+            lines = self.path.read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            return {}
+        passed: dict[tuple[str, str, str], dict] = {}
+        for line in lines:
+            try:
+                entry = json.loads(line)
+                record = entry["record"]
+                key = (entry["process"], record["story_id"], record["ac_id"])
+            except (ValueError, KeyError, TypeError):
+                continue
+            if entry.get("format") != JOURNAL_FORMAT or entry.get("commit") != self.commit:
+                continue
+            if record.get("ok"):
+                passed[key] = record
+            else:
+                passed.pop(key, None)
+        return passed
+
+    def resumable(self, process: str, ac: AcceptanceCriterion) -> dict | None:
+        record = self._passed.get((process, ac.story_id, ac.ac_id))
+        if record is None:
+            return None
+        if (record.get("command"), record.get("expected"), record.get("cwd")) != (
+            ac.command,
+            ac.expected,
+            str(ac.cwd),
+        ):
+            return None
+        self.resumed += 1
+        return record
+
+    def append(self, process: str, record: dict) -> None:
+        """Record one finished AC; safe to call from worker threads."""
+        line = json.dumps(
+            {"format": JOURNAL_FORMAT, "commit": self.commit, "process": process, "record": record}
+        )
+        with self._lock:
+            if self._fh is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                if self.resume:
+                    _drop_torn_tail(self.path)
+                self._fh = self.path.open("a" if self.resume else "w", encoding="utf-8")
+            self._fh.write(line + "\n")
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def summary(self) -> dict:
+        return {"path": str(self.path), "commit": self.commit, "resumed": self.resumed}
@@ -0,0 +1,78 @@
+"""Execution options of story files: `- Execution: ...` and `Verification (...)`.
+
+Options are a comma-separated list, story-wide on an `- Execution:` line before
+the first AC or per AC in the parentheses of its Verification line; the parser
+merges the two into each `AcceptanceCriterion`.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+
+
+@dataclass(frozen=True)
+class ExecutionOptions:
+    cwd: Path | None = None
+    serial: bool = False
+    locks: tuple[str, ...] = ()
+    inputs: tuple[str, ...] = ()
+    cache: bool = True
+    timeout: float | None = None
+    always_run: bool = False
+    shell: bool = False
+
+
+NO_OPTIONS = ExecutionOptions()
+
+
+def parse_execution_options(
+    raw: str, repo_root: Path, story_id: str, where: str
+) -> ExecutionOptions:
+    """Parse `repo-root`, `cwd=<path>`, `serial`, `lock=<name>`, `inputs=<path>`,
+    `no-cache`, `timeout=<seconds>`, `always-run` and `shell` options.
+
+    `lock=cwd` locks on the resolved cwd, `lock=story` on the story id, so ACs
+    sharing that resource never overlap under `--jobs`.
+    """
+    cwd: Path | None = None
+    serial = always_run = shell = False
+    cache = True
+    timeout: float | None = None
+    lock_names: list[str] = []
+    inputs: list[str] = []
+    for token in (part.strip() for part in raw.split(",")):
+        key, _, value = token.partition("=")
+        key = key.strip().lower()
+        value = value.strip()
+        if key == "repo-root" and not value:
+            cwd = repo_root
+        elif key == "cwd" and value:
+            cwd = Path(value) if Path(value).is_absolute() else (repo_root / value)
+        elif key == "serial" and not value:
+            serial = True
+        elif key == "lock" and value:
+            lock_names.append(value)
+        elif key == "inputs" and value:
+            inputs.append(value)
+        elif key == "no-cache" and not value:
+            cache = False
+        elif key == "always-run" and not value:
+            always_run = True
+        elif key == "shell" and not value:
+            shell = True
+        elif key == "timeout" and value:
+            try:
+                timeout = float(value.removesuffix("s"))
+            except ValueError:
+                raise ValueError(f"Invalid timeout {value!r} ({where})") from None
+            if timeout <= 0:
+                raise ValueError(f"Timeout must be > 0 (got {value!r}) ({where})")
+        else:
+            raise ValueError(f"Unknown execution option {token!r} ({where})")
+    locks = tuple(
+        f"cwd:{(cwd or repo_root).resolve()}" if name == "cwd"
+        else f"story:{story_id}" if name == "story" else f"lock:{name}"
+        for name in lock_names
+    )
+    return ExecutionOptions(cwd, serial, locks, tuple(inputs), cache, timeout, always_run, shell)
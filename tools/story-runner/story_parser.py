@@ -0,0 +1,238 @@
+"""Single-pass parser and shared model for BMAD process and story files.
+
+One compiled token regex (literal newline prefix, so `re` scans in C) yields
+only bullets that start with a known keyword (AC, Verification, Expected,
+Execution); prose, headings and other bullets never reach Python code. The
+keyword then dispatches to exactly one line regex, where the old parser tried
+up to five per line. Parsed documents are cached in memory keyed on path, mtime
+and size, so a story shared by several processes (or read by `show` and
+`verify`) is read and parsed once.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, TypeVar
+
+from story_options import NO_OPTIONS, ExecutionOptions, parse_execution_options
+
+PROCESS_STORY_RE = re.compile(r"^\s*\d+[.)]\s+([A-Z][A-Z0-9_]*[\.-]\d{3})\b")
+AC_RE = re.compile(r"^\s*-\s+\*\*(AC\d+):?\*\*:?")
+VERIFICATION_RE = re.compile(
+    r"^\s*-\s+(?:\*\*)?Verification\s*(?:\(([^)]+)\))?(?:\*\*)?:(?:\*\*)?\s+(.+?)\s*$",
+    re.IGNORECASE,
+)
+EXPECTED_RE = re.compile(
+    r"^\s*-\s+(?:\*\*)?Expected(?:\*\*)?:(?:\*\*)?\s+(.+?)\s*$", re.IGNORECASE
+)
+EXECUTION_RE = re.compile(
+    r"^\s*-\s+(?:\*\*)?Execution(?:\*\*)?:(?:\*\*)?\s+(.+?)\s*$", re.IGNORECASE
+)
+TOUCHED_PATHS_HEADING_RE = re.compile(
+    r"\n#{2,}[ \t]+Touched paths allowlist\b[^\n]*", re.IGNORECASE
+)
+NEXT_HEADING_RE = re.compile(r"\n#{1,6}[ \t]")
+BULLET_RE = re.compile(r"\n[ \t]*-[ \t]+([^\n]*?)[ \t]*(?=\r?\n|$)")
+TOKEN_RE = re.compile(
+    r"\n([ \t]*-[ \t]+(?:\*\*)?"
+    r"(AC\d|[Vv][Ee][Rr][Ii]|[Ee][Xx][Pp][Ee]|[Ee][Xx][Ee][Cc])[^\n]*)"
+)
+KEYWORD_DISPATCH: dict[str, tuple[str, re.Pattern]] = {
+    "ac": ("ac", AC_RE),
+    "veri": ("verification", VERIFICATION_RE),
+    "expe": ("expected", EXPECTED_RE),
+    "exec": ("execution", EXECUTION_RE),
+}
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class AcceptanceCriterion:
+    story_id: str
+    ac_id: str
+    command: str
+    expected: str
+    cwd: Path
+    serial: bool = False
+    locks: tuple[str, ...] = ()
+    inputs: tuple[str, ...] = ()
+    cache: bool = True
+    timeout: float | None = None
+    always_run: bool = False
+    shell: bool = False
+
+
+@dataclass(frozen=True)
+class StoryDocument:
+    story_id: str
+    path: Path
+    acs: tuple[AcceptanceCriterion, ...]
+    touched_paths: tuple[str, ...]
+    options: ExecutionOptions
+
+
+_CACHE: dict[tuple, object] = {}
+
+
+def _cached(path: Path, extra: tuple, build: Callable[[], T]) -> T:
+    """Memoize ``build()`` on (path, mtime, size, *extra)."""
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_mtime_ns, st.st_size, *extra)
+    hit = _CACHE.get(key)
+    if hit is None:
+        hit = _CACHE[key] = build()
+    return hit  # type: ignore[return-value]
+
+
+def strip_backticks(value: str) -> str:
+    trimmed = value.strip()
+    if trimmed[:1] == "`" and trimmed[-1:] == "`" and len(trimmed) >= 2:
+        return trimmed[1:-1].strip()
+    return trimmed
+
+
+def load_process(process_path: Path) -> tuple[str, ...]:
+    def build() -> tuple[str, ...]:
+        story_ids = tuple(
+            match.group(1)
+            for line in process_path.read_text(encoding="utf-8").splitlines()
+            if line[:1].isspace() or line[:1].isdigit()
+            for match in [PROCESS_STORY_RE.match(line)]
+            if match
+        )
+        if not story_ids:
+            raise ValueError(f"No stories found in process file: {process_path}")
+        return story_ids
+
+    return _cached(process_path, ("process",), build)
+
+
+def _touched_paths(text: str) -> tuple[tuple[str, ...], int, int]:
+    """Return the Touched paths allowlist entries and the section's span."""
+    heading = TOUCHED_PATHS_HEADING_RE.search(text) if "allowlist" in text.lower() else None
+    if heading is None:
+        return ((), -1, -1)
+    nxt = NEXT_HEADING_RE.search(text, heading.end())
+    end = nxt.start() if nxt else len(text)
+    paths = tuple(
+        strip_backticks(bullet.group(1))
+        for bullet in BULLET_RE.finditer(text, heading.end(), end)
+        if bullet.group(1)
+    )
+    return (paths, heading.end(), end)
+
+
+def _build_story(story_path: Path, story_id: str, repo_root: Path) -> StoryDocument:
+    """One pass over the keyword tokens; the AC state machine is fed inline."""
+    text = "\n" + story_path.read_text(encoding="utf-8")
+    touched, skip_start, skip_end = _touched_paths(text)
+    parsed: list[dict] = []
+    story_options = NO_OPTIONS
+    seen_options: dict[str, ExecutionOptions] = {"": NO_OPTIONS}
+    current: dict | None = None
+    line_no, pos = 0, 0
+
+    for token in TOKEN_RE.finditer(text):
+        start = token.start()
+        if skip_start <= start < skip_end:
+            continue
+        line_no += text.count("\n", pos, start + 1)
+        pos = start + 1
+        key = token.group(2)
+        kind, regex = KEYWORD_DISPATCH["ac" if key[0] in "Aa" else key.lower()]
+        match = regex.match(token.group(1))
+        if match is None:
+            continue
+        if kind == "ac":
+            if current is not None:
+                _check_complete(current, story_path)
+            current = {"ac": match.group(1), "ac_line": line_no, "cmd": None, "expected": None}
+            parsed.append(current)
+        elif current is None:
+            if kind == "execution":
+                where = f"line {line_no} in {story_path}"
+                story_options = parse_execution_options(
+                    strip_backticks(match.group(1)), repo_root, story_id, where
+                )
+        elif kind == "verification":
+            if current["cmd"] is not None:
+                raise ValueError(
+                    f"Multiple Verification lines for {current['ac']} "
+                    f"(lines {current['cmd_line']}, {line_no}) in {story_path}"
+                )
+            raw_options = match.group(1) or ""
+            if raw_options not in seen_options:
+                seen_options[raw_options] = parse_execution_options(
+                    raw_options, repo_root, story_id, f"line {line_no} in {story_path}"
+                )
+            current["options"] = seen_options[raw_options]
+            current["cmd"] = strip_backticks(match.group(2))
+            current["cmd_line"] = line_no
+        elif kind == "expected":
+            if current["cmd"] is None:
+                raise ValueError(f"Expected without Verification (line {line_no}) in {story_path}")
+            if current["expected"] is not None:
+                raise ValueError(
+                    f"Multiple Expected lines for {current['ac']} "
+                    f"(lines {current['expected_line']}, {line_no}) in {story_path}"
+                )
+            current["expected"] = strip_backticks(match.group(1))
+            current["expected_line"] = line_no
+
+    if current is not None:
+        _check_complete(current, story_path)
+    if not parsed:
+        raise ValueError(f"No AC verifications found in story: {story_path}")
+    return StoryDocument(
+        story_id=story_id,
+        path=story_path,
+        acs=tuple(_make_ac(item, story_id, story_options, repo_root) for item in parsed),
+        touched_paths=touched,
+        options=story_options,
+    )
+
+
+def _check_complete(item: dict, story_path: Path) -> None:
+    if item["cmd"] is None:
+        raise ValueError(
+            f"Missing Verification for {item['ac']} (line {item['ac_line']}) in {story_path}"
+        )
+    if item["expected"] is None:
+        raise ValueError(
+            f"Missing Expected for {item['ac']} (line {item['cmd_line']}) in {story_path}"
+        )
+
+
+def _make_ac(
+    item: dict, story_id: str, story_options: ExecutionOptions, repo_root: Path
+) -> AcceptanceCriterion:
+    options: ExecutionOptions = item["options"]
+    return AcceptanceCriterion(
+        story_id=story_id,
+        ac_id=item["ac"],
+        command=item["cmd"],
+        expected=item["expected"].strip(),
+        cwd=options.cwd or story_options.cwd or repo_root,
+        serial=story_options.serial or options.serial,
+        locks=tuple(dict.fromkeys(story_options.locks + options.locks)),
+        # Only explicit `inputs=` count: the Touched paths allowlist says what a story may
+        # change, not what its commands read.
+        inputs=tuple(dict.fromkeys(story_options.inputs + options.inputs)),
+        cache=story_options.cache and options.cache,
+        timeout=options.timeout or story_options.timeout,
+        always_run=story_options.always_run or options.always_run,
+        shell=story_options.shell or options.shell,
+    )
+
+
+def load_story(story_path: Path, story_id: str, repo_root: Path) -> StoryDocument:
+    """Parse a story file once per (path, mtime, size, story id, repo root)."""
+    return _cached(
+        story_path,
+        ("story", story_id, str(repo_root)),
+        lambda: _build_story(story_path, story_id, repo_root),
+    )
@@ -0,0 +1,88 @@
+"""`--profile` summary for story runner reports."""
+
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+
+from story_exec import shell_startup_seconds
+
+DEFAULT_PROFILE_TOP = 10
+
+
+def _fmt_seconds(value: float | None) -> str:
+    return "-" if value is None else f"{value:.2f}s"
+
+
+def _fmt_rss(kb: int | None) -> str:
+    return "-" if kb is None else f"{kb / 1024:.1f}MB"
+
+
+def story_totals(results: list[dict]) -> list[dict]:
+    """Aggregate executed AC cost per story, in first-seen story order."""
+    totals: dict[str, dict] = defaultdict(
+        lambda: {"acs": 0, "elapsed_s": 0.0, "cpu_s": 0.0, "max_rss_kb": None}
+    )
+    for record in results:
+        entry = totals[record["story_id"]]
+        entry["acs"] += 1
+        entry["elapsed_s"] += record.get("elapsed_s") or 0.0
+        entry["cpu_s"] += (record.get("cpu_user_s") or 0.0) + (record.get("cpu_system_s") or 0.0)
+        rss = record.get("max_rss_kb")
+        if rss is not None:
+            entry["max_rss_kb"] = max(rss, entry["max_rss_kb"] or 0)
+    return [
+        {
+            "story_id": story_id,
+            **{k: round(v, 3) if isinstance(v, float) else v for k, v in data.items()},
+        }
+        for story_id, data in totals.items()
+    ]
+
+
+def shell_savings(results: list[dict], pool_summary: dict | None) -> dict:
+    """Estimate shell startup time saved by exec mode and the warm session pool."""
+    executed = [r for r in results if not (r.get("cached") or r.get("resumed"))]
+    modes = Counter(r.get("exec_mode", "shell") for r in executed)
+    startup = shell_startup_seconds()
+    pool_startup = pool_summary["startup_s"] if pool_summary else 0.0
+    return {
+        "startup_s": round(startup, 4),
+        "exec": modes["exec"],
+        "pool": modes["pool"],
+        "shell": modes["shell"],
+        "pool_sessions": pool_summary["sessions"] if pool_summary else 0,
+        "saved_s": round(startup * (modes["exec"] + modes["pool"]) - pool_startup, 3),
+    }
+
+
+def print_profile(results: list[dict], timing: dict, top: int) -> None:
+    executed = [r for r in results if not (r.get("cached") or r.get("resumed"))]
+    resumed = sum(1 for r in results if r.get("resumed"))
+    print(
+        "PROFILE "
+        f"parse={_fmt_seconds(timing.get('parse_s'))} "
+        f"run={_fmt_seconds(timing.get('run_s'))} "
+        f"total={_fmt_seconds(timing.get('total_s'))} "
+        f"acs={len(results)} executed={len(executed)} "
+        f"cached={len(results) - len(executed) - resumed} resumed={resumed}"
+    )
+    shell = timing.get("shell")
+    if shell:
+        print(
+            f"SHELL exec={shell['exec']} pool={shell['pool']} shell={shell['shell']} "
+            f"sessions={shell['pool_sessions']} startup={shell['startup_s'] * 1000:.1f}ms "
+            f"saved~{shell['saved_s']:.2f}s"
+        )
+    print(f"Slowest ACs (top {top}):")
+    for record in sorted(executed, key=lambda r: -(r.get("elapsed_s") or 0.0))[:top]:
+        cpu = (record.get("cpu_user_s") or 0.0) + (record.get("cpu_system_s") or 0.0)
+        print(
+            f"  {_fmt_seconds(record.get('elapsed_s')):>9}  {record['story_id']} {record['ac_id']}"
+            f"  cpu={cpu:.2f}s rss={_fmt_rss(record.get('max_rss_kb'))} [{record.get('status')}]"
+        )
+    print(f"Slowest stories (top {top}, summed AC wall time):")
+    for entry in sorted(story_totals(executed), key=lambda e: -e["elapsed_s"])[:top]:
+        print(
+            f"  {_fmt_seconds(entry['elapsed_s']):>9}  {entry['story_id']}"
+            f"  acs={entry['acs']} cpu={entry['cpu_s']:.2f}s rss={_fmt_rss(entry['max_rss_kb'])}"
+        )
@@ -0,0 +1,168 @@
+"""AC records and JSON reports for the story runner.
+
+`evaluate` judges one command result against the AC's Expected and returns
+the record that ends up in the JSON report; `cached_record` builds the same
+record for a cache hit. The `write_*` helpers write the report files.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+from story_exec import CommandResult
+from story_parser import AcceptanceCriterion
+from story_profile import story_totals
+
+SKIPPED_USAGE = {"elapsed_s": 0.0, "cpu_user_s": None, "cpu_system_s": None, "max_rss_kb": None}
+EXPECTED_EXIT_RE = re.compile(r"\bexit(?:\s*code|code)?\s*[:=]?\s*(\d+)\b", re.IGNORECASE)
+
+
+def parse_expected(expected: str) -> tuple[str, int | None, str]:
+    cleaned = expected.strip()
+    match = EXPECTED_EXIT_RE.search(cleaned)
+    if match:
+        return ("exit", int(match.group(1)), cleaned)
+    return ("output", None, cleaned)
+
+
+def write_json(path: Path, payload: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+
+def ac_fields(ac: AcceptanceCriterion) -> dict:
+    """Identity part of an AC record; always taken from the AC itself, never a cache."""
+    expected_type, expected_code, expected_text = parse_expected(ac.expected)
+    return {
+        "story_id": ac.story_id,
+        "ac_id": ac.ac_id,
+        "command": ac.command,
+        "expected": ac.expected,
+        "expected_type": expected_type,
+        "expected_exit_code": expected_code,
+        "expected_text": expected_text if expected_type == "output" else None,
+        "cwd": str(ac.cwd),
+    }
+
+
+def cached_record(ac: AcceptanceCriterion, hit: dict) -> dict:
+    """Record for a cache hit: this AC's identity plus the stored verdict fields."""
+    return {
+        **ac_fields(ac),
+        "exit_code": hit.get("exit_code"),
+        "output_snippet": hit.get("output_snippet", ""),
+        "output_chars": hit.get("output_chars", 0),
+        "ok": True,
+        "status": "passed",
+        "error": None,
+        "cached": True,
+        "resumed": False,
+        "timeout_s": ac.timeout,
+        **SKIPPED_USAGE,
+        "exec_mode": hit.get("exec_mode"),
+    }
+
+
+def evaluate(ac: AcceptanceCriterion, result: CommandResult) -> tuple[dict, str | None]:
+    """Judge one AC run; return its JSON record and a failure line (or None)."""
+    label = f"{ac.story_id} {ac.ac_id}"
+    code = result.exit_code
+    expected_type, expected_code, expected_text = parse_expected(ac.expected)
+    record = {
+        **ac_fields(ac),
+        "exit_code": code,
+        "output_snippet": result.output_snippet,
+        "output_chars": result.output_chars,
+        "ok": True,
+        "status": "passed",
+        "error": None,
+        "cached": False,
+        "resumed": False,
+        "timeout_s": ac.timeout,
+        "elapsed_s": result.elapsed_s,
+        "cpu_user_s": result.cpu_user_s,
+        "cpu_system_s": result.cpu_system_s,
+        "max_rss_kb": result.max_rss_kb,
+        "exec_mode": result.mode,
+    }
+    failure: str | None = None
+    if result.timed_out:
+        record["status"] = "timeout"
+        record["error"] = f"timeout after {ac.timeout:g}s (elapsed {result.elapsed_s:.1f}s)"
+        failure = f"{label} timed out after {ac.timeout:g}s"
+    elif expected_type == "exit":
+        if code != expected_code:
+            record["error"] = f"exit={code} expected={expected_text}"
+            failure = f"{label} failed (exit={code}) expected={expected_text}"
+    elif expected_text and not result.matched:
+        record["error"] = f"missing expected output: {expected_text}"
+        failure = f"{label} missing expected output: {expected_text}"
+    elif code != 0:
+        record["error"] = f"exit={code} expected={ac.expected}"
+        failure = f"{label} failed (exit={code}) expected={ac.expected}"
+    record["ok"] = failure is None
+    if failure is not None and record["status"] == "passed":
+        record["status"] = "failed"
+    return record, failure
+
+
+def refuse_shell(json_output: Path | None, context: dict) -> int:
+    message = (
+        "Refusing to execute story verification commands without --allow-shell. "
+        "Story files may contain arbitrary commands; only use this on trusted input."
+    )
+    if json_output:
+        write_json(
+            json_output,
+            {"tool": "story-runner", **context, "error": message, "exit_code": 2},
+        )
+    print(f"ERROR: {message}", file=sys.stderr)
+    return 2
+
+
+def print_failures(failures: list[str], fail_fast: bool) -> None:
+    if failures and not fail_fast:
+        print("FAILED ACs:", file=sys.stderr)
+        for fail in failures:
+            print(f"- {fail}", file=sys.stderr)
+
+
+def run_timing(
+    parse_s: float, run_s: float, started: float, jobs: int, results: list[dict]
+) -> dict:
+    return {
+        "parse_s": round(parse_s, 3),
+        "run_s": round(run_s, 3),
+        "total_s": round(time.perf_counter() - started, 3),
+        "jobs": jobs,
+        "stories": story_totals(results),
+    }
+
+
+def write_report(
+    json_output: Path | None,
+    repo: Path,
+    process_path: Path,
+    results: list[dict],
+    failures: list[str],
+    exit_code: int,
+    **extra: object,
+) -> None:
+    if not json_output:
+        return
+    write_json(
+        json_output,
+        {
+            "tool": "story-runner",
+            "repo_root": str(repo),
+            "process": str(process_path),
+            "results": results,
+            "failures": failures,
+            "exit_code": exit_code,
+            **extra,
+        },
+    )
@@ -0,0 +1,96 @@
+"""Lock-aware worker pool for story runner acceptance criteria.
+
+Items are started in story/AC order. An item marked ``serial`` runs alone and
+acts as a barrier: nothing after it starts before it finishes. Items sharing a
+lock name never overlap and keep their relative order. Results are always
+returned (and reported) in item order, independent of completion order.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Sequence, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def _startable(
+    items: Sequence[T], pending: list[int], held: set[str], running: int, jobs: int
+) -> list[int]:
+    """Pick pending indexes that may start now, preserving order per lock."""
+    chosen: list[int] = []
+    blocked: set[str] = set()
+    for idx in pending:
+        if running + len(chosen) >= jobs:
+            break
+        item = items[idx]
+        if getattr(item, "serial", False):
+            if running == 0 and not chosen:
+                chosen.append(idx)
+            break
+        locks = set(getattr(item, "locks", ()))
+        if locks & (held | blocked):
+            blocked |= locks
+            continue
+        held = held | locks
+        chosen.append(idx)
+    return chosen
+
+
+def run_ordered(
+    items: Sequence[T],
+    run_one: Callable[[T], R],
+    *,
+    jobs: int,
+    fail_fast: bool,
+    failed: Callable[[R], bool],
+    on_start: Callable[[T], None] | None = None,
+    on_result: Callable[[R], None] | None = None,
+) -> list[R]:
+    """Run ``items`` on up to ``jobs`` workers and return results in item order.
+
+    With ``fail_fast`` the outcome matches a sequential run: once an item fails,
+    no later item is started, earlier pending items still run (one of them may
+    fail first), and the returned list ends at the first failing item.
+    ``on_start`` and ``on_result`` are called from the calling thread;
+    ``on_result`` sees results in item order.
+    """
+    results: dict[int, R] = {}
+    pending = list(range(len(items)))
+    running: dict[Future, int] = {}
+    held: set[str] = set()
+    serial_running = False
+    stop_at: int | None = None
+    next_emit = 0
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        while pending or running:
+            if not serial_running:
+                for idx in _startable(items, pending, held, len(running), jobs):
+                    item = items[idx]
+                    pending.remove(idx)
+                    held |= set(getattr(item, "locks", ()))
+                    serial_running = bool(getattr(item, "serial", False))
+                    if on_start is not None:
+                        on_start(item)
+                    running[pool.submit(run_one, item)] = idx
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in sorted(done, key=lambda f: running[f]):
+                idx = running.pop(fut)
+                item = items[idx]
+                held -= set(getattr(item, "locks", ()))
+                if getattr(item, "serial", False):
+                    serial_running = False
+                results[idx] = fut.result()
+                if fail_fast and failed(results[idx]) and (stop_at is None or idx < stop_at):
+                    stop_at = idx
+                    pending = [i for i in pending if i < idx]
+            while next_emit in results and (stop_at is None or next_emit <= stop_at):
+                if on_result is not None:
+                    on_result(results[next_emit])
+                next_emit += 1
+
+    return [results[i] for i in sorted(results) if stop_at is None or i <= stop_at]
@@ -0,0 +1,198 @@
+"""Warm shell sessions for story runner verifications that still need a shell.
+
+With `--shell-pool`, long-lived `/bin/sh` (PowerShell on Windows) processes
+are kept around and each command goes to an idle one instead of starting a new
+interpreter per AC. On POSIX every command runs in a fresh subshell via `eval`
+with stdin from /dev/null, so `cd`, `exit` and variables do not leak into the
+next AC. PowerShell runs it through `Invoke-Expression`; only the location is
+reset there, other session state can leak. The end of a command's output is a
+per-session sentinel line carrying the exit code. Sessions that time out or die
+are discarded. CPU time and peak RSS are not attributed per command here.
+"""
+
+from __future__ import annotations
+
+import os
+import shlex
+import signal
+import subprocess
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from story_exec import (
+    KILL_GRACE_SECONDS,
+    CommandResult,
+    OutputCapture,
+    kill_process_tree,
+    process_group_kwargs,
+    stream_output,
+)
+
+
+def _ps_quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+class ShellSession:
+    def __init__(self) -> None:
+        self.sentinel = f"__story_runner_{uuid.uuid4().hex}__"
+        self.alive = True
+        if os.name == "nt":
+            argv = ["powershell", "-NoProfile", "-NonInteractive", "-Command", "-"]
+        else:
+            argv = ["/bin/sh", "-s"]
+        started = time.perf_counter()
+        self.proc = subprocess.Popen(
+            argv,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            **process_group_kwargs(),
+        )
+        warmup = self.run("$null" if os.name == "nt" else ":", Path.cwd())
+        self.startup_s = time.perf_counter() - started
+        if warmup.exit_code != 0 or not self.alive:
+            self.close()
+            raise RuntimeError(f"shell session failed to start: {warmup.output_snippet}")
+
+    def _script(self, command: str, cwd: Path) -> bytes:
+        if os.name == "nt":
+            script = (
+                "$global:LASTEXITCODE = 0; $__ok = $true; "
+                f"try {{ Set-Location -LiteralPath {_ps_quote(str(cwd))}; "
+                f"Invoke-Expression {_ps_quote(command)} 2>&1 | Out-String -Stream -Width 4096; "
+                "$__ok = $? } catch { $_ | Out-String -Stream; $__ok = $false }; "
+                "$__code = if ($LASTEXITCODE) { $LASTEXITCODE } elseif ($__ok) { 0 } else { 1 }; "
+                f"[Console]::Out.Write(\"`n{self.sentinel} $__code`n\"); [Console]::Out.Flush()"
+            )
+        else:
+            script = (
+                f"cd -- {shlex.quote(str(cwd))} && (eval {shlex.quote(command)}) </dev/null 2>&1; "
+                f"printf '\\n%s %s\\n' {self.sentinel} \"$?\""
+            )
+        return (script + "\n").encode("utf-8")
+
+    def run(
+        self,
+        command: str,
+        cwd: Path,
+        expected_text: str | None = None,
+        log_path: Path | None = None,
+        timeout: float | None = None,
+    ) -> CommandResult:
+        """Run one command in this session; the session is unusable if ``alive`` drops."""
+        capture = OutputCapture(expected_text)
+        timed_out = threading.Event()
+        finished = threading.Event()
+        timer: threading.Timer | None = None
+        log = None
+        if log_path is not None:
+            log_path.parent.mkdir(parents=True, exist_ok=True)
+            log = log_path.open("wb")
+        started = time.monotonic()
+        assert self.proc.stdin is not None and self.proc.stdout is not None
+        try:
+            if timeout is not None:
+                timer = threading.Timer(
+                    timeout, kill_process_tree, args=(self.proc, timed_out, finished)
+                )
+                timer.daemon = True
+                timer.start()
+            try:
+                self.proc.stdin.write(self._script(command, cwd))
+                self.proc.stdin.flush()
+                line = stream_output(self.proc.stdout, capture, log, stop=self.sentinel.encode())
+            except OSError:
+                line = b""
+        finally:
+            finished.set()
+            if timer is not None:
+                timer.cancel()
+            if log is not None:
+                log.close()
+        try:
+            code = int(line.split()[-1]) if line else None
+        except ValueError:
+            code = None
+        if code is None or timed_out.is_set():
+            # The session exited (e.g. `exit` in PowerShell) or was killed.
+            self.alive = False
+            code = self.proc.wait() if code is None else code
+        return CommandResult(
+            exit_code=code,
+            output_snippet=capture.snippet(),
+            matched=capture.matched,
+            output_chars=capture.total,
+            timed_out=timed_out.is_set(),
+            elapsed_s=round(time.monotonic() - started, 3),
+            mode="pool",
+        )
+
+    def close(self) -> None:
+        """End the session and anything it left running in its process group."""
+        self.alive = False
+        try:
+            if self.proc.stdin is not None:
+                self.proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.proc.wait(KILL_GRACE_SECONDS)
+        except subprocess.TimeoutExpired:
+            pass
+        if os.name == "nt":
+            if self.proc.poll() is None:
+                kill_process_tree(self.proc, threading.Event(), threading.Event())
+        else:
+            try:
+                os.killpg(self.proc.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+        self.proc.wait()
+        if self.proc.stdout is not None:
+            self.proc.stdout.close()
+
+
+class ShellPool:
+    """Idle warm sessions, created on demand (at most one per concurrent AC)."""
+
+    def __init__(self) -> None:
+        self._idle: list[ShellSession] = []
+        self._lock = threading.Lock()
+        self.sessions = 0
+        self.startup_s = 0.0
+
+    def run_command(
+        self,
+        command: str,
+        cwd: Path,
+        expected_text: str | None = None,
+        log_path: Path | None = None,
+        timeout: float | None = None,
+    ) -> CommandResult:
+        with self._lock:
+            session = self._idle.pop() if self._idle else None
+        if session is None:
+            session = ShellSession()
+            with self._lock:
+                self.sessions += 1
+                self.startup_s += session.startup_s
+        try:
+            return session.run(command, cwd, expected_text, log_path, timeout)
+        finally:
+            with self._lock:
+                if session.alive:
+                    self._idle.append(session)
+            if not session.alive:
+                session.close()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for session in idle:
+            session.close()
+
+    def summary(self) -> dict:
+        return {"sessions": self.sessions, "startup_s": round(self.startup_s, 3)}
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from story_cache import VerificationCache
+from story_jobs import Job, run_jobs
+from story_parser import AcceptanceCriterion
+
+
+def _ac(story_id: str, repo: Path, command: str = "echo shared") -> AcceptanceCriterion:
+    return AcceptanceCriterion(
+        story_id=story_id,
+        ac_id="AC1",
+        command=command,
+        expected="shared",
+        cwd=repo,
+        inputs=("input.txt",),
+    )
+
+
+def _run(repo: Path, cache: VerificationCache, acs: list[AcceptanceCriterion]) -> list[dict]:
+    outcomes, _, _ = run_jobs(
+        [Job("", ac) for ac in acs], jobs=1, fail_fast=True, cache=cache, log_dir=None
+    )
+    return [record for _, record, _ in outcomes]
+
+
+def test_hit_keeps_identity_of_current_ac(git_repo: Path, tmp_path_factory) -> None:
+    cache_dir = tmp_path_factory.mktemp("cache")
+    acs = [_ac("AAA-001", git_repo), _ac("AAA-002", git_repo)]
+
+    first = _run(git_repo, VerificationCache(cache_dir, git_repo), acs)
+    assert [r["cached"] for r in first] == [False, False]
+
+    second = _run(git_repo, VerificationCache(cache_dir, git_repo), acs)
+    assert [r["cached"] for r in second] == [True, True]
+    assert [(r["story_id"], r["ac_id"]) for r in second] == [("AAA-001", "AC1"), ("AAA-002", "AC1")]
+    assert all(r["command"] == "echo shared" and r["cwd"] == str(git_repo) for r in second)
+    assert second[0]["output_snippet"] == "shared"
+
+
+def test_changed_input_misses(git_repo: Path, tmp_path_factory) -> None:
+    cache_dir = tmp_path_factory.mktemp("cache")
+    acs = [_ac("AAA-001", git_repo)]
+    _run(git_repo, VerificationCache(cache_dir, git_repo), acs)
+
+    (git_repo / "input.txt").write_text("v2\n", encoding="utf-8")
+    assert _run(git_repo, VerificationCache(cache_dir, git_repo), acs)[0]["cached"] is False
+
+
+def test_failures_are_not_stored(git_repo: Path, tmp_path_factory) -> None:
+    cache_dir = tmp_path_factory.mktemp("cache")
+    acs = [_ac("AAA-001", git_repo, command="echo other")]
+    assert _run(git_repo, VerificationCache(cache_dir, git_repo), acs)[0]["ok"] is False
+
+    cache = VerificationCache(cache_dir, git_repo)
+    assert _run(git_repo, cache, acs)[0]["cached"] is False
+    assert cache.stats["stored"] == 0
+
+
+def test_entries_hold_only_verdict_fields(git_repo: Path, tmp_path_factory) -> None:
+    cache_dir = tmp_path_factory.mktemp("cache")
+    cache = VerificationCache(cache_dir, git_repo)
+    key = cache.key("echo shared", git_repo, "shared", ("input.txt",))
+    cache.put(key, {"story_id": "AAA-001", "exit_code": 0, "output_snippet": "shared"})
+
+    assert set(cache.get(key)) == {"exit_code", "output_snippet", "output_chars", "exec_mode"}
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+from story_exec import exec_argv, run_command
+
+posix_only = pytest.mark.skipif(os.name == "nt", reason="POSIX exec semantics")
+
+
+def _script(path: Path, body: str) -> Path:
+    path.write_text(body, encoding="utf-8")
+    path.chmod(0o755)
+    return path
+
+
+def test_plain_command_runs_in_exec_mode(tmp_path: Path) -> None:
+    result = run_command("echo exec-ok", cwd=tmp_path, expected_text="exec-ok")
+    assert (result.mode, result.exit_code, result.matched) == ("exec", 0, True)
+
+
+def test_metacharacters_keep_the_shell(tmp_path: Path) -> None:
+    assert exec_argv("echo a | cat", tmp_path) is None
+    assert run_command("echo a | cat", cwd=tmp_path).mode == "shell"
+
+
+@posix_only
+def test_script_without_shebang_falls_back_to_shell(tmp_path: Path) -> None:
+    _script(tmp_path / "check", "echo no-shebang-ok\n")
+
+    result = run_command("./check", cwd=tmp_path, expected_text="no-shebang-ok")
+
+    assert (result.mode, result.exit_code, result.matched) == ("shell", 0, True)
+
+
+@posix_only
+def test_relative_program_resolves_against_ac_cwd(tmp_path: Path) -> None:
+    first, second = tmp_path / "a", tmp_path / "b"
+    first.mkdir()
+    second.mkdir()
+    _script(first / "tool", "#!/bin/sh\necho from-a\n")
+    _script(second / "tool", "#!/bin/sh\necho from-b\n")
+
+    assert exec_argv("./tool", first) == (str(first / "tool"),)
+    assert exec_argv("./tool", second) == (str(second / "tool"),)
+    assert exec_argv("./tool", tmp_path) is None
+    assert run_command("./tool", cwd=second, expected_text="from-b").matched
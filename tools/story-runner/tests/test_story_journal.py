@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import story_runner
+from story_jobs import Job, run_jobs
+from story_journal import CheckpointJournal
+from story_parser import AcceptanceCriterion
+
+
+def _acs(repo: Path, marker: Path) -> list[AcceptanceCriterion]:
+    # AC2 passes only once the marker exists, so the first run fails there.
+    return [
+        AcceptanceCriterion("AAA-001", "AC1", "echo one", "one", repo),
+        AcceptanceCriterion("AAA-001", "AC2", f"cat {marker}", "ready", repo),
+    ]
+
+
+def _run(acs: list[AcceptanceCriterion], journal: CheckpointJournal) -> list[dict]:
+    try:
+        outcomes, _, _ = run_jobs(
+            [Job("", ac) for ac in acs],
+            jobs=1,
+            fail_fast=False,
+            cache=None,
+            log_dir=None,
+            journal=journal,
+        )
+    finally:
+        journal.close()
+    return [record for _, record, _ in outcomes]
+
+
+def test_resume_skips_passed_acs_on_same_commit(tmp_path: Path) -> None:
+    path, marker = tmp_path / "run.journal.jsonl", tmp_path / "marker"
+    acs = _acs(tmp_path, marker)
+
+    first = _run(acs, CheckpointJournal(path, "c1"))
+    assert [r["ok"] for r in first] == [True, False]
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 2
+
+    marker.write_text("ready\n", encoding="utf-8")
+    second = _run(acs, CheckpointJournal(path, "c1", resume=True))
+    assert [(r["ok"], r["resumed"]) for r in second] == [(True, True), (True, False)]
+
+    other_commit = _run(acs, CheckpointJournal(path, "c2", resume=True))
+    assert [r["resumed"] for r in other_commit] == [False, False]
+
+
+def test_changed_command_is_not_resumed(tmp_path: Path) -> None:
+    path = tmp_path / "run.journal.jsonl"
+    ac = AcceptanceCriterion("AAA-001", "AC1", "echo one", "one", tmp_path)
+    _run([ac], CheckpointJournal(path, "c1"))
+
+    changed = AcceptanceCriterion("AAA-001", "AC1", "echo one two", "one", tmp_path)
+    assert _run([changed], CheckpointJournal(path, "c1", resume=True))[0]["resumed"] is False
+
+
+def test_torn_last_line_is_ignored(tmp_path: Path) -> None:
+    path = tmp_path / "run.journal.jsonl"
+    ac = AcceptanceCriterion("AAA-001", "AC1", "echo one", "one", tmp_path)
+    ac2 = AcceptanceCriterion("AAA-001", "AC2", "echo two", "two", tmp_path)
+    _run([ac], CheckpointJournal(path, "c1"))
+    with path.open("a", encoding="utf-8") as fh:
+        fh.write('{"format": 1, "commit": "c1", "rec')
+
+    first = _run([ac, ac2], CheckpointJournal(path, "c1", resume=True))
+    assert [r["resumed"] for r in first] == [True, False]
+    # AC2's record must not be glued to the torn line, so a second resume skips both.
+    second = _run([ac, ac2], CheckpointJournal(path, "c1", resume=True))
+    assert [r["resumed"] for r in second] == [True, True]
+    assert all(json.loads(line) for line in path.read_text(encoding="utf-8").splitlines())
+
+
+def test_json_output_alone_writes_no_journal(tmp_path: Path, monkeypatch) -> None:
+    seen: dict = {}
+    monkeypatch.setattr(story_runner, "verify", lambda **kwargs: seen.update(kwargs) or 0)
+    out = tmp_path / "report.json"
+    argv = ["verify", "--process", "p.md", "--allow-shell", "--json-output", str(out)]
+
+    assert story_runner.main(argv) == 0
+    assert seen["journal"] is None
+
+    assert story_runner.main([*argv, "--resume"]) == 0
+    assert seen["journal"].path == tmp_path / "report.journal.jsonl"
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from story_options import parse_execution_options
+from story_parser import load_story
+
+STORY = """# AAA-001
+
+- Execution: lock=story, timeout=30
+
+## Acceptance criteria
+- **AC1:** builds
+  - Verification (cwd=sub, inputs=src/*, serial): `make build`
+  - Expected: exit code 0
+- **AC2:** reports
+  - Verification: `echo done`
+  - Expected: done
+
+## Touched paths allowlist
+- src/
+"""
+
+
+def test_story_options_are_merged_per_ac(tmp_path: Path) -> None:
+    story = tmp_path / "AAA-001.md"
+    story.write_text(STORY, encoding="utf-8")
+
+    doc = load_story(story, "AAA-001", tmp_path)
+
+    first, second = doc.acs
+    assert (first.command, first.cwd, first.serial) == ("make build", tmp_path / "sub", True)
+    assert first.inputs == ("src/*",) and second.inputs == ()
+    assert first.locks == second.locks == ("story:AAA-001",)
+    assert first.timeout == second.timeout == 30.0
+    assert doc.touched_paths == ("src/",)
+
+
+@pytest.mark.parametrize("raw", ["bogus", "timeout=0", "timeout=soon"])
+def test_invalid_options_are_rejected(raw: str, tmp_path: Path) -> None:
+    with pytest.raises(ValueError):
+        parse_execution_options(raw, tmp_path, "AAA-001", "line 1")